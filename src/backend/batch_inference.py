@@ -0,0 +1,133 @@
+# src/backend/batch_inference.py
+import os
+import time
+import psutil
+import torch
+from detections import boxes_from_result
+
+MAX_BATCH_SIZE = 16
+# Rough working-set cost of one frame through the model (input tensor,
+# activations and NMS buffers); used only to pick a batch size
+BYTES_PER_FRAME_GPU = 256 * 1024 * 1024
+BYTES_PER_FRAME_CPU = 128 * 1024 * 1024
+
+
+def auto_batch_size(device=None, max_batch_size: int = MAX_BATCH_SIZE) -> int:
+    """Pick the largest batch size that fits in the memory currently available"""
+    device = torch.device(device) if device is not None else (
+        torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    )
+    if device.type == "cuda":
+        free, _ = torch.cuda.mem_get_info(device)
+        per_frame = BYTES_PER_FRAME_GPU
+    else:
+        # Leave half of the free RAM for decode, encode and other jobs
+        free = psutil.virtual_memory().available // 2
+        per_frame = BYTES_PER_FRAME_CPU
+
+    size = 1
+    while size * 2 <= max_batch_size and size * 2 * per_frame <= free:
+        size *= 2
+    return size
+
+
+def configured_batch_size(device=None) -> int:
+    """Batch size from SERGEK_BATCH_SIZE, or auto-tuned when unset or 'auto'"""
+    value = os.environ.get("SERGEK_BATCH_SIZE", "auto")
+    if value == "auto":
+        return auto_batch_size(device)
+    return max(1, int(value))
+
+
+class BatchInference:
+    """Runs frames through a YOLO model N at a time, keeping frame order
+
+    With a `resizer` (resize.FrameResizer) frames are downscaled into its
+    reused buffers before inference; use predict_boxes to get boxes back in
+    source coordinates.
+    With `timings` (pipeline.StageTimings) the resize, preprocess,
+    inference and postprocess time of every frame is recorded; the middle
+    three come from ultralytics' own per-image measurements.
+    Models exported at a fixed batch size (`model.fixed_batch`, set by
+    inference_backends.load_yolo) get batches of exactly that size: larger
+    batches are split and the last one is padded by repeating its final
+    frame, whose extra results are dropped.
+    """
+
+    def __init__(self, model, batch_size: int = None, conf: float = 0.3, resizer=None,
+                 timings=None, **predict_kwargs):
+        self.model = model
+        # A fixed-batch export costs the same for fewer frames, so fill it
+        self.batch_size = (batch_size or getattr(model, "fixed_batch", None)
+                           or configured_batch_size(model.device))
+        self.conf = conf
+        self.resizer = resizer
+        self.timings = timings
+        self.predict_kwargs = predict_kwargs
+        if resizer is not None:
+            resizer.reserve(self.batch_size)
+            self.predict_kwargs.setdefault("imgsz", resizer.imgsz)
+
+    def predict(self, frames: list) -> list:
+        """Return one CPU result per input frame, in input order"""
+        if not frames:
+            return []
+        if self.resizer is not None:
+            start = time.perf_counter()
+            self.resizer.reserve(len(frames))
+            frames = [self.resizer.prepare(frame, slot) for slot, frame in enumerate(frames)]
+            self._record("resize", time.perf_counter() - start, len(frames))
+        fixed = getattr(self.model, "fixed_batch", None)
+        if not fixed:
+            results = self._predict(frames)
+        else:
+            results = []
+            for start in range(0, len(frames), fixed):
+                chunk = frames[start:start + fixed]
+                padded = chunk + [chunk[-1]] * (fixed - len(chunk))
+                results.extend(self._predict(padded)[:len(chunk)])
+        if self.timings is not None:
+            for stage in ("preprocess", "inference", "postprocess"):
+                ms = sum(result.speed.get(stage) or 0.0 for result in results)
+                self.timings.add(stage, ms / 1000, len(results))
+        return [result.cpu() for result in results]
+
+    def _predict(self, frames: list) -> list:
+        return self.model.predict(
+            frames,
+            conf=self.conf,
+            agnostic_nms=False,
+            verbose=False,
+            **self.predict_kwargs
+        )
+
+    def predict_boxes(self, frames: list) -> list:
+        """(N, 6) boxes per input frame, in source frame coordinates"""
+        results = self.predict(frames)
+        start = time.perf_counter()
+        boxes = [boxes_from_result(result) for result in results]
+        if self.resizer is not None:
+            boxes = [self.resizer.to_source(b) for b in boxes]
+        self._record("postprocess", time.perf_counter() - start, 0)
+        return boxes
+
+    def _record(self, stage: str, seconds: float, items: int):
+        if self.timings is not None:
+            self.timings.add(stage, seconds, items)
+
+    def run(self, frames):
+        """Consume an iterable of (frame_number, frame) and yield
+        (frame_number, frame, result) in the original order"""
+        batch = []
+        for item in frames:
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                yield from self._flush(batch)
+                batch = []
+        if batch:
+            yield from self._flush(batch)
+
+    def _flush(self, batch):
+        results = self.predict([frame for _, frame in batch])
+        for (frame_number, frame), result in zip(batch, results):
+            yield frame_number, frame, result
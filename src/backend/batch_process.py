@@ -0,0 +1,193 @@
+# src/backend/batch_process.py
+"""Bulk offline processing of a directory or manifest of videos
+
+Videos are spread over a pool of worker processes. Each worker loads the
+models once and then runs process_video on one video after another. Every
+finished (or failed) video is appended to checkpoint.jsonl in the output
+directory, so an interrupted run resumes where it stopped and only
+retries the failures. Once all videos are done, their predictions and
+events are consolidated into one columnar dataset.npz
+(predictions_store.load_dataset). `--headless` skips drawing and
+encoding, producing detections only.
+
+A manifest is a text file with one video path per line, or a CSV with a
+`path` column; relative paths are resolved against the manifest's folder.
+
+Usage: python batch_process.py <directory|manifest> <output_dir> [--workers 2] [--headless]
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import pandas as pd
+from predictions_store import predictions_path, load_predictions, load_events, save_dataset
+from sharding import _init_shard_worker, SHARD_DEVICES
+
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".avi", ".mkv", ".m4v", ".webm"}
+CHECKPOINT_NAME = "checkpoint.jsonl"
+DATASET_NAME = "dataset.npz"
+BATCH_WORKERS = int(os.environ.get("SERGEK_BATCH_WORKERS", "2"))
+
+
+def list_videos(source: Path) -> tuple:
+    """(root, absolute video paths) for a directory (searched recursively) or a manifest"""
+    if source.is_dir():
+        videos = sorted(p.resolve() for p in source.rglob("*")
+                        if p.is_file() and p.suffix.lower() in VIDEO_EXTENSIONS)
+        return source, videos
+    if source.suffix.lower() == ".csv":
+        paths = pd.read_csv(source)["path"].dropna().astype(str).tolist()
+    else:
+        lines = [line.strip() for line in source.read_text().splitlines()]
+        paths = [line for line in lines if line and not line.startswith("#")]
+    return source.parent, [(source.parent / p).resolve() for p in paths]
+
+
+def output_for(video: Path, root: Path, output_dir: Path) -> Path:
+    """Output video path mirroring `video`'s place under `root`
+
+    The source extension stays in the name, so a.mp4 and a.mov next to each
+    other do not overwrite each other's outputs.
+    """
+    try:
+        relative = video.relative_to(root.resolve())
+    except ValueError:
+        relative = Path(*video.parts[1:])
+    extension = relative.suffix.lstrip(".")
+    return output_dir / relative.parent / f"processed_{relative.stem}_{extension}.mp4"
+
+
+def read_checkpoint(path: Path) -> dict:
+    """Latest checkpoint record per video; a torn last line is ignored"""
+    records = {}
+    if path.exists():
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record["video"]] = record
+    return records
+
+
+def append_checkpoint(path: Path, record: dict):
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _process_one(video: str, output_path: str, options: dict) -> dict:
+    from ml_processor import process_video
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    return process_video(video, output_path, show_preview=False, **options)
+
+
+def consolidate(videos: list, checkpoint: dict, dataset_path: Path) -> Path:
+    """Stack the per-video predictions of every finished video into one dataset"""
+    done = [str(v) for v in videos if checkpoint.get(str(v), {}).get("status") == "done"]
+    fps, detections, events = [], [], []
+    for video in done:
+        path = checkpoint[video]["predictions"]
+        records, video_fps, _ = load_predictions(path)
+        fps.append(video_fps)
+        detections.append(records)
+        events.append(load_events(path))
+    save_dataset(dataset_path, done, fps, detections, events)
+    return dataset_path
+
+
+def run_batch(source: str, output_dir: str, workers: int = BATCH_WORKERS,
+              devices: list = None, **options) -> Path:
+    """Process every video of `source` not yet done, then write the dataset
+
+    `options` are passed on to process_video (e.g. annotate=False for
+    headless runs). Returns the dataset path.
+    """
+    root, videos = list_videos(Path(source))
+    output_dir = Path(output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint_path = output_dir / CHECKPOINT_NAME
+    checkpoint = read_checkpoint(checkpoint_path)
+
+    def is_done(video: Path) -> bool:
+        record = checkpoint.get(str(video))
+        return (record is not None and record["status"] == "done"
+                and os.path.exists(record["predictions"]))
+
+    pending = [v for v in videos if not is_done(v)]
+    print(f"{len(videos)} videos, {len(videos) - len(pending)} already done, "
+          f"{len(pending)} to process with {workers} workers")
+
+    if pending:
+        devices = devices if devices is not None else SHARD_DEVICES
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        ctx = mp.get_context("spawn")
+        started = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_shard_worker,
+            initargs=(ctx.Value("i", 0), devices, threads)
+        ) as pool:
+            futures = {}
+            for video in pending:
+                output_path = output_for(video, root, output_dir)
+                future = pool.submit(_process_one, str(video), str(output_path), options)
+                futures[future] = (video, output_path)
+            try:
+                for finished, future in enumerate(as_completed(futures), 1):
+                    video, output_path = futures[future]
+                    record = {"video": str(video), "time": time.time()}
+                    try:
+                        report = future.result()
+                        record.update({
+                            "status": "done",
+                            "predictions": predictions_path(output_path),
+                            "output": str(output_path) if options.get("annotate", True) else None,
+                            "frames": report["frames"],
+                            "fps": report["fps"],
+                        })
+                    except Exception as e:
+                        record.update({"status": "failed", "error": str(e)})
+                    append_checkpoint(checkpoint_path, record)
+                    checkpoint[str(video)] = record
+                    elapsed = time.perf_counter() - started
+                    print(f"[{finished}/{len(pending)}] {record['status']}: {video} "
+                          f"({finished / elapsed:.2f} videos/s)")
+            except KeyboardInterrupt:
+                pool.shutdown(wait=False, cancel_futures=True)
+                print("Interrupted; run again to resume")
+                raise
+
+    failed = [v for v in videos if checkpoint.get(str(v), {}).get("status") == "failed"]
+    if failed:
+        print(f"{len(failed)} videos failed; run again to retry them")
+    dataset = consolidate(videos, checkpoint, output_dir / DATASET_NAME)
+    print(f"Dataset saved at: {dataset}")
+    return dataset
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process a directory or manifest of videos")
+    parser.add_argument("source", help="Directory of videos, or a manifest (.txt or .csv)")
+    parser.add_argument("output_dir")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--headless", action="store_true",
+                        help="Only produce detections; skip drawing and encoding videos")
+    parser.add_argument("--sampling", choices=["all", "stride", "motion"])
+    parser.add_argument("--inference-size", type=int)
+    parser.add_argument("--cascade", choices=["off", "frame", "crop"])
+    parser.add_argument("--decoder", choices=["opencv", "pyav", "auto"])
+    parser.add_argument("--keyframes", type=int, metavar="K")
+    args = parser.parse_args()
+
+    options = {"annotate": not args.headless}
+    for name in ("sampling", "inference_size", "cascade", "decoder", "keyframes"):
+        if getattr(args, name) is not None:
+            options[name] = getattr(args, name)
+    run_batch(args.source, args.output_dir, args.workers, **options)
@@ -0,0 +1,105 @@
+# src/backend/benchmark_backends.py
+"""Detection parity and per-frame latency of exported inference backends
+
+Every backend/precision combination is compared against the PyTorch .pt
+checkpoint on the same frames: agreement is the F1 of boxes matched at
+IoU >= 0.5 with the same class, plus the mean confidence difference of
+matched boxes.
+
+Usage: python benchmark_backends.py <video_path> [weights_name ...] [--frames N]
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from model_registry import WEIGHTS
+from inference_backends import load_yolo, check_backend
+from detections import boxes_from_result, CONF_THRESHOLD
+from sampling import box_iou
+from benchmark_batch import load_frames
+
+COMBINATIONS = [
+    ("pytorch", "fp32"),
+    ("torchscript", "fp32"),
+    ("onnx", "fp32"),
+    ("openvino", "fp32"),
+    ("openvino", "fp16"),
+    ("openvino", "int8"),
+]
+MATCH_IOU = 0.5
+
+
+def run_backend(weights_path, backend: str, precision: str, frames: list):
+    model = load_yolo(weights_path, backend=backend, precision=precision)
+    model.predict(frames[0][1], conf=CONF_THRESHOLD, verbose=False)  # warm-up
+    latencies = []
+    outputs = []
+    for _, frame in frames:
+        start = time.perf_counter()
+        result = model.predict(frame, conf=CONF_THRESHOLD, verbose=False)[0]
+        latencies.append(time.perf_counter() - start)
+        outputs.append(boxes_from_result(result))
+    return outputs, np.array(latencies) * 1000
+
+
+def agreement(reference: list, candidate: list) -> dict:
+    matched = total_ref = total_cand = 0
+    conf_diffs = []
+    for ref, cand in zip(reference, candidate):
+        total_ref += len(ref)
+        total_cand += len(cand)
+        if not len(ref) or not len(cand):
+            continue
+        iou = box_iou(ref, cand)
+        iou[ref[:, None, 5] != cand[None, :, 5]] = 0
+        used = set()
+        for i in np.argsort(-ref[:, 4]):
+            j = int(np.argmax(iou[i]))
+            if iou[i, j] >= MATCH_IOU and j not in used:
+                used.add(j)
+                matched += 1
+                conf_diffs.append(abs(float(ref[i, 4]) - float(cand[j, 4])))
+    precision = matched / total_cand if total_cand else 1.0
+    recall = matched / total_ref if total_ref else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "agreement_f1": round(f1, 4),
+        "mean_conf_diff": round(float(np.mean(conf_diffs)), 4) if conf_diffs else 0.0,
+    }
+
+
+def benchmark(video_path: str, names: list, max_frames: int = 200):
+    frames = load_frames(video_path, max_frames)
+    rows = []
+    for name in names:
+        weights_path = WEIGHTS[name]
+        baseline = None
+        for backend, precision in COMBINATIONS:
+            try:
+                check_backend(backend, precision)
+                outputs, latencies = run_backend(weights_path, backend, precision, frames)
+            except Exception as e:
+                print(f"Skipping {name} {backend}/{precision}: {e}")
+                continue
+            if baseline is None:
+                baseline = outputs
+            rows.append({
+                "model": name,
+                "backend": backend,
+                "precision": precision,
+                "latency_mean_ms": round(float(latencies.mean()), 2),
+                "latency_p95_ms": round(float(np.percentile(latencies, 95)), 2),
+                **agreement(baseline, outputs),
+            })
+    table = pd.DataFrame(rows)
+    print(table.to_string(index=False))
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backend parity and latency benchmark")
+    parser.add_argument("video_path")
+    parser.add_argument("names", nargs="*", default=list(WEIGHTS))
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+    benchmark(args.video_path, args.names, args.frames)
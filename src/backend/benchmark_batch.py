@@ -0,0 +1,50 @@
+# src/backend/benchmark_batch.py
+"""Compare inference frames/sec at different batch sizes on a sample clip
+
+Usage: python benchmark_batch.py <video_path> [max_frames]
+"""
+import sys
+import time
+import cv2
+from model_registry import get_registry
+from batch_inference import BatchInference
+
+BATCH_SIZES = [1, 4, 8, 16]
+
+
+def load_frames(video_path: str, max_frames: int) -> list:
+    video = cv2.VideoCapture(video_path)
+    if not video.isOpened():
+        raise Exception("Error opening video file")
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = video.read()
+        if not ret:
+            break
+        frames.append((len(frames) + 1, frame))
+    video.release()
+    return frames
+
+
+def benchmark(video_path: str, max_frames: int = 256):
+    # Decode up front so only inference is timed
+    frames = load_frames(video_path, max_frames)
+    model = get_registry().get("accident")
+    print(f"Benchmarking {len(frames)} frames from {video_path} on {model.device}")
+
+    results = {}
+    for batch_size in BATCH_SIZES:
+        engine = BatchInference(model, batch_size=batch_size, conf=0.3)
+        start = time.perf_counter()
+        processed = sum(1 for _ in engine.run(iter(frames)))
+        elapsed = time.perf_counter() - start
+        results[batch_size] = processed / elapsed
+        print(f"batch={batch_size:>2}  {results[batch_size]:7.2f} frames/sec")
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or len(sys.argv) > 3:
+        print("Usage: python benchmark_batch.py <video_path> [max_frames]")
+        sys.exit(1)
+    benchmark(sys.argv[1], int(sys.argv[2]) if len(sys.argv) == 3 else 256)
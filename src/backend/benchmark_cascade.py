@@ -0,0 +1,77 @@
+# src/backend/benchmark_cascade.py
+"""Speedup and recall of the vehicle-gated cascade against single-stage inference
+
+Frames are decoded up front, then run through the accident model alone and
+through each cascade mode. Recall is measured against the single-stage
+detections (boxes matched at IoU >= 0.5), and against ground truth as well
+when a labels CSV in the sampling_report layout is given.
+
+Usage: python benchmark_cascade.py <video_path> [labels_csv] [--frames N]
+"""
+import argparse
+import time
+import pandas as pd
+from model_registry import get_registry
+from batch_inference import BatchInference
+from benchmark_batch import load_frames
+from cascade import CascadeInference, VEHICLE_CONF, GATE_SIZE
+from detections import CONF_THRESHOLD
+from resize import FrameResizer
+from sampling_report import load_labels, score
+
+
+def run_engine(engine, frames: list) -> tuple:
+    predicted = {}
+    start = time.perf_counter()
+    for i in range(0, len(frames), engine.batch_size):
+        batch = frames[i:i + engine.batch_size]
+        for (n, _), boxes in zip(batch, engine.predict_boxes([frame for _, frame in batch])):
+            predicted[n] = boxes
+    return predicted, len(frames) / (time.perf_counter() - start)
+
+
+def benchmark(video_path: str, labels_csv: str = None, max_frames: int = 300):
+    frames = load_frames(video_path, max_frames)
+    height, width = frames[0][1].shape[:2]
+    registry = get_registry()
+    accident, vehicle = registry.get("accident"), registry.get("vehicle")
+    labels = load_labels(labels_csv) if labels_csv else None
+
+    single = BatchInference(accident, conf=CONF_THRESHOLD)
+    engines = {"single-stage": single}
+    for mode in ("frame", "crop"):
+        gate = BatchInference(vehicle, batch_size=single.batch_size, conf=VEHICLE_CONF,
+                              resizer=FrameResizer(width, height, GATE_SIZE))
+        engines[f"cascade-{mode}"] = CascadeInference(gate, single, mode=mode)
+
+    rows = []
+    reference = None
+    baseline_fps = None
+    for name, engine in engines.items():
+        predicted, fps = run_engine(engine, frames)
+        if reference is None:
+            reference, baseline_fps = predicted, fps
+        row = {
+            "engine": name,
+            "fps": round(fps, 2),
+            "speedup": round(fps / baseline_fps, 2),
+            "recall_vs_single": score(predicted, {n: b[:, :4] for n, b in reference.items()})["recall"],
+        }
+        if hasattr(engine, "stats"):
+            row["pass_ratio"] = engine.stats()["pass_ratio"]
+        if labels is not None:
+            row.update({f"label_{k}": v for k, v in score(predicted, labels).items()})
+        rows.append(row)
+
+    table = pd.DataFrame(rows)
+    print(table.to_string(index=False))
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cascade speedup and recall")
+    parser.add_argument("video_path")
+    parser.add_argument("labels_csv", nargs="?")
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+    benchmark(args.video_path, args.labels_csv, args.frames)
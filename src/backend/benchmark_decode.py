@@ -0,0 +1,78 @@
+# src/backend/benchmark_decode.py
+"""Decode throughput of the OpenCV and PyAV decoders
+
+Decodes each clip with every available backend in several modes: every
+frame, every `--step`-th frame (the rest skipped), keyframes only, every
+frame downscaled to `--size`, and every frame into a reused buffer ring.
+With no clips given, the synthetic 1080p H.264 clip of
+benchmark_pipeline is used; pass sample clips such as test_data/113.mov
+to cover .mov inputs.
+
+Usage: python benchmark_decode.py [clip ...] [--step 3] [--size 640] [--threads 0]
+"""
+import argparse
+import time
+import pandas as pd
+from benchmark_pipeline import synthetic_clip
+from decoding import open_decoder, DECODERS, av
+
+
+def modes(step: int, size: int) -> dict:
+    # name: (open_decoder kwargs, frames() kwargs)
+    return {
+        "all": ({}, {}),
+        f"step{step}": ({}, {"step": step}),
+        "keyframes": ({}, {"keyframes_only": True}),
+        f"downscale{size}": ({"size": size}, {}),
+        "buffers": ({}, {"buffers": 4}),
+    }
+
+
+def time_decode(clip: str, backend: str, threads: int, open_kwargs: dict, frame_kwargs: dict):
+    start = time.perf_counter()
+    with open_decoder(clip, backend=backend, threads=threads, **open_kwargs) as decoder:
+        total = decoder.frame_count
+        decoded = sum(1 for _ in decoder.frames(**frame_kwargs))
+    seconds = time.perf_counter() - start
+    return decoded, total, seconds
+
+
+def benchmark(clips: list, step: int = 3, size: int = 640, threads: int = 0):
+    backends = [name for name in DECODERS if name != "pyav" or av is not None]
+    if av is None:
+        print("PyAV is not installed; only the opencv decoder is measured")
+    rows = []
+    for clip in clips:
+        for mode, (open_kwargs, frame_kwargs) in modes(step, size).items():
+            for backend in backends:
+                decoded, total, seconds = time_decode(clip, backend, threads,
+                                                      open_kwargs, frame_kwargs)
+                rows.append({
+                    "clip": str(clip).rsplit("/", 1)[-1],
+                    "mode": mode,
+                    "decoder": backend,
+                    "frames_out": decoded,
+                    "seconds": round(seconds, 3),
+                    # Source frames covered per second, comparable across modes
+                    "source_fps": round(total / seconds, 1) if total else None,
+                    "output_fps": round(decoded / seconds, 1),
+                })
+
+    table = pd.DataFrame(rows)
+    baseline = table[table["decoder"] == "opencv"].set_index(["clip", "mode"])["seconds"]
+    table["speedup_vs_opencv"] = [
+        round(baseline[(row.clip, row.mode)] / row.seconds, 2) for row in table.itertuples()
+    ]
+    print(table.to_string(index=False))
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decoder throughput")
+    parser.add_argument("clips", nargs="*")
+    parser.add_argument("--step", type=int, default=3)
+    parser.add_argument("--size", type=int, default=640, help="Long side for the downscale mode")
+    parser.add_argument("--threads", type=int, default=0, help="Decode threads (0 = auto)")
+    args = parser.parse_args()
+    benchmark(args.clips or [str(synthetic_clip("synthetic_1080p"))], args.step, args.size,
+              args.threads)
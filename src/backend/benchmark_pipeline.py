@@ -0,0 +1,126 @@
+# src/backend/benchmark_pipeline.py
+"""Reproducible end-to-end throughput benchmark of process_video
+
+Runs the ml_processor CLI once per clip in a fresh process (so peak RSS is
+per run) over synthetic clips generated with ffmpeg's testsrc2 plus any
+sample clips given, and writes one JSON document with the per-frame stage
+times, frames/sec and peak memory of every run. Pass a previous results
+file with --compare to flag throughput regressions between commits.
+
+Usage: python benchmark_pipeline.py [clip ...] [--output results.json] [--compare old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+CLIP_DIR = BASE_DIR / "benchmarks" / "clips"
+# name: (width, height, seconds) of the generated synthetic clips
+SYNTHETIC_CLIPS = {
+    "synthetic_720p": (1280, 720, 10),
+    "synthetic_1080p": (1920, 1080, 10),
+}
+SYNTHETIC_FPS = 30
+REGRESSION_THRESHOLD = 0.05  # fps drop that is reported as a regression
+
+
+def synthetic_clip(name: str) -> Path:
+    """Generate (once) a deterministic test-pattern clip"""
+    width, height, seconds = SYNTHETIC_CLIPS[name]
+    path = CLIP_DIR / f"{name}.mp4"
+    if not path.exists():
+        CLIP_DIR.mkdir(parents=True, exist_ok=True)
+        subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "error",
+             "-f", "lavfi", "-i",
+             f"testsrc2=size={width}x{height}:rate={SYNTHETIC_FPS}:duration={seconds}",
+             "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", str(path)],
+            check=True
+        )
+    return path
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def profile_clip(clip: Path) -> dict:
+    """Run the ml_processor CLI on `clip` and return its JSON profile"""
+    with tempfile.TemporaryDirectory() as out_dir:
+        profile_path = os.path.join(out_dir, "profile.json")
+        subprocess.run(
+            [sys.executable, str(BASE_DIR / "ml_processor.py"), str(clip),
+             os.path.join(out_dir, "processed.mp4"), "--no-preview", "--profile", profile_path],
+            cwd=BASE_DIR, check=True, stdout=subprocess.DEVNULL
+        )
+        with open(profile_path) as f:
+            return json.load(f)
+
+
+def compare(current: dict, previous: dict) -> list:
+    """Clips whose frames/sec dropped by more than REGRESSION_THRESHOLD"""
+    regressions = []
+    for clip, run in current["runs"].items():
+        before = previous.get("runs", {}).get(clip)
+        if not before or not before.get("fps"):
+            continue
+        change = run["fps"] / before["fps"] - 1
+        print(f"{clip}: {before['fps']} -> {run['fps']} frames/sec ({change:+.1%})")
+        if change < -REGRESSION_THRESHOLD:
+            regressions.append(clip)
+    return regressions
+
+
+def benchmark(clips: list, synthetic: bool = True) -> dict:
+    paths = [synthetic_clip(name) for name in SYNTHETIC_CLIPS] if synthetic else []
+    paths += [Path(c) for c in clips]
+    runs = {}
+    for clip in paths:
+        profile = profile_clip(clip)
+        runs[clip.stem] = profile
+        print(f"{clip.stem}: {profile['fps']} frames/sec, "
+              f"peak RSS {profile['peak_rss_mb']} MB, ms/frame {profile['ms_per_frame']}")
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "env": {k: v for k, v in os.environ.items() if k.startswith("SERGEK_")},
+        "runs": runs,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end pipeline throughput benchmark")
+    parser.add_argument("clips", nargs="*", help="Sample clips to run besides the synthetic ones")
+    parser.add_argument("--no-synthetic", action="store_true")
+    parser.add_argument("--output", help="Write the results JSON here instead of stdout")
+    parser.add_argument("--compare", help="Previous results JSON to check for regressions")
+    args = parser.parse_args()
+
+    results = benchmark(args.clips, synthetic=not args.no_synthetic)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f))
+        if regressions:
+            print(f"Throughput regressions: {', '.join(regressions)}")
+            sys.exit(1)
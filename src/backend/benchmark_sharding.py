@@ -0,0 +1,40 @@
+# src/backend/benchmark_sharding.py
+"""Scaling of sharded processing of one video across worker processes
+
+Usage: python benchmark_sharding.py <video_path> [workers ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import cv2
+from sharding import process_video_sharded
+
+WORKER_COUNTS = [1, 2, 4, 8]
+
+
+def benchmark(video_path: str, worker_counts: list = WORKER_COUNTS):
+    video = cv2.VideoCapture(video_path)
+    total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    video.release()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        for workers in worker_counts:
+            output_path = os.path.join(out_dir, f"sharded_{workers}.mp4")
+            start = time.perf_counter()
+            process_video_sharded(video_path, output_path, workers=workers)
+            elapsed = time.perf_counter() - start
+            results[workers] = elapsed
+            speedup = results[worker_counts[0]] / elapsed
+            print(f"workers={workers}  {elapsed:8.2f}s  {total_frames / elapsed:7.2f} frames/sec  "
+                  f"speedup x{speedup:.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python benchmark_sharding.py <video_path> [workers ...]")
+        sys.exit(1)
+    counts = [int(w) for w in sys.argv[2:]] or WORKER_COUNTS
+    benchmark(sys.argv[1], counts)
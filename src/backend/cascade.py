@@ -0,0 +1,156 @@
+# src/backend/cascade.py
+import os
+import numpy as np
+from sampling import box_iou
+
+CASCADE_MODE = os.environ.get("SERGEK_CASCADE", "off")  # off | frame | crop
+VEHICLE_CONF = float(os.environ.get("SERGEK_VEHICLE_CONF", "0.25"))
+# Long side of the frames the vehicle gate sees
+GATE_SIZE = int(os.environ.get("SERGEK_CASCADE_GATE_SIZE", "640"))
+# Vehicles count as close when their boxes, each grown by this fraction of
+# its own size, overlap
+PROXIMITY = float(os.environ.get("SERGEK_CASCADE_PROXIMITY", "0.25"))
+CROP_PADDING = 0.15
+# Gate classes that count as vehicles, by name. A gate model none of whose
+# class names match (e.g. a single custom class) has every class counted.
+VEHICLE_CLASSES = [name.strip().lower() for name in os.environ.get(
+    "SERGEK_CASCADE_VEHICLE_CLASSES", "car,truck,bus,motorcycle,motorbike,van,vehicle"
+).split(",") if name.strip()]
+
+
+def vehicle_class_ids(names: dict, wanted: list = VEHICLE_CLASSES):
+    """Ids in a model's `names` map that are vehicles, or None to count every class"""
+    ids = [int(i) for i, name in (names or {}).items() if str(name).lower() in wanted]
+    return ids or None
+
+
+def expand_boxes(boxes: np.ndarray, fraction: float) -> np.ndarray:
+    """xyxy boxes grown by `fraction` of their width/height on every side"""
+    grown = boxes[:, :4].copy()
+    pad_x = (grown[:, 2] - grown[:, 0]) * fraction
+    pad_y = (grown[:, 3] - grown[:, 1]) * fraction
+    grown[:, 0] -= pad_x
+    grown[:, 1] -= pad_y
+    grown[:, 2] += pad_x
+    grown[:, 3] += pad_y
+    return grown
+
+
+def interaction_regions(vehicles: np.ndarray, proximity: float = PROXIMITY) -> np.ndarray:
+    """(M, 4) regions covering groups of two or more close or overlapping vehicles
+
+    Vehicles are linked when their grown boxes overlap; each connected
+    group of linked vehicles becomes one region, the union of its boxes.
+    """
+    if len(vehicles) < 2:
+        return np.zeros((0, 4), dtype=np.float32)
+    grown = expand_boxes(vehicles, proximity)
+    linked = box_iou(grown, grown) > 0
+    np.fill_diagonal(linked, False)
+
+    group = np.full(len(vehicles), -1)
+    regions = []
+    for seed in range(len(vehicles)):
+        if group[seed] >= 0 or not linked[seed].any():
+            continue
+        members = [seed]
+        group[seed] = len(regions)
+        for i in members:
+            for j in np.flatnonzero(linked[i] & (group < 0)):
+                group[j] = len(regions)
+                members.append(j)
+        boxes = vehicles[members, :4]
+        regions.append([boxes[:, 0].min(), boxes[:, 1].min(), boxes[:, 2].max(), boxes[:, 3].max()])
+    return np.array(regions, dtype=np.float32).reshape(-1, 4)
+
+
+class CascadeInference:
+    """Vehicle gate in front of the accident model
+
+    `gate` and `detector` are BatchInference engines (the gate usually on
+    the light vehicle model at a reduced resolution). The detector only
+    sees frames, or in "crop" mode only padded crops of the regions, where
+    at least two vehicles are close or overlapping; every other frame gets
+    no detections. Crops from a whole batch of frames go through the
+    detector together, and their boxes are shifted back to frame
+    coordinates. Quacks like BatchInference, so SampledInference can drive
+    it. Crops vary in size, so a crop-mode detector must not have a
+    resizer. Only gate boxes of vehicle classes (`vehicle_classes` ids,
+    by default looked up from the gate model's class names) are counted.
+    """
+
+    def __init__(self, gate, detector, mode: str = "frame", proximity: float = PROXIMITY,
+                 padding: float = CROP_PADDING, vehicle_classes: list = None):
+        if mode not in ("frame", "crop"):
+            raise ValueError(f"Unknown cascade mode: {mode}")
+        if mode == "crop" and detector.resizer is not None:
+            raise ValueError("Crop cascade needs a detector without a frame resizer")
+        self.gate = gate
+        self.detector = detector
+        self.mode = mode
+        self.proximity = proximity
+        self.padding = padding
+        if vehicle_classes is None:
+            vehicle_classes = vehicle_class_ids(getattr(gate.model, "names", None))
+        self.vehicle_classes = vehicle_classes
+        self.batch_size = gate.batch_size
+        self.frames_seen = 0
+        self.frames_passed = 0
+        self.crops = 0
+
+    def predict_boxes(self, frames: list) -> list:
+        if not frames:
+            return []
+        vehicles = self.gate.predict_boxes(frames)
+        if self.vehicle_classes is not None:
+            vehicles = [v[np.isin(v[:, 5].astype(int), self.vehicle_classes)] for v in vehicles]
+        regions = [interaction_regions(v, self.proximity) for v in vehicles]
+        passed = [i for i, r in enumerate(regions) if len(r)]
+        self.frames_seen += len(frames)
+        self.frames_passed += len(passed)
+
+        boxes = [np.zeros((0, 6), dtype=np.float32) for _ in frames]
+        if not passed:
+            return boxes
+        if self.mode == "frame":
+            for i, found in zip(passed, self._detect([frames[i] for i in passed])):
+                boxes[i] = found
+            return boxes
+
+        crops, origins = [], []
+        for i in passed:
+            height, width = frames[i].shape[:2]
+            for x1, y1, x2, y2 in expand_boxes(regions[i], self.padding):
+                x1, y1 = max(0, int(x1)), max(0, int(y1))
+                x2, y2 = min(width, int(np.ceil(x2))), min(height, int(np.ceil(y2)))
+                if x2 - x1 < 2 or y2 - y1 < 2:
+                    continue
+                crops.append(np.ascontiguousarray(frames[i][y1:y2, x1:x2]))
+                origins.append((i, x1, y1))
+        self.crops += len(crops)
+
+        found_per_frame = {}
+        for (i, x1, y1), found in zip(origins, self._detect(crops)):
+            found = found.copy()
+            found[:, [0, 2]] += x1
+            found[:, [1, 3]] += y1
+            found_per_frame.setdefault(i, []).append(found)
+        for i, found in found_per_frame.items():
+            boxes[i] = np.concatenate(found)
+        return boxes
+
+    def _detect(self, images: list) -> list:
+        size = self.detector.batch_size
+        results = []
+        for start in range(0, len(images), size):
+            results.extend(self.detector.predict_boxes(images[start:start + size]))
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "frames_seen": self.frames_seen,
+            "frames_passed": self.frames_passed,
+            "pass_ratio": round(self.frames_passed / self.frames_seen, 4) if self.frames_seen else 0.0,
+            "crops": self.crops,
+        }
@@ -0,0 +1,224 @@
+# src/backend/decoding.py
+import os
+import cv2
+import numpy as np
+
+try:
+    import av
+except ImportError:  # PyAV is optional; OpenCV decodes without it
+    av = None
+
+# PyAV does not apply rotation metadata the way OpenCV does, so it is opt-in
+DECODER = os.environ.get("SERGEK_DECODER", "opencv")  # opencv | pyav | auto
+# Decoder threads; 0 lets the library pick (usually one per core)
+DECODE_THREADS = int(os.environ.get("SERGEK_DECODE_THREADS", "0"))
+
+
+def scaled_size(width: int, height: int, size: int) -> tuple:
+    """(width, height) with the long side at most `size`, rounded to even"""
+    if not size or max(width, height) <= size:
+        return width, height
+    scale = size / max(width, height)
+    return max(2, round(width * scale / 2) * 2), max(2, round(height * scale / 2) * 2)
+
+
+class VideoDecoder:
+    """Common interface of the decode backends
+
+    frames() yields (frame_number, frame) pairs with 1-based absolute frame
+    numbers. Only every `step`-th frame from `start_frame` is converted to
+    BGR; the frames in between are skipped as cheaply as the backend allows.
+    `keyframes_only` yields the keyframes alone. With `size` set, frames
+    are downscaled to that long side while decoding; `width`/`height` are
+    always the source size and `output_size` the size of yielded frames.
+    With `buffers` > 0 frames are written into a ring of that many
+    preallocated arrays instead of fresh ones, so a consumer must be done
+    with a frame before `buffers` more have been yielded.
+    """
+
+    name = None
+
+    def __init__(self, path, size: int = 0, threads: int = DECODE_THREADS):
+        self.path = str(path)
+        self.size = size
+        self.threads = threads
+        self.width = self.height = self.frame_count = 0
+        self.fps = 0.0
+
+    @property
+    def output_size(self) -> tuple:
+        return scaled_size(self.width, self.height, self.size)
+
+    def _ring(self, buffers: int):
+        width, height = self.output_size
+        ring = np.empty((buffers, height, width, 3), dtype=np.uint8)
+        index = 0
+        while True:
+            yield ring[index]
+            index = (index + 1) % buffers
+
+    def frames(self, start_frame: int = 1, end_frame: int = None, step: int = 1,
+               keyframes_only: bool = False, buffers: int = 0):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class OpenCVDecoder(VideoDecoder):
+    """cv2.VideoCapture; skipped frames are grabbed but never retrieved
+
+    Keyframes are located with ffprobe up front (packet headers only), and
+    downscaling happens after the full-resolution decode.
+    """
+
+    name = "opencv"
+
+    def __init__(self, path, size: int = 0, threads: int = DECODE_THREADS):
+        super().__init__(path, size, threads)
+        if threads and hasattr(cv2, "CAP_PROP_N_THREADS"):
+            self.video = cv2.VideoCapture(self.path, cv2.CAP_ANY, [cv2.CAP_PROP_N_THREADS, threads])
+        else:
+            self.video = cv2.VideoCapture(self.path)
+        if not self.video.isOpened():
+            raise Exception("Error opening video file")
+        self.width = int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.video.get(cv2.CAP_PROP_FPS)
+        self.frame_count = int(self.video.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def frames(self, start_frame: int = 1, end_frame: int = None, step: int = 1,
+               keyframes_only: bool = False, buffers: int = 0):
+        wanted = None
+        if keyframes_only:
+            from sharding import keyframe_numbers
+            wanted = set(keyframe_numbers(self.path))
+        resized = self.output_size != (self.width, self.height)
+        ring = self._ring(buffers) if buffers else None
+        # Full-size decode target when the ring holds downscaled frames
+        decoded = None
+        if ring is not None and resized:
+            decoded = np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+        if start_frame > 1:
+            self.video.set(cv2.CAP_PROP_POS_FRAMES, start_frame - 1)
+        frame_number = start_frame - 1
+        while end_frame is None or frame_number < end_frame:
+            frame_number += 1
+            if wanted is not None:
+                keep = frame_number in wanted
+            else:
+                keep = (frame_number - start_frame) % step == 0
+            if not keep:
+                if not self.video.grab():
+                    break
+                continue
+
+            target = decoded if resized else (next(ring) if ring is not None else None)
+            ret, frame = self.video.read(target)
+            if not ret:
+                break
+            if resized:
+                dst = next(ring) if ring is not None else None
+                frame = cv2.resize(frame, self.output_size, dst=dst, interpolation=cv2.INTER_AREA)
+            yield frame_number, frame
+
+    def release(self):
+        self.video.release()
+
+
+class PyAVDecoder(VideoDecoder):
+    """FFmpeg through PyAV, with threaded decoding and sws-side scaling
+
+    Slice and frame threading are both enabled. Skipped frames are decoded
+    (inter frames need their references) but never converted to BGR, which
+    is where most of the per-frame cost goes; `keyframes_only` tells the
+    codec to drop non-keyframes before decoding them at all. Downscaling
+    is fused into the YUV to BGR conversion.
+    """
+
+    name = "pyav"
+
+    def __init__(self, path, size: int = 0, threads: int = DECODE_THREADS):
+        if av is None:
+            raise RuntimeError("The pyav decoder needs PyAV (pip install av)")
+        super().__init__(path, size, threads)
+        self.container = av.open(self.path)
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"
+        self.stream.codec_context.thread_count = threads
+        self.width = self.stream.codec_context.width
+        self.height = self.stream.codec_context.height
+        self.fps = float(self.stream.average_rate or self.stream.guessed_rate or 0)
+        self.frame_count = self.stream.frames
+        if not self.frame_count and self.stream.duration and self.fps:
+            self.frame_count = int(self.stream.duration * self.stream.time_base * self.fps)
+
+    def _frame_number(self, frame) -> int:
+        start = self.stream.start_time or 0
+        return int(round(float((frame.pts - start) * self.stream.time_base) * self.fps)) + 1
+
+    def _seek(self, frame_number: int):
+        """Seek to the keyframe at or before `frame_number`"""
+        start = self.stream.start_time or 0
+        pts = start + int((frame_number - 1) / self.fps / self.stream.time_base)
+        self.container.seek(pts, stream=self.stream, backward=True, any_frame=False)
+
+    def _to_bgr(self, frame, ring):
+        width, height = self.output_size
+        if (width, height) != (frame.width, frame.height):
+            frame = frame.reformat(width=width, height=height, format="bgr24",
+                                   interpolation="AREA")
+        else:
+            frame = frame.reformat(format="bgr24")
+        if ring is None:
+            return frame.to_ndarray()
+        plane = frame.planes[0]
+        # Rows may be padded past width * 3 bytes
+        rows = np.frombuffer(plane, dtype=np.uint8).reshape(height, plane.line_size)
+        out = next(ring)
+        np.copyto(out, rows[:, :width * 3].reshape(height, width, 3))
+        return out
+
+    def frames(self, start_frame: int = 1, end_frame: int = None, step: int = 1,
+               keyframes_only: bool = False, buffers: int = 0):
+        ring = self._ring(buffers) if buffers else None
+        self.stream.codec_context.skip_frame = "NONKEY" if keyframes_only else "DEFAULT"
+        # Frame numbers come from timestamps when frames can be missing from
+        # the decoder output, and from a plain count otherwise
+        by_pts = keyframes_only or start_frame > 1
+        if start_frame > 1:
+            self._seek(start_frame)
+
+        frame_number = 0
+        for frame in self.container.decode(self.stream):
+            frame_number = self._frame_number(frame) if by_pts and frame.pts is not None \
+                else frame_number + 1
+            if frame_number < start_frame:
+                continue
+            if end_frame is not None and frame_number > end_frame:
+                break
+            if keyframes_only or (frame_number - start_frame) % step == 0:
+                yield frame_number, self._to_bgr(frame, ring)
+
+    def release(self):
+        self.container.close()
+
+
+DECODERS = {"opencv": OpenCVDecoder, "pyav": PyAVDecoder}
+
+
+def open_decoder(path, backend: str = DECODER, size: int = 0,
+                 threads: int = DECODE_THREADS) -> VideoDecoder:
+    """Decoder for `path`; "auto" uses PyAV when it is installed, else OpenCV"""
+    if backend == "auto":
+        backend = "pyav" if av is not None else "opencv"
+    if backend not in DECODERS:
+        raise ValueError(f"Unknown decoder: {backend}")
+    return DECODERS[backend](path, size=size, threads=threads)
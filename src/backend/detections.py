@@ -0,0 +1,115 @@
+# src/backend/detections.py
+import cv2
+import cvzone
+import os
+import numpy as np
+
+CONF_THRESHOLD = float(os.environ.get("SERGEK_CONF_THRESHOLD", "0.3"))
+
+DETECTION_DTYPE = np.dtype([
+    ("frame", np.int32),
+    ("x1", np.float32),
+    ("y1", np.float32),
+    ("x2", np.float32),
+    ("y2", np.float32),
+    ("conf", np.float32),
+    ("cls", np.int16),
+])
+
+
+def boxes_from_result(result) -> np.ndarray:
+    """(N, 6) float32 array of x1, y1, x2, y2, conf, class from a YOLO result"""
+    data = result.boxes.data
+    if hasattr(data, "cpu"):
+        data = data.cpu().numpy()
+    return np.asarray(data, dtype=np.float32).reshape(-1, 6)
+
+
+class DetectionBuffer:
+    """Preallocated, growable structured array of per-frame detections
+
+    Appending a frame's boxes is a single slice assignment; the backing
+    array doubles when full, so there is no per-box Python object.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._data = np.empty(max(1, capacity), dtype=DETECTION_DTYPE)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def data(self) -> np.ndarray:
+        """View of the filled part of the buffer"""
+        return self._data[:self._size]
+
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        if needed <= len(self._data):
+            return
+        capacity = len(self._data)
+        while capacity < needed:
+            capacity *= 2
+        grown = np.empty(capacity, dtype=DETECTION_DTYPE)
+        grown[:self._size] = self._data[:self._size]
+        self._data = grown
+
+    def append(self, frame: int, boxes: np.ndarray):
+        """Add the (N, 6) boxes of one frame"""
+        count = len(boxes)
+        if count == 0:
+            return
+        self._reserve(count)
+        rows = self._data[self._size:self._size + count]
+        rows["frame"] = frame
+        rows["x1"] = boxes[:, 0]
+        rows["y1"] = boxes[:, 1]
+        rows["x2"] = boxes[:, 2]
+        rows["y2"] = boxes[:, 3]
+        rows["conf"] = boxes[:, 4]
+        rows["cls"] = boxes[:, 5]
+        self._size += count
+
+    def extend(self, records: np.ndarray):
+        """Append records that already have DETECTION_DTYPE"""
+        self._reserve(len(records))
+        self._data[self._size:self._size + len(records)] = records
+        self._size += len(records)
+
+    def int_boxes(self) -> np.ndarray:
+        return int_boxes(self.data)
+
+    def bbox_strings(self) -> list:
+        return bbox_strings(self.data)
+
+
+def int_boxes(records: np.ndarray) -> np.ndarray:
+    """(N, 4) int32 pixel boxes, truncated like the drawn rectangles"""
+    return np.stack(
+        [records["x1"], records["y1"], records["x2"], records["y2"]], axis=1
+    ).astype(np.int32)
+
+
+def bbox_strings(records: np.ndarray) -> list:
+    """Boxes in the "[[x1, y1, x2, y2]]" form of the predictions CSV"""
+    return [f"[[{x1}, {y1}, {x2}, {y2}]]" for x1, y1, x2, y2 in int_boxes(records).tolist()]
+
+
+def draw_detections(frame, boxes: np.ndarray, labels, color=(0, 255, 0), thickness: int = 2,
+                    label_style: str = "rect"):
+    """Draw the final boxes of one frame in place
+
+    `labels` is one string per box. "rect" labels use cvzone.putTextRect at
+    the box corner, "text" labels use plain cv2.putText above the box.
+    """
+    corners = boxes[:, :4].astype(np.int32)
+    for (x1, y1, x2, y2), label in zip(corners.tolist(), labels):
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, thickness)
+        if not label:
+            continue
+        if label_style == "rect":
+            cvzone.putTextRect(frame, label, (x1, y1), 1, 1)
+        else:
+            cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    return frame
@@ -0,0 +1,121 @@
+# src/backend/encoder.py
+import os
+import subprocess
+import threading
+from collections import deque
+from fractions import Fraction
+import numpy as np
+
+X264_PRESET = os.environ.get("SERGEK_X264_PRESET", "veryfast")
+X264_CRF = int(os.environ.get("SERGEK_X264_CRF", "23"))
+DEFAULT_FPS = 30
+
+
+def frame_rate(fps: float) -> str:
+    """ffmpeg rate for a decoder's float fps, e.g. 29.97002997 -> "30000/1001"
+
+    NTSC rates have a denominator of 1001, so snapping to that keeps the
+    video exactly as long as the source audio.
+    """
+    if not fps or fps <= 0:
+        return str(DEFAULT_FPS)
+    rate = Fraction(fps).limit_denominator(1001)
+    return f"{rate.numerator}/{rate.denominator}"
+
+
+class FfmpegEncoder:
+    """Single-pass H.264 encoder fed with raw BGR frames over stdin
+
+    Frames go straight from the annotator into one ffmpeg/libx264 process,
+    so the output is browser-playable (yuv420p, faststart) without writing
+    and re-encoding an intermediate file. Audio, if any, is taken
+    from `audio_source` as AAC. The file is written next to `output_path` and
+    moved into place on close, so a half-written video is never served.
+    `fps` should be the source's exact (float) rate, not a rounded one,
+    or the video drifts out of sync with the audio.
+    """
+
+    def __init__(self, output_path: str, width: int, height: int, fps: float,
+                 preset: str = X264_PRESET, crf: int = X264_CRF, audio_source: str = None):
+        self.output_path = str(output_path)
+        self.width = width
+        self.height = height
+        self._partial_path = self.output_path + ".part"
+        self._stderr_tail = deque(maxlen=20)
+
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}", "-r", frame_rate(fps),
+            "-i", "pipe:0",
+        ]
+        if audio_source:
+            command += ["-i", str(audio_source), "-map", "0:v:0", "-map", "1:a:0?", "-c:a", "aac"]
+        command += [
+            "-c:v", "libx264", "-preset", preset, "-crf", str(crf),
+            "-pix_fmt", "yuv420p",
+            # libx264 needs even dimensions for 4:2:0
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-movflags", "+faststart",
+            "-f", "mp4", self._partial_path,
+        ]
+        self._process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+        # Drain stderr so a chatty ffmpeg can never block on a full pipe
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_thread.start()
+
+    def _drain_stderr(self):
+        for line in self._process.stderr:
+            self._stderr_tail.append(line.decode(errors="replace").rstrip())
+
+    def isOpened(self) -> bool:
+        return self._process.poll() is None
+
+    def write(self, frame):
+        if frame.shape[1] != self.width or frame.shape[0] != self.height:
+            raise ValueError(f"Frame size {frame.shape[1]}x{frame.shape[0]} does not match "
+                             f"encoder size {self.width}x{self.height}")
+        try:
+            self._process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            raise Exception(f"ffmpeg exited while encoding: {self._error_message()}")
+
+    def _error_message(self) -> str:
+        return "\n".join(self._stderr_tail) or "no output"
+
+    def release(self):
+        """Finish encoding and move the file into place"""
+        if self._process.stdin and not self._process.stdin.closed:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+        returncode = self._process.wait()
+        self._stderr_thread.join()
+        if returncode != 0:
+            if os.path.exists(self._partial_path):
+                os.remove(self._partial_path)
+            raise Exception(f"ffmpeg failed with code {returncode}: {self._error_message()}")
+        os.replace(self._partial_path, self.output_path)
+
+    def abort(self):
+        """Stop encoding and discard the partial output"""
+        self._process.kill()
+        self._process.wait()
+        self._stderr_thread.join()
+        if os.path.exists(self._partial_path):
+            os.remove(self._partial_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.release()
+        else:
+            self.abort()
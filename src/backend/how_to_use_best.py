@@ -1,16 +1,21 @@
 import cv2
-import numpy as np
 import pandas as pd
-from ultralytics import YOLO
-import cvzone
 import torch
 import datetime
-def create_video_writer(video_cap, output_filename):
+import os
+import sys
+from detections import DetectionBuffer, boxes_from_result, draw_detections
+from inference_backends import load_yolo
+from resize import FrameResizer
+from decoding import open_decoder
+
+
+def create_video_writer(decoder, output_filename):
 
     # grab the width, height, and fps of the frames in the video stream.
-    frame_width = int(640)
-    frame_height = int(480)
-    fps = int(video_cap.get(cv2.CAP_PROP_FPS))
+    frame_width = decoder.width
+    frame_height = decoder.height
+    fps = int(decoder.fps)
 
     # initialize the FourCC and a video writer object
     fourcc = cv2.VideoWriter_fourcc(*'MP4V')
@@ -21,58 +26,39 @@ def create_video_writer(video_cap, output_filename):
 
 
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model = YOLO("best.pt").to(device)
-frame_width = 640
-frame_height = 480
-
-video = cv2.VideoCapture("./videos/1.mp4")
+model = load_yolo("best.pt", device)
+inference_size = 640
 
-if (video.isOpened()== False):
-    print("Error opening video file")
+# One video at a time; batch_process.py handles whole directories
+video_path = sys.argv[1] if len(sys.argv) > 1 else "./videos/1.mp4"
+video = open_decoder(video_path)
 
 start = datetime.datetime.now()
 frame_skip = 3
-frame_count = 0
 writer = create_video_writer(video, "output.mp4")
-preds = []
-
-while True:    
-    ret, frame = video.read()
-    if not ret:
-        break
-    
-    frame_count += 1
-    if frame_count % frame_skip != 0:
-        continue
-
-    frame = cv2.resize(frame, (frame_width, frame_height))
-    
-    results = model.predict(frame, conf=0.3, agnostic_nms=False)
-    anno = results[0]
-    class_list = anno.names
-    bboxes = pd.DataFrame(anno.boxes.data).astype("float")
-   
-    for index, row in bboxes.iterrows():
-        x1 = int(row[0])
-        y1 = int(row[1])
-        x2 = int(row[2])
-        y2 = int(row[3])
-        d = int(row[5])
-        c = class_list[d]
+# Detect on a downscaled copy, draw on the full-resolution frame
+resizer = FrameResizer(video.width, video.height, inference_size)
+preds = DetectionBuffer()
 
-        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 1)
-        cvzone.putTextRect(frame, f'accident', (x1, y1), 1, 1)
+# Skipped frames are never converted; one buffer is reused for every frame
+for frame_count, frame in video.frames(start_frame=frame_skip, step=frame_skip, buffers=1):
+    results = model.predict(resizer.prepare(frame), conf=0.3, agnostic_nms=False,
+                            imgsz=resizer.imgsz)
+    boxes = resizer.to_source(boxes_from_result(results[0]))
 
-        cropped_img = frame[y1:y2, x1:x2]
-        # cv2.imshow("cropped", cropped_img)
-        preds.append(["1.mp4", frame_count, [[x1, y1, x2, y2]]])
+    draw_detections(frame, boxes, ['accident'] * len(boxes), thickness=1)
+    preds.append(frame_count, boxes)
             
     writer.write(frame)
 
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
 
-df = pd.DataFrame(preds, columns=["Filename", "Frame", "Bbox"])
+df = pd.DataFrame({
+    "Filename": os.path.basename(video_path),
+    "Frame": preds.data["frame"],
+    "Bbox": preds.bbox_strings(),
+})
 df.to_csv("predictions.csv", index=False)
 end = datetime.datetime.now()
 print(f"Time to process: {(end - start).total_seconds() * 1000:.0f} milliseconds")
@@ -0,0 +1,125 @@
+# src/backend/inference_backends.py
+import os
+import shutil
+import tempfile
+from pathlib import Path
+import torch
+from ultralytics import YOLO
+
+INFERENCE_BACKEND = os.environ.get("SERGEK_INFERENCE_BACKEND", "pytorch")
+INFERENCE_PRECISION = os.environ.get("SERGEK_INFERENCE_PRECISION", "fp32")
+EXPORT_DIR = Path(os.environ.get("SERGEK_EXPORT_DIR", Path(__file__).resolve().parent / "exports"))
+EXPORT_IMGSZ = 640
+# TorchScript is traced at a fixed batch size; BatchInference pads to it
+EXPORT_BATCH = int(os.environ.get("SERGEK_EXPORT_BATCH", "16"))
+
+# ultralytics export format and artifact suffix of each backend
+BACKENDS = {
+    "pytorch": (None, ".pt"),
+    "torchscript": ("torchscript", ".torchscript"),
+    "onnx": ("onnx", ".onnx"),
+    "openvino": ("openvino", "_openvino_model"),
+}
+PRECISIONS = ("fp32", "fp16", "int8")
+
+
+def check_backend(backend: str, precision: str):
+    """Reject combinations ultralytics cannot export"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}")
+    if backend == "pytorch" and precision != "fp32":
+        raise ValueError("Reduced precision needs an exported backend")
+    if precision == "int8" and backend != "openvino":
+        raise ValueError(f"INT8 is only supported with openvino, not {backend}")
+    if precision == "fp16" and backend in ("onnx", "torchscript") and not torch.cuda.is_available():
+        raise ValueError(f"FP16 {backend} export needs a GPU; use openvino for FP16 on CPU")
+
+
+def fixed_batch(backend: str) -> int:
+    """Batch size an export of `backend` only accepts, or None if dynamic"""
+    return EXPORT_BATCH if backend == "torchscript" else None
+
+
+def export_path(weights_path, backend: str, precision: str) -> Path:
+    _, suffix = BACKENDS[backend]
+    batch = f"_b{fixed_batch(backend)}" if fixed_batch(backend) else ""
+    return EXPORT_DIR / f"{Path(weights_path).stem}_{precision}{batch}{suffix}"
+
+
+def _is_current(target: Path, weights_path) -> bool:
+    return target.exists() and target.stat().st_mtime >= Path(weights_path).stat().st_mtime
+
+
+def export_weights(weights_path, backend: str = INFERENCE_BACKEND,
+                   precision: str = INFERENCE_PRECISION, data: str = None) -> Path:
+    """Export a .pt checkpoint for `backend`, reusing an up-to-date export
+
+    ONNX and OpenVINO exports use a dynamic batch dimension; TorchScript
+    is traced at EXPORT_BATCH and fed padded batches. INT8 quantization
+    calibrates on `data` (an ultralytics dataset YAML; ultralytics falls
+    back to its sample dataset when not given).
+    Several worker processes may export the same artifact at once: each
+    exports a private copy of the checkpoint in its own temporary folder
+    and renames the result into place, so none can pick up a half-written
+    model.
+    """
+    check_backend(backend, precision)
+    fmt, _ = BACKENDS[backend]
+    if fmt is None:
+        return Path(weights_path)
+
+    target = export_path(weights_path, backend, precision)
+    if _is_current(target, weights_path):
+        return target
+
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    kwargs = {
+        "format": fmt,
+        "imgsz": EXPORT_IMGSZ,
+        "half": precision == "fp16",
+        "int8": precision == "int8",
+        "dynamic": fixed_batch(backend) is None,
+    }
+    if fixed_batch(backend):
+        kwargs["batch"] = fixed_batch(backend)
+    if precision == "int8" and data:
+        kwargs["data"] = data
+    print(f"Exporting {weights_path} to {backend} ({precision})")
+
+    # ultralytics writes next to the checkpoint, so export a private copy
+    work_dir = Path(tempfile.mkdtemp(prefix=f".{target.name}.", dir=EXPORT_DIR))
+    try:
+        checkpoint = work_dir / Path(weights_path).name
+        shutil.copy2(weights_path, checkpoint)
+        exported = Path(YOLO(str(checkpoint)).export(**kwargs))
+        # Another process may have finished the same export meanwhile
+        if _is_current(target, weights_path):
+            return target
+        if target.is_dir():
+            shutil.rmtree(target, ignore_errors=True)
+        try:
+            os.replace(exported, target)
+        except OSError:
+            if not _is_current(target, weights_path):
+                raise
+        return target
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def load_yolo(weights_path, device=None, backend: str = INFERENCE_BACKEND,
+              precision: str = INFERENCE_PRECISION):
+    """Load a YOLO model for the configured backend
+
+    PyTorch checkpoints are moved to `device`; exported models run through
+    ultralytics' own runtime (ONNX Runtime, OpenVINO or TorchScript).
+    """
+    path = export_weights(weights_path, backend, precision)
+    if backend == "pytorch":
+        model = YOLO(str(path))
+        return model.to(device) if device is not None else model
+    model = YOLO(str(path), task="detect")
+    model.fixed_batch = fixed_batch(backend)
+    return model
@@ -0,0 +1,412 @@
+# src/backend/job_executor.py
+import asyncio
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from detections import DetectionBuffer
+from metrics import JOB_DURATION, JOB_FPS, FRAMES_PROCESSED
+
+MAX_CONCURRENT_JOBS = int(os.environ.get("SERGEK_MAX_CONCURRENT_JOBS", "1"))
+PROGRESS_INTERVAL = 0.5  # seconds between progress events from a worker
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Set in each worker process by _init_worker
+_events = None
+
+
+def _init_worker(events):
+    """Runs once per worker process: keep the event queue and load the models"""
+    global _events
+    _events = events
+    from model_registry import get_registry
+    registry = get_registry()
+    # Every model, so the first cascade job does not load the vehicle gate
+    registry.load_all()
+    _events.put(("worker", os.getpid(), registry.stats()))
+
+
+def _warm_up():
+    """No-op task used to start worker processes ahead of the first job"""
+    return os.getpid()
+
+
+def _run_job(job_id: str, input_path: str, output_path: str, options: dict, cache_key: str = None):
+    try:
+        profile = _process(job_id, input_path, output_path, options, cache_key)
+    except Exception as e:
+        _events.put(("failed", job_id, str(e)))
+        raise
+    # Completion goes through the same queue, so it arrives after the data
+    _events.put(("finished", job_id, profile))
+    return profile
+
+
+def _process(job_id: str, input_path: str, output_path: str, options: dict, cache_key: str):
+    from ml_processor import process_video
+    from result_cache import ResultCache
+
+    last_sent = 0.0
+    last_progress = (0, 0)
+    pending = DetectionBuffer(256)
+
+    def collect_detections(frame_number, boxes):
+        pending.append(frame_number, boxes)
+
+    def send(frames_done, total_frames):
+        # Detections are shipped in batches together with progress
+        nonlocal last_sent, pending
+        last_sent = time.monotonic()
+        if len(pending):
+            _events.put(("detections", job_id, pending.data.copy()))
+            pending = DetectionBuffer(256)
+        _events.put(("progress", job_id, (frames_done, total_frames)))
+
+    def report_progress(frames_done, total_frames):
+        nonlocal last_progress
+        last_progress = (frames_done, total_frames)
+        if time.monotonic() - last_sent >= PROGRESS_INTERVAL:
+            send(frames_done, total_frames)
+
+    _events.put(("started", job_id, os.getpid()))
+    profile = process_video(input_path, output_path, progress_callback=report_progress,
+                            detections_callback=collect_detections, **options)
+    # The frame count from the container is only an estimate; the last
+    # update carries whatever is still queued and the real total
+    frames_done = last_progress[0]
+    send(frames_done, frames_done)
+    if cache_key:
+        ResultCache().store(cache_key, output_path, {"source": os.path.basename(input_path)})
+    return profile
+
+
+class Job:
+    """State of one video processing job as seen by the API"""
+
+    def __init__(self, input_path: str, output_path: str, priority: int = 0, options: dict = None,
+                 cache_key: str = None):
+        self.id = str(uuid.uuid4())
+        self.input_path = str(input_path)
+        self.output_path = str(output_path)
+        self.filename = os.path.basename(self.input_path)
+        self.priority = priority
+        self.options = options or {}
+        self.cache_key = cache_key
+        self.state = QUEUED
+        self.frames_processed = 0
+        self.total_frames = 0
+        self.error = None
+        self.worker_pid = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.profile = None  # process_video's RunProfile report once done
+        # Detections streamed in while the job runs, for late subscribers
+        self.detections = DetectionBuffer(256)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED)
+
+    @property
+    def fps(self) -> float:
+        """Processing speed so far, in frames per second"""
+        if not self.started_at or not self.frames_processed:
+            return 0.0
+        end = self.finished_at or time.time()
+        return self.frames_processed / max(end - self.started_at, 1e-6)
+
+    @property
+    def eta(self) -> float:
+        """Seconds until the job is expected to finish, if known"""
+        if self.finished:
+            return 0.0
+        if not self.fps or not self.total_frames:
+            return None
+        return max(0, self.total_frames - self.frames_processed) / self.fps
+
+    @property
+    def progress(self) -> float:
+        if self.state == DONE:
+            return 1.0
+        if not self.total_frames:
+            return 0.0
+        return min(1.0, self.frames_processed / self.total_frames)
+
+    @property
+    def processing_time(self) -> float:
+        """Seconds the job spent running in a worker, once finished"""
+        if not self.started_at or not self.finished_at:
+            return None
+        return self.finished_at - self.started_at
+
+    def to_dict(self) -> dict:
+        return {
+            "jobId": self.id,
+            "filename": self.filename,
+            "state": self.state,
+            "priority": self.priority,
+            "framesProcessed": self.frames_processed,
+            "totalFrames": self.total_frames,
+            "progress": round(self.progress, 4),
+            "fps": round(self.fps, 2),
+            "eta": round(self.eta, 1) if self.eta is not None else None,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "processingTime": round(self.processing_time, 2)
+            if self.processing_time is not None else None,
+            "profile": self.profile,
+        }
+
+
+class JobSubscription:
+    """Events of one job delivered into an asyncio queue on the API loop"""
+
+    def __init__(self, job_id: str, loop: asyncio.AbstractEventLoop):
+        self.job_id = job_id
+        self.loop = loop
+        self.queue = asyncio.Queue()
+
+    def publish(self, kind: str, payload):
+        # Called from executor threads; hand over to the subscriber's loop
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, (kind, payload))
+
+
+class JobExecutor:
+    """Runs process_video in worker processes, off the API event loop
+
+    Jobs wait in a priority queue (lower value first, FIFO within a
+    priority) and at most `max_workers` run at the same time. Workers load
+    their own model once at start-up and stream progress back over a
+    multiprocessing queue.
+    """
+
+    def __init__(self, max_workers: int = MAX_CONCURRENT_JOBS):
+        self.max_workers = max(1, max_workers)
+        self._jobs = {}
+        self._by_filename = {}
+        self._lock = threading.Lock()
+        self._pending = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._slots = threading.Semaphore(self.max_workers)
+        self._worker_stats = {}
+        self._subscribers = {}
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._ctx = mp.get_context("spawn")
+        self._events = None
+
+    def start(self):
+        if self._pool is not None:
+            return
+        self._events = self._ctx.Queue()
+        self._pool = self._new_pool()
+        threading.Thread(target=self._dispatch_loop, name="job-dispatcher", daemon=True).start()
+        threading.Thread(target=self._event_loop, name="job-events", daemon=True).start()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=self._ctx,
+            initializer=_init_worker,
+            initargs=(self._events,)
+        )
+        # Start the workers now so the first upload does not pay model load
+        for _ in range(self.max_workers):
+            pool.submit(_warm_up)
+        return pool
+
+    def _replace_pool(self, broken: ProcessPoolExecutor):
+        """Swap a pool that lost a worker process for a fresh one
+
+        Once one worker dies (OOM, a crash in native code, a failing
+        initializer) the whole ProcessPoolExecutor is unusable.
+        """
+        with self._pool_lock:
+            if self._pool is not broken:
+                return  # already replaced, or shut down
+            print("Worker pool broken; starting new workers")
+            broken.shutdown(wait=False, cancel_futures=True)
+            with self._lock:
+                self._worker_stats.clear()
+            self._pool = self._new_pool()
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is None:
+                return
+            self._pending.put((float("-inf"), -1, None))
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._events.put(None)
+            self._pool = None
+
+    def submit(self, input_path, output_path, priority: int = 0, cache_key: str = None,
+               **options) -> Job:
+        """Queue a job; with `cache_key` its result is added to the result cache"""
+        job = Job(input_path, output_path, priority, options, cache_key)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._by_filename[job.filename] = job
+        self._pending.put((priority, next(self._sequence), job.id))
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find(self, filename: str) -> Job:
+        with self._lock:
+            return self._by_filename.get(filename)
+
+    def subscribe(self, job_id: str) -> JobSubscription:
+        """Follow a job's progress, detections and completion from async code
+
+        The queue starts with the current state and the detections produced
+        so far, taken under the same lock as later events, so nothing is
+        missed or repeated.
+        """
+        subscription = JobSubscription(job_id, asyncio.get_running_loop())
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            subscription.queue.put_nowait(("progress", job.to_dict()))
+            if len(job.detections):
+                subscription.queue.put_nowait(("detections", job.detections.data.copy()))
+            if job.finished:
+                subscription.queue.put_nowait((job.state, job.to_dict()))
+            else:
+                self._subscribers.setdefault(job_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: JobSubscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.job_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.job_id]
+
+    def _publish(self, job_id: str, kind: str, payload):
+        # Caller holds self._lock
+        for subscription in self._subscribers.get(job_id, ()):
+            subscription.publish(kind, payload)
+
+    def stats(self) -> dict:
+        with self._lock:
+            states = [job.state for job in self._jobs.values()]
+            return {
+                "maxWorkers": self.max_workers,
+                "queued": states.count(QUEUED),
+                "running": states.count(RUNNING),
+                "done": states.count(DONE),
+                "failed": states.count(FAILED),
+                "workers": dict(self._worker_stats),
+            }
+
+    def _dispatch_loop(self):
+        while True:
+            self._slots.acquire()
+            _, _, job_id = self._pending.get()
+            if job_id is None:
+                return
+            job = self.get(job_id)
+            with self._lock:
+                job.state = RUNNING
+                job.started_at = time.time()
+            pool = self._pool
+            try:
+                future = pool.submit(
+                    _run_job, job.id, job.input_path, job.output_path, job.options, job.cache_key
+                )
+            except BrokenProcessPool as e:
+                self._complete(job, FAILED, error=f"Worker pool broken: {e}")
+                self._slots.release()
+                self._replace_pool(pool)
+                continue
+            future.add_done_callback(lambda f, job=job, pool=pool: self._finish(job, f, pool))
+
+    def _finish(self, job: Job, future, pool: ProcessPoolExecutor):
+        # Success and failure are reported by the worker itself over the
+        # events queue, behind its last detections; only jobs the worker
+        # could not report on (cancelled, or the process died) end here
+        if future.cancelled():
+            self._complete(job, FAILED, error="cancelled")
+        elif isinstance(future.exception(), BrokenProcessPool):
+            self._complete(job, FAILED, error=f"Worker process died: {future.exception()}")
+            self._replace_pool(pool)
+        self._slots.release()
+
+    def _complete(self, job: Job, state: str, profile: dict = None, error: str = None):
+        with self._lock:
+            if job is None or job.finished:
+                return
+            job.state = state
+            job.finished_at = time.time()
+            if state == DONE:
+                job.profile = profile
+                job.frames_processed = max(job.frames_processed, job.total_frames)
+            else:
+                job.error = error
+                print(f"Job {job.id} ({job.filename}) failed: {error}")
+            if job.processing_time is not None:
+                JOB_DURATION.observe(job.processing_time, state=job.state)
+            if job.profile:
+                JOB_FPS.observe(job.profile["fps"])
+                FRAMES_PROCESSED.inc(job.profile["frames"])
+            # The predictions file now has everything; stop holding a copy
+            job.detections = DetectionBuffer(1)
+            self._publish(job.id, job.state, job.to_dict())
+            self._subscribers.pop(job.id, None)
+
+    def _event_loop(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            kind, key, payload = event
+            if kind == "finished":
+                self._complete(self.get(key), DONE, profile=payload)
+                continue
+            if kind == "failed":
+                self._complete(self.get(key), FAILED, error=payload)
+                continue
+            with self._lock:
+                if kind == "worker":
+                    self._worker_stats[key] = payload
+                    continue
+                job = self._jobs.get(key)
+                if job is None or job.finished:
+                    continue
+                if kind == "started":
+                    job.worker_pid = payload
+                elif kind == "progress":
+                    job.frames_processed, job.total_frames = payload
+                    self._publish(job.id, kind, job.to_dict())
+                elif kind == "detections":
+                    job.detections.extend(payload)
+                    self._publish(job.id, kind, payload)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> JobExecutor:
+    """Process-wide executor, created on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = JobExecutor()
+        return _executor
@@ -0,0 +1,147 @@
+# src/backend/keyframes.py
+import heapq
+import itertools
+import json
+from pathlib import Path
+import cv2
+import numpy as np
+
+KEYFRAMES_SUFFIX = "_keyframes"
+KEYFRAMES_INDEX = "keyframes.json"
+CROP_PADDING = 0.1  # fraction of the box size added on each side of a crop
+NMS_SECONDS = 2.0  # default temporal suppression window of process_video
+
+
+def crop_box(frame, box, padding: float = CROP_PADDING) -> np.ndarray:
+    """Copy of the region of `frame` under an x1, y1, x2, y2 box, padded"""
+    x1, y1, x2, y2 = (float(v) for v in box[:4])
+    pad_x = (x2 - x1) * padding
+    pad_y = (y2 - y1) * padding
+    height, width = frame.shape[:2]
+    x1 = max(0, int(x1 - pad_x))
+    y1 = max(0, int(y1 - pad_y))
+    x2 = min(width, int(np.ceil(x2 + pad_x)))
+    y2 = min(height, int(np.ceil(y2 + pad_y)))
+    return frame[y1:y2, x1:x2].copy()
+
+
+class TopKSelector:
+    """Streaming top-K detections by confidence in bounded memory
+
+    Keeps at most `k` candidates in a min-heap, so memory does not grow
+    with the video. With `store_crops` each candidate keeps a copy of its
+    (padded) box region only, never the full frame; otherwise it keeps the
+    frame number and box, and crops can be read back with load_crops.
+    `nms_window` > 0 applies temporal non-maximum suppression: two picks
+    must be more than `nms_window` frames apart, and a stronger detection
+    replaces the pick it is too close to. Suppression is greedy and
+    streaming, so it can differ slightly from sorting everything first.
+    """
+
+    def __init__(self, k: int = 5, nms_window: int = 0, store_crops: bool = True,
+                 min_conf: float = 0.0, padding: float = CROP_PADDING):
+        self.k = k
+        self.nms_window = nms_window
+        self.store_crops = store_crops
+        self.min_conf = min_conf
+        self.padding = padding
+        self._heap = []  # (conf, sequence, entry)
+        self._sequence = itertools.count()
+
+    def offer(self, frame_number: int, frame, boxes: np.ndarray):
+        """Consider every (N, 6) box of one frame"""
+        for box in boxes:
+            self._offer(frame_number, box, frame=frame)
+
+    def _offer(self, frame_number: int, box, frame=None, crop=None):
+        conf = float(box[4])
+        if conf < self.min_conf:
+            return
+        if self.nms_window > 0:
+            close = [i for i, (_, _, entry) in enumerate(self._heap)
+                     if abs(entry["frame"] - frame_number) <= self.nms_window]
+            if any(self._heap[i][0] >= conf for i in close):
+                return
+            if close:
+                for i in sorted(close, reverse=True):
+                    self._heap[i] = self._heap[-1]
+                    self._heap.pop()
+                heapq.heapify(self._heap)
+        if len(self._heap) >= self.k and conf <= self._heap[0][0]:
+            return
+
+        # Only now is the detection worth copying
+        entry = {
+            "frame": int(frame_number),
+            "conf": round(conf, 4),
+            "cls": int(box[5]),
+            "box": [round(float(v), 1) for v in box[:4]],
+            "crop": crop,
+        }
+        if crop is None and self.store_crops and frame is not None:
+            entry["crop"] = crop_box(frame, box, self.padding)
+        item = (conf, next(self._sequence), entry)
+        if len(self._heap) >= self.k:
+            heapq.heapreplace(self._heap, item)
+        else:
+            heapq.heappush(self._heap, item)
+
+    def offer_keyframe(self, entry: dict):
+        """Consider an already selected key frame, e.g. from another segment"""
+        box = np.array(entry["box"] + [entry["conf"], entry["cls"]], dtype=np.float32)
+        self._offer(entry["frame"], box, crop=entry.get("crop"))
+
+    def results(self) -> list:
+        """Selected detections, highest confidence first"""
+        return [entry for _, _, entry in sorted(self._heap, key=lambda item: (-item[0], item[1]))]
+
+
+def load_crops(video_path: str, keyframes: list, padding: float = CROP_PADDING) -> list:
+    """Read the crops of index-only key frames back from the video"""
+    video = cv2.VideoCapture(str(video_path))
+    crops = []
+    try:
+        for entry in keyframes:
+            video.set(cv2.CAP_PROP_POS_FRAMES, entry["frame"] - 1)
+            ret, frame = video.read()
+            crops.append(crop_box(frame, entry["box"], padding) if ret else None)
+    finally:
+        video.release()
+    return crops
+
+
+def save_keyframes(keyframes: list, directory: str, fps: float = None) -> str:
+    """Write crops as JPEGs plus a keyframes.json index; returns the index path
+
+    The directory is replaced, so a re-run never mixes old and new picks.
+    """
+    directory = Path(directory)
+    if directory.exists():
+        for old in directory.iterdir():
+            old.unlink()
+    directory.mkdir(parents=True, exist_ok=True)
+    index = []
+    for rank, entry in enumerate(keyframes):
+        record = {k: v for k, v in entry.items() if k != "crop"}
+        record["rank"] = rank
+        if fps:
+            record["timestamp"] = round(entry["frame"] / fps, 3)
+        if entry.get("crop") is not None and entry["crop"].size:
+            record["image"] = f"keyframe_{rank}_{entry['frame']}.jpg"
+            cv2.imwrite(str(directory / record["image"]), entry["crop"])
+        index.append(record)
+    index_path = directory / KEYFRAMES_INDEX
+    with open(index_path, "w") as f:
+        json.dump(index, f, indent=2)
+    return str(index_path)
+
+
+def read_keyframes(directory: str) -> list:
+    """Entries of a saved key frame directory, with their crops loaded"""
+    directory = Path(directory)
+    with open(directory / KEYFRAMES_INDEX) as f:
+        index = json.load(f)
+    for record in index:
+        image = record.get("image")
+        record["crop"] = cv2.imread(str(directory / image)) if image else None
+    return index
@@ -0,0 +1,85 @@
+# src/backend/loadtest_seek.py
+"""Concurrent seek latency against the video download endpoint
+
+Each request asks for a random `bytes=start-end` window, as a player does
+when the user scrubs. Latency is measured to the end of the response body,
+so a server that ignores the end bound pays for streaming the whole tail.
+Pass two URLs (e.g. a server on the previous commit and one on this one)
+to compare them.
+
+Usage: python loadtest_seek.py <url> [<url> ...] [--concurrency N] [--requests N] [--window BYTES]
+"""
+import argparse
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import Request, urlopen
+
+
+def file_size(url: str) -> int:
+    with urlopen(Request(url, headers={"Range": "bytes=0-0"})) as response:
+        content_range = response.headers.get("Content-Range")
+        if content_range:
+            return int(content_range.rsplit("/", 1)[1])
+        return int(response.headers["Content-Length"])
+
+
+def seek(url: str, start: int, end: int):
+    began = time.perf_counter()
+    with urlopen(Request(url, headers={"Range": f"bytes={start}-{end}"})) as response:
+        first_byte = None
+        received = 0
+        while True:
+            chunk = response.read(64 * 1024)
+            if first_byte is None:
+                first_byte = time.perf_counter() - began
+            if not chunk:
+                break
+            received += len(chunk)
+    return first_byte, time.perf_counter() - began, received
+
+
+def percentile(values: list, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run(url: str, concurrency: int, requests: int, window: int, seed: int = 0) -> dict:
+    size = file_size(url)
+    rng = random.Random(seed)
+    ranges = []
+    for _ in range(requests):
+        start = rng.randrange(0, max(1, size - window))
+        ranges.append((start, min(size - 1, start + window - 1)))
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda r: seek(url, *r), ranges))
+    elapsed = time.perf_counter() - began
+
+    ttfb = [r[0] * 1000 for r in results]
+    total = [r[1] * 1000 for r in results]
+    return {
+        "url": url,
+        "requests": requests,
+        "concurrency": concurrency,
+        "ttfb_p50_ms": round(statistics.median(ttfb), 2),
+        "latency_p50_ms": round(statistics.median(total), 2),
+        "latency_p95_ms": round(percentile(total, 95), 2),
+        "latency_p99_ms": round(percentile(total, 99), 2),
+        "mb_received": round(sum(r[2] for r in results) / 1e6, 2),
+        "requests_per_sec": round(requests / elapsed, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seek latency load test")
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--window", type=int, default=1024 * 1024)
+    args = parser.parse_args()
+
+    for url in args.urls:
+        print(run(url, args.concurrency, args.requests, args.window))
@@ -1,28 +1,64 @@
 # src/backend/main.py
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, Header, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
+import asyncio
+import json
+import logging
 import os
 from pathlib import Path
 import time
 import uuid
-from ml_processor import process_video
+from job_executor import get_executor, QUEUED, RUNNING, DONE, FAILED
 from fastapi.staticfiles import StaticFiles
-from starlette.middleware.base import BaseHTTPMiddleware
-import pandas as pd
-
-class CustomHeaderMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        response = await call_next(request)
-        if request.url.path.startswith("/processed"):
-            response.headers["Content-Type"] = "video/mp4"
-            response.headers["Cache-Control"] = "no-cache"
-        return response
+from starlette.datastructures import MutableHeaders, UploadFile
+from predictions_store import (find_predictions, to_api_payload, export_csv, detections_to_json,
+                               PREDICTIONS_SUFFIX, CSV_SUFFIX)
+from predictions_cache import PredictionsCache
+from tracking import events_to_json
+from range_streaming import range_file_response
+from uploads import save_upload, read_upload_form, UploadSessions
+from result_cache import ResultCache, cache_key, inference_params
+from model_registry import WEIGHTS
+from metrics import (REGISTRY, CONTENT_TYPE, JOBS, CACHE_HITS, CACHE_MISSES,
+                     MetricsMiddleware)
+
+logger = logging.getLogger(__name__)
+
+class CustomHeaderMiddleware:
+    # Pure ASGI rather than BaseHTTPMiddleware, which only forwards
+    # http.response.body messages and so would break zero-copy sends
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/processed"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["Content-Type"] = "video/mp4"
+                headers["Cache-Control"] = "no-cache"
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
 
 app = FastAPI()
 
+@app.on_event("startup")
+async def start_executor():
+    """Start the worker processes; each loads and warms up its model once"""
+    get_executor().start()
+
+@app.on_event("shutdown")
+async def stop_executor():
+    get_executor().shutdown()
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +70,8 @@ app.add_middleware(
 
 # Add custom header middleware
 app.add_middleware(CustomHeaderMiddleware)
+# Outermost, so request latency covers every other middleware
+app.add_middleware(MetricsMiddleware)
 
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 app.mount("/processed", StaticFiles(directory="processed"), name="processed")
@@ -44,111 +82,295 @@ PROCESSED_DIR = Path("processed")
 for dir in [UPLOAD_DIR, PROCESSED_DIR]:
     dir.mkdir(exist_ok=True)
 
+SSE_HEARTBEAT_SECONDS = 15
+
+predictions_cache = PredictionsCache()
+upload_sessions = UploadSessions(Path("upload_sessions"))
+result_cache = ResultCache()
+for served in (UPLOAD_DIR, PROCESSED_DIR):
+    if served.resolve() in (result_cache.root.resolve(), *result_cache.root.resolve().parents):
+        raise RuntimeError(f"The result cache must not be inside the served {served}/ directory")
+
+# Gauges read at scrape time from the objects that already keep the numbers
+def job_counts() -> dict:
+    stats = get_executor().stats()
+    return {(state,): stats[state] for state in (QUEUED, RUNNING, DONE, FAILED)}
+
+JOBS.set_function(job_counts)
+CACHE_HITS.set_function(lambda: {
+    ("results",): result_cache.hits, ("predictions",): predictions_cache.hits
+})
+CACHE_MISSES.set_function(lambda: {
+    ("results",): result_cache.misses, ("predictions",): predictions_cache.misses
+})
+
 def get_unique_filename(original_filename: str) -> str:
     name, ext = os.path.splitext(original_filename)
     unique_id = str(uuid.uuid4())[:8]
     return f"{name}_{unique_id}{ext}"
 
-async def process_video_task(file_path: Path, output_path: Path):
-    """Background task for video processing"""
-    await process_video(str(file_path), str(output_path))
+@app.get("/api/models/stats")
+async def get_model_stats():
+    """Load time and warm-up latency of the models in each worker process"""
+    return {"workers": get_executor().stats()["workers"]}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of request, upload, job and cache metrics"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    return {
+        "results": await run_in_threadpool(result_cache.stats),
+        "predictions": predictions_cache.stats(),
+    }
+
+@app.get("/api/jobs")
+async def get_job_stats():
+    """Queue depth and job counts of the executor"""
+    return get_executor().stats()
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = get_executor().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+def sse_message(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Server-Sent Events: progress (with fps and ETA), per-batch detections
+    and a final done/failed event, pushed as the worker produces them"""
+    executor = get_executor()
+    try:
+        subscription = executor.subscribe(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        try:
+            while True:
+                try:
+                    kind, payload = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=SSE_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if kind == "detections":
+                    payload = {"detections": detections_to_json(payload)}
+                yield sse_message(kind, payload)
+                if kind in (DONE, FAILED):
+                    return
+        finally:
+            executor.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/api/videos/predictions/{filename}")
-async def get_predictions(filename: str):
+async def get_predictions(
+    filename: str,
+    start_frame: Optional[int] = None,
+    end_frame: Optional[int] = None,
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    """Predictions of a video, optionally limited to a frame or time window
+
+    Parsed files are served from an in-memory LRU; responses carry an ETag
+    so an unchanged window comes back as 304.
+    """
+    predictions_path, tried = find_predictions(PROCESSED_DIR, filename)
+    if predictions_path is None:
+        raise HTTPException(
+            status_code=404, 
+            detail=f"Predictions not found for {filename}. Tried paths: {[str(p) for p in tried]}"
+        )
+
     try:
-        # Strip any video extension and get base filename
-        base_filename = os.path.splitext(filename)[0]
-        # Remove any "processed_" prefix if present
-        base_filename = base_filename.replace('processed_', '')
-        predictions_path = PROCESSED_DIR / f"{base_filename}_predictions.csv"
-        
-        print(f"Looking for predictions at: {predictions_path}")
-        
-        if not predictions_path.exists():
-            # Try alternative filenames if the first attempt fails
-            possible_paths = [
-                PROCESSED_DIR / f"{base_filename}_predictions.csv",
-                PROCESSED_DIR / f"processed_{base_filename}_predictions.csv",
-                # Add more patterns if needed
-            ]
-            
-            for path in possible_paths:
-                if path.exists():
-                    predictions_path = path
-                    break
-            else:  # If no file is found
-                raise HTTPException(
-                    status_code=404, 
-                    detail=f"Predictions not found for {filename}. Tried paths: {[str(p) for p in possible_paths]}"
-                )
-            
-        df = pd.read_csv(predictions_path)
-        print(f"Loaded predictions data:\n{df.head()}")
-        fps = int(df["FPS"].iloc[0]) if "FPS" in df.columns else 30
-        
-        # Convert the predictions to the expected format
-        formatted_predictions = []
-        for _, row in df.iterrows():
-            formatted_predictions.append({
-                "frame": int(row['Frame']),
-                "bbox": eval(row['Bbox']) if isinstance(row['Bbox'], str) else row['Bbox'],
-                "fps": fps
-            })
-        
-        return {
-            "predictions": formatted_predictions,
-            "fps": fps
-        }
+        cached = await run_in_threadpool(predictions_cache.get, predictions_path)
+
+        # Time windows are converted to frames with the video's fps; frame
+        # numbers are 1-based, so time t falls in frame int(t * fps) + 1
+        if start_time is not None and start_frame is None:
+            start_frame = int(start_time * cached.fps) + 1
+        if end_time is not None and end_frame is None:
+            end_frame = int(end_time * cached.fps) + 1
+
+        etag = cached.etag(start_frame, end_frame)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        payload = to_api_payload(cached.window(start_frame, end_frame), cached.fps)
+        if start_frame is not None or end_frame is not None:
+            payload["window"] = {"startFrame": start_frame, "endFrame": end_frame}
+        return JSONResponse(payload, headers=headers)
         
     except Exception as e:
-        print(f"Error processing predictions: {str(e)}")
+        logger.exception("Error processing predictions for %s", filename)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/videos/predictions/{filename}/csv")
+async def export_predictions_csv(filename: str):
+    """Predictions in the legacy CSV layout, for tools that still expect it"""
+    predictions_path, _ = find_predictions(PROCESSED_DIR, filename)
+    if predictions_path is None:
+        raise HTTPException(status_code=404, detail=f"Predictions not found for {filename}")
+
+    csv_path = Path(str(predictions_path).replace(PREDICTIONS_SUFFIX, CSV_SUFFIX))
+    if csv_path != predictions_path and (
+        not csv_path.exists() or csv_path.stat().st_mtime < predictions_path.stat().st_mtime
+    ):
+        cached = await run_in_threadpool(predictions_cache.get, predictions_path)
+        await run_in_threadpool(export_csv, cached.detections, cached.fps, cached.source,
+                                str(csv_path))
+    return FileResponse(csv_path, media_type="text/csv", filename=csv_path.name)
+
+@app.get("/api/videos/events/{filename}")
+async def get_events(filename: str, if_none_match: Optional[str] = Header(None)):
+    """Accident events of a video: one record per tracked incident instead of
+    one row per box per frame"""
+    predictions_path, tried = find_predictions(PROCESSED_DIR, filename)
+    if predictions_path is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Predictions not found for {filename}. Tried paths: {[str(p) for p in tried]}"
+        )
+
+    cached = await run_in_threadpool(predictions_cache.get, predictions_path)
+    etag = cached.events_etag()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    events = await run_in_threadpool(lambda: cached.events)
+    return JSONResponse({
+        "events": events_to_json(events, cached.fps),
+        "fps": int(cached.fps),
+        "detections": len(cached.detections),
+    }, headers=headers)
+
+async def queue_processing(input_path: Path, original_filename: str, size: int, sha256: str,
+                           priority: int = 0) -> dict:
+    """Queue an uploaded file on the job executor and describe it to the client
+
+    Footage already processed with the same weights and parameters is
+    served from the result cache instead of being queued again.
+    """
+    unique_filename = input_path.name
+    output_filename = f"processed_{unique_filename}"
+    output_path = PROCESSED_DIR / output_filename
+    response = {
+        "message": "Video uploaded and processing started",
+        "filename": unique_filename,
+        "processedFilename": output_filename,
+        "originalFilename": original_filename,
+        "size": size,
+        "sha256": sha256,
+        "status": "processing",
+    }
+
+    key = await run_in_threadpool(cache_key, sha256, WEIGHTS["accident"], inference_params(),
+                                  WEIGHTS["vehicle"])
+    if await run_in_threadpool(result_cache.materialize, key, output_path):
+        response["message"] = "Video already processed; reused cached result"
+        response["status"] = "completed"
+        response["cached"] = True
+        return response
+
+    job = get_executor().submit(input_path, output_path, priority=priority, cache_key=key)
+    response["jobId"] = job.id
+    response["cached"] = False
+    return response
+
 @app.post("/api/videos/upload")
-async def upload_video(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
-):
+async def upload_video(request: Request, priority: int = 0):
+    """Multipart upload with a `file` field; the size limit is enforced while
+    the body streams in, not after it has been spooled"""
+    form = None
     try:
         start_time = time.time()
-        
+        form = await read_upload_form(request)
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=422, detail="Missing file field")
+
         # Validate video file
-        if not file.content_type.startswith('video/'):
+        if not (file.content_type or "").startswith('video/'):
             return {"error": "File must be a video"}, 400
         
-        # Create unique filenames for both input and output
+        # Create unique filename for the input
         unique_filename = get_unique_filename(file.filename)
         input_path = UPLOAD_DIR / unique_filename
-        output_filename = f"processed_{unique_filename}"
-        output_path = PROCESSED_DIR / output_filename
         
-        # Save the uploaded file
-        with open(input_path, "wb+") as file_object:
-            file_object.write(await file.read())
+        # Stream the upload to disk in chunks, hashing as we go
+        size, sha256 = await save_upload(file, input_path)
         
-        # Start processing in background
-        background_tasks.add_task(
-            process_video_task,
-            input_path,
-            output_path
-        )
-        
-        end_time = time.time()
-        processing_time = round(end_time - start_time, 2)
-            
-        return {
-            "message": "Video uploaded and processing started",
-            "filename": unique_filename,
-            "processedFilename": output_filename,
-            "originalFilename": file.filename,
-            "size": os.path.getsize(input_path),
-            "processingTime": processing_time,
-            "status": "processing"
-        }
+        # Processing has not started yet; its duration comes with the job status
+        upload_time = round(time.time() - start_time, 2)
+
+        response = await queue_processing(input_path, file.filename, size, sha256, priority)
+        response["uploadTime"] = upload_time
+        return response
     
+    except HTTPException:
+        raise
     except Exception as e:
         # Fix error response format
         return {"error": str(e)}
+    finally:
+        if form is not None:
+            await form.close()
+
+@app.post("/api/uploads")
+async def create_upload(filename: str, content_type: str = "video/mp4", total_size: Optional[int] = None):
+    """Start a resumable upload; chunks are then PUT at increasing offsets"""
+    if not content_type.startswith('video/'):
+        raise HTTPException(status_code=400, detail="File must be a video")
+    return upload_sessions.create(filename, content_type, total_size)
+
+@app.get("/api/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    """Bytes received so far, i.e. the offset to resume from"""
+    return upload_sessions.status(upload_id)
+
+@app.put("/api/uploads/{upload_id}")
+async def append_upload_chunk(upload_id: str, request: Request, offset: int):
+    """Append the raw request body at `offset` without buffering it in memory"""
+    return await upload_sessions.append(upload_id, offset, request.stream())
+
+@app.post("/api/uploads/{upload_id}/finalize")
+async def finalize_upload(upload_id: str, sha256: Optional[str] = None, priority: int = 0):
+    """Assemble the upload into uploads/ and queue it for processing"""
+    manifest = upload_sessions.status(upload_id)
+    input_path = UPLOAD_DIR / get_unique_filename(manifest["filename"])
+    manifest = await upload_sessions.finalize(upload_id, input_path, sha256)
+    return await queue_processing(input_path, manifest["filename"], manifest["size"],
+                                  manifest["sha256"], priority)
+
+@app.delete("/api/uploads/{upload_id}")
+async def abort_upload(upload_id: str):
+    upload_sessions.abort(upload_id)
+    return {"uploadId": upload_id, "status": "aborted"}
 
 @app.get("/api/videos/{filename}")
 async def get_video_status(filename: str):
@@ -158,7 +380,23 @@ async def get_video_status(filename: str):
     
     if not input_path.exists():
         return {"error": "Video not found"}, 404
-        
+
+    job = get_executor().find(filename)
+    if job is not None:
+        status = {
+            DONE: "completed",
+            FAILED: "failed",
+        }.get(job.state, "processing")
+        response = {
+            "status": status,
+            "filename": filename,
+            **job.to_dict()
+        }
+        if job.state == DONE:
+            response["processedFilename"] = f"processed_{filename}"
+        return response
+
+    # No job in this process (e.g. after a restart): fall back to the output file
     if output_path.exists():
         return {
             "status": "completed",
@@ -174,53 +412,25 @@ async def get_video_status(filename: str):
 @app.get("/api/videos/download/{filename}")
 async def download_processed_video(
     filename: str,
-    range: Optional[str] = Header(None)
+    range: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None)
 ):
-    """Stream video with improved chunked transfer"""
+    """Stream video with spec-complete byte range support for seeking"""
     file_path = PROCESSED_DIR / filename
     
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Video not found")
-    
-    file_size = file_path.stat().st_size
-
-    # Handle range header for seeking support
-    if range:
-        start_bytes = int(range.replace("bytes=", "").split("-")[0])
-        end_bytes = file_size - 1
-        content_length = end_bytes - start_bytes + 1
-        status_code = 206
-    else:
-        start_bytes = 0
-        end_bytes = file_size - 1
-        content_length = file_size
-        status_code = 200
-
-    headers = {
-        "Content-Range": f"bytes {start_bytes}-{end_bytes}/{file_size}",
-        "Accept-Ranges": "bytes",
-        "Content-Length": str(content_length),
-        "Content-Type": "video/mp4",
-        "Cache-Control": "public, max-age=3600",
-        "Access-Control-Allow-Origin": "http://localhost:3000",
-        "Access-Control-Allow-Methods": "GET, OPTIONS",
-        "Access-Control-Allow-Headers": "Range, Content-Type",
-    }
-
-    async def stream_video():
-        chunk_size = 1024 * 1024  # 1MB chunks
-        with open(file_path, "rb") as video:
-            video.seek(start_bytes)
-            remaining = content_length
-            while remaining > 0:
-                chunk = video.read(min(chunk_size, remaining))
-                if not chunk:
-                    break
-                remaining -= len(chunk)
-                yield chunk
 
-    return StreamingResponse(
-        stream_video(),
-        status_code=status_code,
-        headers=headers
+    return range_file_response(
+        file_path,
+        range_header=range,
+        if_range=if_range,
+        headers={
+            "Content-Type": "video/mp4",
+            "Cache-Control": "public, max-age=3600",
+            "Access-Control-Allow-Origin": "http://localhost:3000",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+            "Access-Control-Allow-Headers": "Range, Content-Type",
+            "Access-Control-Expose-Headers": "Content-Range, Content-Length, Accept-Ranges, ETag",
+        }
     )
@@ -0,0 +1,202 @@
+# src/backend/metrics.py
+import bisect
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_DURATION_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+FPS_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 240)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: dict = None) -> str:
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        self._function = None
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, function):
+        """Read values at scrape time: `function()` returns {label values tuple: value}"""
+        self._function = function
+
+    def _samples(self) -> list:
+        if self._function is not None:
+            values = self._function()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        if not values and not self.labelnames:
+            values = {(): 0}
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self._samples())
+
+
+class Counter(_Metric):
+    """Monotonically increasing total"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down"""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, plus their sum and count"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(),
+                 buckets=LATENCY_BUCKETS, registry=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def _samples(self) -> list:
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        lines = []
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, {"le": _format_value(float(bound))})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Set of metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Duplicate metric: {metric.name}")
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = Histogram(
+    "sergek_http_request_duration_seconds", "Time to serve an HTTP request, by route",
+    ["method", "route", "status"]
+)
+UPLOAD_BYTES = Counter("sergek_upload_bytes_total", "Bytes of uploaded video written to disk")
+DOWNLOAD_BYTES = Counter("sergek_download_bytes_total", "Bytes of processed video streamed to clients")
+JOBS = Gauge("sergek_jobs", "Processing jobs known to the executor, by state", ["state"])
+JOB_DURATION = Histogram(
+    "sergek_job_duration_seconds", "Time a job spent running in a worker, by final state",
+    ["state"], buckets=JOB_DURATION_BUCKETS
+)
+JOB_FPS = Histogram(
+    "sergek_job_fps", "End-to-end processing speed of finished jobs, in frames per second",
+    buckets=FPS_BUCKETS
+)
+FRAMES_PROCESSED = Counter("sergek_frames_processed_total", "Video frames processed by finished jobs")
+CACHE_HITS = Counter("sergek_cache_hits_total", "Cache lookups that found an entry", ["cache"])
+CACHE_MISSES = Counter("sergek_cache_misses_total", "Cache lookups that missed", ["cache"])
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording HTTP_REQUEST_DURATION for every request
+
+    Requests are labelled with the route template (e.g.
+    /api/jobs/{job_id}) rather than the raw path, so label cardinality stays
+    bounded. The time covers the whole response body, including streams.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", None) or "unmatched",
+                status=status,
+            )
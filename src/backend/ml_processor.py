@@ -1,135 +1,261 @@
 # src/backend/ml_processor.py
-import asyncio
-from pathlib import Path
+from contextlib import ExitStack
+import argparse
+import json
+import queue
 import cv2
-import numpy as np
-from ultralytics import YOLO
-import torch
-import cvzone
 import os
-import pandas as pd
-import sys
+from model_registry import get_registry
+from detections import DetectionBuffer, draw_detections, CONF_THRESHOLD
+from predictions_store import predictions_path, save_predictions, export_csv, CSV_SUFFIX
+from batch_inference import BatchInference
+from pipeline import FramePipeline, StageTimings
+from profiling import RunProfile
+from encoder import FfmpegEncoder, X264_PRESET, X264_CRF
+from sampling import (FrameSampler, SampledInference, SAMPLING_MODE, SAMPLING_STRIDE,
+                      MOTION_THRESHOLD)
+from resize import FrameResizer, INFERENCE_SIZE, RESIZE_MODE
+from keyframes import TopKSelector, save_keyframes, KEYFRAMES_SUFFIX, NMS_SECONDS
+from cascade import CascadeInference, CASCADE_MODE, VEHICLE_CONF, GATE_SIZE
+from tracking import EventTracker
+from decoding import open_decoder, DECODER
 
-async def process_video(input_path: str, output_path: str, show_preview: bool = False):
-    """Process video using YOLO model"""
-    try:
-        # Initialize YOLO model
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        model = YOLO("LongFineTune.pt").to(device)
-        
-        # Open video
-        video = cv2.VideoCapture(input_path)
-        fps = int(video.get(cv2.CAP_PROP_FPS))
-        if not video.isOpened():
-            raise Exception("Error opening video file")
-            
-        # Get video properties
-        frame_width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
-        frame_height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = int(video.get(cv2.CAP_PROP_FPS))
-        
-        # Create video writer
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(
-            output_path,
-            fourcc,
-            fps,
-            (frame_width, frame_height)
-        )
+def process_video(input_path: str, output_path: str, show_preview: bool = False,
+                  batch_size: int = None, progress_callback=None, detections_callback=None,
+                  x264_preset: str = X264_PRESET, x264_crf: int = X264_CRF,
+                  sampling: str = SAMPLING_MODE, sampling_stride: int = SAMPLING_STRIDE,
+                  motion_threshold: float = MOTION_THRESHOLD, interpolate: bool = True,
+                  write_csv: bool = False, conf: float = CONF_THRESHOLD,
+                  inference_size: int = INFERENCE_SIZE, resize_mode: str = RESIZE_MODE,
+                  keyframes: int = 0, keyframe_window: int = None,
+                  cascade: str = CASCADE_MODE, decoder: str = DECODER, annotate: bool = True,
+                  start_frame: int = 1, end_frame: int = None):
+    """Process video using YOLO model
+
+    Frames are run through the model `batch_size` at a time; when not given
+    it comes from SERGEK_BATCH_SIZE or is auto-tuned to free memory.
+    The annotated video is encoded to H.264 in one pass with the given
+    libx264 preset and CRF.
+    `sampling` selects which frames are inferred ("all", "stride" or
+    "motion"); skipped frames reuse or interpolate neighbouring detections,
+    so the output video and predictions stay dense.
+    `inference_size` > 0 runs detection on frames downscaled to that long
+    side ("letterbox" or "resize" per `resize_mode`); boxes are mapped back,
+    so the video and predictions stay at source resolution.
+    `keyframes` > 0 selects that many top-confidence detections in the same
+    pass, at least `keyframe_window` frames apart (default NMS_SECONDS of
+    video), and saves their crops to `<output>_keyframes/`.
+    `cascade` ("frame" or "crop") first runs the vehicle model at a reduced
+    resolution and only runs the accident model on frames, or crops, where
+    two or more vehicles are close; "off" runs it on every sampled frame.
+    `decoder` picks the decode backend ("opencv", "pyav" or "auto").
+    `annotate=False` is headless: only predictions are produced, nothing is
+    drawn or encoded and `output_path` just names the predictions files.
+    Predictions are written as `<output>_predictions.npz`, together with the
+    accident events the tracker builds from them; `write_csv` also exports
+    the legacy CSV next to it.
+    `progress_callback(frames_done, total_frames)` is called after every
+    written frame, preceded by `detections_callback(frame_number, boxes)`
+    with that frame's (N, 6) boxes.
+    `start_frame`/`end_frame` (1-based, inclusive) limit processing to one
+    segment of the video; predictions keep absolute frame numbers and the
+    segment is written without audio, for sharded processing.
+    This is blocking work; the API runs it through the job executor rather
+    than on the event loop.
+    Returns the run's profile (profiling.RunProfile.report): per-frame
+    stage times, end-to-end frames/sec and peak memory.
+    """
+    # Borrow a warmed-up model instead of loading the weights per upload
+    with get_registry().checkout("accident") as model, ExitStack() as stack:
+        timings = StageTimings()
+        profile = RunProfile(timings, tags={"input": os.path.basename(input_path),
+                                            "start_frame": start_frame})
+        try:
+            # Open video
+            video = stack.enter_context(open_decoder(input_path, backend=decoder))
+
+            # Get video properties
+            frame_width = video.width
+            frame_height = video.height
+            fps = video.fps  # exact rate; the encoder must match the audio
+            total_frames = video.frame_count
+            is_segment = start_frame > 1 or end_frame is not None
+            if is_segment:
+                total_frames = (end_frame or total_frames) - start_frame + 1
         
-        frame_count = 0
-        preds = []  # Store predictions
+            # Annotated frames are piped straight into a single H.264 encode
+            out = None
+            if annotate:
+                out = FfmpegEncoder(
+                    output_path,
+                    frame_width,
+                    frame_height,
+                    fps,
+                    preset=x264_preset,
+                    crf=x264_crf,
+                    audio_source=None if is_segment else input_path
+                )
         
-        while True:
-            ret, frame = video.read()
-            if not ret:
-                break
-                
-            frame_count += 1
-                
-            # Run detection
-            results = model.predict(frame, conf=0.3, agnostic_nms=False)
-            anno = results[0].cpu()
-            class_list = anno.names
-            
-            # Convert boxes to DataFrame for easier processing
-            bboxes = pd.DataFrame(anno.boxes.data).astype("float")
-            
-            # Draw detections
-            annotated_frame = frame.copy()
-            for index, row in bboxes.iterrows():
-                x1, y1, x2, y2 = map(int, row[:4])
-                conf = row[4]
-                cls_id = int(row[5])
-                cls_name = class_list[cls_id]
-                
-                # Draw rectangle and label
-                cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cvzone.putTextRect(
-                    annotated_frame,
-                    f'accident {conf:.2f}',  # Changed label to 'accident'
-                    (x1, y1),
-                    1,
-                    1
+            preds = DetectionBuffer()  # Store predictions
+            tracker = EventTracker()  # Link boxes across frames into events
+            resizer = None
+            # Crops are already small; only whole frames are downscaled
+            if inference_size > 0 and cascade != "crop":
+                resizer = FrameResizer(frame_width, frame_height, inference_size, resize_mode)
+            engine = BatchInference(model, batch_size=batch_size, conf=conf, resizer=resizer,
+                                    timings=timings)
+            if cascade != "off":
+                gate_model = stack.enter_context(get_registry().checkout("vehicle"))
+                gate = BatchInference(
+                    gate_model, batch_size=engine.batch_size, conf=VEHICLE_CONF, timings=timings,
+                    resizer=FrameResizer(frame_width, frame_height, GATE_SIZE, resize_mode)
                 )
-                
-                # Store prediction
-                preds.append([
-                    os.path.basename(input_path),
-                    frame_count,
-                    [[x1, y1, x2, y2]]
-                ])
-            
-            # Write frame
-            out.write(annotated_frame)
+                engine = CascadeInference(gate, engine, mode=cascade)
+            sampler = FrameSampler(
+                mode=sampling,
+                stride=sampling_stride,
+                motion_threshold=motion_threshold
+            )
+            inference = SampledInference(engine, sampler, interpolate=interpolate)
+            selector = None
+            if keyframes > 0:
+                window = keyframe_window if keyframe_window is not None else int(NMS_SECONDS * fps)
+                selector = TopKSelector(keyframes, nms_window=window)
 
-            # Show preview if requested
-            if show_preview:
-                preview_width = 800
-                aspect_ratio = frame_width / frame_height
-                preview_height = int(preview_width / aspect_ratio)
-                preview_frame = cv2.resize(annotated_frame, (preview_width, preview_height))
-                cv2.imshow('Processing Preview', preview_frame)
-                # Break loop if 'q' is pressed
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    print("\nProcessing interrupted by user")
-                    break
-            
-        # Release resources
-        video.release()
-        out.release()
-        if show_preview:
-            cv2.destroyAllWindows()
+            def annotate_and_write(frame_count, frame, boxes):
+                # Crop key frame candidates from the clean frame
+                if selector is not None and len(boxes):
+                    with timings.measure("keyframes"):
+                        selector.offer(frame_count, frame, boxes)
+
+                # Store predictions
+                preds.append(frame_count, boxes)
+                tracker.update(frame_count, boxes)
+
+                if annotate:
+                    # Draw detections
+                    with timings.measure("draw"):
+                        annotated_frame = frame.copy()
+                        labels = [f'accident {conf:.2f}' for conf in boxes[:, 4].tolist()]
+                        draw_detections(annotated_frame, boxes, labels)
+
+                    # Write frame
+                    with timings.measure("encode"):
+                        out.write(annotated_frame)
+                if detections_callback:
+                    detections_callback(frame_count, boxes)
+                if progress_callback:
+                    frames_done = frame_count - start_frame + 1
+                    progress_callback(frames_done, max(total_frames, frames_done))
+
+                # Hand the preview to the main thread; HighGUI is not thread-safe
+                if show_preview and annotate:
+                    preview_width = 800
+                    aspect_ratio = frame_width / frame_height
+                    preview_height = int(preview_width / aspect_ratio)
+                    preview_frame = cv2.resize(annotated_frame, (preview_width, preview_height))
+                    try:
+                        previews.put_nowait(preview_frame)
+                    except queue.Full:
+                        pass  # Drop it rather than stall the writer
+                return True
 
-        # Save predictions to CSV
-        pred_df = pd.DataFrame(preds, columns=["Filename", "Frame", "Bbox"])
-        pred_df["FPS"] = fps
-        csv_path = output_path.rsplit('.', 1)[0] + '_predictions.csv'
-        pred_df.to_csv(csv_path, index=False)
+            previews = queue.Queue(maxsize=1)
 
-        # Convert to compatible format
-        if not output_path.endswith('.mp4'):
-            mp4_output = output_path.rsplit('.', 1)[0] + '.mp4'
-            os.system(f'ffmpeg -i {output_path} -vcodec h264 {mp4_output}')
-            os.replace(mp4_output, output_path)
+            def infer_with_preview(frames):
+                # Runs on the calling thread, which owns the preview window
+                for item in inference.run(frames):
+                    yield item
+                    try:
+                        cv2.imshow('Processing Preview', previews.get_nowait())
+                    except queue.Empty:
+                        pass
+                    # Stop the pipeline if 'q' is pressed
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        print("\nProcessing interrupted by user")
+                        return
 
-        temp_output = output_path + "_temp.mp4"
-        os.system(f'ffmpeg -i {output_path} -vcodec libx264 -acodec aac {temp_output}')
-        os.replace(temp_output, output_path)
+            # Decode, inference and annotate/write run concurrently
+            pipeline = FramePipeline(
+                video.frames(start_frame, end_frame),
+                infer_with_preview if show_preview and annotate else inference.run,
+                annotate_and_write,
+                timings=timings
+            )
+            try:
+                pipeline.run()
+            except Exception:
+                if out is not None:
+                    out.abort()
+                raise
+            
+            # Release resources
+            if out is not None:
+                with timings.measure("encode_flush", 0):
+                    out.release()
+            if show_preview:
+                cv2.destroyAllWindows()
+
+            # Save predictions once, in the columnar store
+            predictions_file = predictions_path(output_path)
+            events = tracker.finish()
+            save_predictions(predictions_file, preds.data, fps, input_path, events)
+            if write_csv:
+                export_csv(preds.data, fps, os.path.basename(input_path),
+                           predictions_path(output_path, CSV_SUFFIX))
+            if selector is not None:
+                keyframes_file = save_keyframes(
+                    selector.results(), predictions_path(output_path, KEYFRAMES_SUFFIX), fps
+                )
+                print(f"Key frames saved at: {keyframes_file}")
         
-        print(f"Video saved at: {output_path}")
-        print(f"Predictions saved at: {csv_path}")
-        print(f"File exists: {os.path.exists(output_path)}")
+            sampling_stats = sampler.stats()
+            report = profile.report(sampling_stats["inferred"] + sampling_stats["skipped"],
+                                    sampling_stats["inferred"])
+            print(f"Stage ms/frame: {report['ms_per_frame']}")
+            print(f"Bottleneck stage: {report['bottleneck']}, {report['fps']} frames/s")
+            print(f"Sampling: {sampling_stats}")
+            print(f"Accident events: {len(events)} from {len(preds)} detections")
+            if cascade != "off":
+                print(f"Cascade: {engine.stats()}")
+            print(f"Predictions saved at: {predictions_file}")
+            if annotate:
+                print(f"Video saved at: {output_path}")
+                print(f"File exists: {os.path.exists(output_path)}")
+            return report
         
-    except Exception as e:
-        print(f"Error processing video: {e}")
-        raise
+        except Exception as e:
+            print(f"Error processing video: {e}")
+            profile.finish_trace(error=e)
+            raise
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2 or len(sys.argv) > 3:
-        print("Usage: python -m ml_processor <input_path> [output_path]")
-        sys.exit(1)
-    
-    input_path = sys.argv[1]
-    output_path = sys.argv[2] if len(sys.argv) == 3 else "processed.mp4"
-    asyncio.run(process_video(input_path, output_path, show_preview=True))
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Detect accidents in a video")
+    parser.add_argument("input_path")
+    parser.add_argument("output_path", nargs="?", default="processed.mp4")
+    parser.add_argument("--no-preview", action="store_true", help="Do not open a preview window")
+    parser.add_argument("--profile", metavar="JSON_PATH",
+                        help="Write the run profile as JSON ('-' for stdout)")
+    parser.add_argument("--keyframes", type=int, default=0, metavar="K",
+                        help="Also save crops of the K most confident detections")
+    parser.add_argument("--decoder", default=DECODER, choices=["opencv", "pyav", "auto"])
+    parser.add_argument("--headless", action="store_true",
+                        help="Only write predictions; skip drawing and encoding the video")
+    parser.add_argument("--shards", type=int, default=1, metavar="N",
+                        help="Process N keyframe-aligned segments in parallel processes")
+    args = parser.parse_args()
+
+    options = {"keyframes": args.keyframes, "decoder": args.decoder, "annotate": not args.headless}
+    if args.shards > 1:
+        # Segments run in worker processes, without a preview window
+        from sharding import process_video_sharded
+        report = process_video_sharded(args.input_path, args.output_path, workers=args.shards,
+                                       **options)
+    else:
+        report = process_video(args.input_path, args.output_path,
+                               show_preview=not args.no_preview and not args.headless, **options)
+    if args.profile == "-":
+        print(json.dumps(report, indent=2))
+    elif args.profile:
+        with open(args.profile, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,136 @@
+# src/backend/model_registry.py
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+import torch
+from inference_backends import load_yolo, INFERENCE_BACKEND, INFERENCE_PRECISION
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# Weights shipped with the backend, keyed by the name jobs ask for
+WEIGHTS = {
+    "accident": BASE_DIR / "LongFineTune.pt",
+    "best": BASE_DIR / "best.pt",
+    "vehicle": BASE_DIR / "vehicle_detection.pt",
+}
+
+POOL_SIZE = int(os.environ.get("SERGEK_MODEL_POOL_SIZE", "1"))
+WARMUP_SIZE = 640
+
+
+class ModelRegistry:
+    """Loads every weights file once and hands warmed-up models to jobs"""
+
+    def __init__(self, weights: dict = None, pool_size: int = POOL_SIZE, device=None,
+                 backend: str = INFERENCE_BACKEND, precision: str = INFERENCE_PRECISION):
+        self.weights = dict(weights or WEIGHTS)
+        self.backend = backend
+        self.precision = precision
+        self.pool_size = max(1, pool_size)
+        self.device = device or torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self._pools = {}
+        self._shared = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _load_instance(self, name: str):
+        """Deserialize one model instance and run a dummy inference on it"""
+        path = self.weights[name]
+
+        start = time.perf_counter()
+        model = load_yolo(path, self.device, self.backend, self.precision)
+        load_time = time.perf_counter() - start
+
+        dummy = np.zeros((WARMUP_SIZE, WARMUP_SIZE, 3), dtype=np.uint8)
+        start = time.perf_counter()
+        model.predict(dummy, verbose=False)
+        warmup_time = time.perf_counter() - start
+
+        return model, load_time, warmup_time
+
+    def load(self, name: str):
+        """Load the pool for `name` if it is not loaded yet"""
+        if name not in self.weights:
+            raise KeyError(f"Unknown model: {name}")
+
+        with self._lock:
+            if name in self._pools:
+                return
+
+            pool = queue.Queue()
+            load_times = []
+            warmup_times = []
+            for _ in range(self.pool_size):
+                model, load_time, warmup_time = self._load_instance(name)
+                pool.put(model)
+                load_times.append(load_time)
+                warmup_times.append(warmup_time)
+                self._shared.setdefault(name, model)
+
+            self._pools[name] = pool
+            self._stats[name] = {
+                "weights": str(self.weights[name]),
+                "device": str(self.device),
+                "backend": self.backend,
+                "precision": self.precision,
+                "instances": self.pool_size,
+                "load_time_s": round(sum(load_times), 4),
+                "warmup_latency_ms": round(1000 * max(warmup_times), 2),
+                "checkouts": 0,
+            }
+            print(f"Loaded model '{name}' from {self.weights[name]} "
+                  f"in {self._stats[name]['load_time_s']}s")
+
+    def load_all(self):
+        """Load and warm up every known weights file"""
+        for name in self.weights:
+            if Path(self.weights[name]).exists():
+                self.load(name)
+            else:
+                print(f"Skipping model '{name}': {self.weights[name]} not found")
+
+    def get(self, name: str = "accident"):
+        """Return the shared instance of a model"""
+        self.load(name)
+        return self._shared[name]
+
+    @contextmanager
+    def checkout(self, name: str = "accident"):
+        """Borrow a model instance for exclusive use by one job"""
+        self.load(name)
+        model = self._pools[name].get()
+        with self._lock:
+            self._stats[name]["checkouts"] += 1
+        try:
+            yield model
+        finally:
+            self._pools[name].put(model)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "device": str(self.device),
+                "pool_size": self.pool_size,
+                "models": {name: dict(s) for name, s in self._stats.items()},
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry(device=None) -> ModelRegistry:
+    """Process-wide registry, created on first use
+
+    `device` only takes effect on the call that creates the registry, e.g.
+    in a worker process pinned to one GPU.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(device=torch.device(device) if device else None)
+        return _registry
@@ -0,0 +1,175 @@
+# src/backend/pipeline.py
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+QUEUE_SIZE = 8
+_DONE = object()
+
+
+class StageTimings:
+    """Thread-safe per-stage time and item counters
+
+    `listener(stage, seconds, items)` is called for every measurement, e.g.
+    to export it as a tracing span.
+    """
+
+    def __init__(self, listener=None):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self.listener = listener
+
+    def add(self, stage: str, seconds: float, items: int = 1):
+        with self._lock:
+            entry = self._stages.setdefault(stage, {"seconds": 0.0, "items": 0})
+            entry["seconds"] += seconds
+            entry["items"] += items
+        if self.listener is not None:
+            self.listener(stage, seconds, items)
+
+    @contextmanager
+    def measure(self, stage: str, items: int = 1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, items)
+
+    def seconds(self, stage: str) -> float:
+        with self._lock:
+            return self._stages.get(stage, {}).get("seconds", 0.0)
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                stage: {
+                    "seconds": round(entry["seconds"], 4),
+                    "items": entry["items"],
+                    "ms_per_item": round(1000 * entry["seconds"] / entry["items"], 3)
+                    if entry["items"] else 0.0,
+                }
+                for stage, entry in self._stages.items()
+            }
+
+    def bottleneck(self) -> str:
+        """Name of the stage that spent the most time doing work"""
+        report = self.report()
+        busy = {s: r["seconds"] for s, r in report.items() if not s.endswith("_wait")}
+        return max(busy, key=busy.get) if busy else None
+
+
+class FramePipeline:
+    """Decode -> infer -> annotate/write pipeline over bounded queues
+
+    `source` yields (frame_number, frame); it is consumed on a decoder thread.
+    `infer` maps an iterable of (frame_number, frame) to an iterable of
+    (frame_number, frame, result) and runs on the calling thread.
+    `sink` receives each (frame_number, frame, result) on a writer thread and
+    may return False to stop the pipeline early.
+    Each stage is a single thread and the queues are FIFO, so frame order is
+    preserved end to end; full queues block the upstream stage.
+    """
+
+    def __init__(self, source, infer, sink, queue_size: int = QUEUE_SIZE, timings: StageTimings = None):
+        self.source = source
+        self.infer = infer
+        self.sink = sink
+        self.timings = timings or StageTimings()
+        self._decoded = queue.Queue(maxsize=queue_size)
+        self._inferred = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._errors = []
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue, wait_stage: str):
+        start = time.perf_counter()
+        while True:
+            try:
+                item = q.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if self._stop.is_set():
+                    item = _DONE
+                    break
+        self.timings.add(wait_stage, time.perf_counter() - start, 0)
+        return item
+
+    def _decode_loop(self):
+        try:
+            frames = iter(self.source)
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                item = next(frames, _DONE)
+                if item is _DONE:
+                    break
+                self.timings.add("decode", time.perf_counter() - start)
+                if not self._put(self._decoded, item):
+                    break
+        except Exception as e:
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            self._put(self._decoded, _DONE)
+
+    def _write_loop(self):
+        try:
+            while True:
+                item = self._get(self._inferred, "write_wait")
+                if item is _DONE:
+                    break
+                with self.timings.measure("annotate_write"):
+                    keep_going = self.sink(*item)
+                if keep_going is False:
+                    self._stop.set()
+                    break
+        except Exception as e:
+            self._errors.append(e)
+            self._stop.set()
+
+    def _decoded_frames(self):
+        while True:
+            item = self._get(self._decoded, "infer_wait")
+            if item is _DONE:
+                return
+            yield item
+
+    def run(self) -> dict:
+        """Run to completion and return the per-stage timings"""
+        decoder = threading.Thread(target=self._decode_loop, name="decoder", daemon=True)
+        writer = threading.Thread(target=self._write_loop, name="writer", daemon=True)
+        decoder.start()
+        writer.start()
+        try:
+            results = iter(self.infer(self._decoded_frames()))
+            while not self._stop.is_set():
+                # Time spent blocked on the decoder is not inference time
+                start = time.perf_counter()
+                waited = self.timings.seconds("infer_wait")
+                item = next(results, _DONE)
+                if item is _DONE:
+                    break
+                waited = self.timings.seconds("infer_wait") - waited
+                self.timings.add("infer", max(0.0, time.perf_counter() - start - waited))
+                if not self._put(self._inferred, item):
+                    break
+        except Exception:
+            self._stop.set()
+            raise
+        finally:
+            self._put(self._inferred, _DONE)
+            writer.join()
+            self._stop.set()
+            decoder.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return self.timings.report()
@@ -0,0 +1,109 @@
+# src/backend/predictions_cache.py
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from predictions_store import read_any, load_events
+from tracking import track_events
+
+CACHE_MAX_BYTES = int(os.environ.get("SERGEK_PREDICTIONS_CACHE_MB", "256")) * 1024 * 1024
+
+
+class CachedPredictions:
+    """Parsed predictions of one file plus a per-frame offset index"""
+
+    def __init__(self, path: Path, detections: np.ndarray, fps: float, source: str, mtime_ns: int):
+        if len(detections) and np.any(np.diff(detections["frame"]) < 0):
+            detections = detections[np.argsort(detections["frame"], kind="stable")]
+        self.path = path
+        self.detections = detections
+        self.fps = fps
+        self.source = source
+        self.mtime_ns = mtime_ns
+        # frames[i] has its detections at offsets[i]:offsets[i + 1]
+        self.frames, self.offsets = np.unique(detections["frame"], return_index=True)
+        self.offsets = np.append(self.offsets, len(detections))
+        self._events = None
+
+    @property
+    def events(self) -> np.ndarray:
+        """Stored accident events, or events tracked from the detections for
+        files written before events were stored"""
+        if self._events is None:
+            events = load_events(self.path)
+            self._events = events if events is not None else track_events(self.detections)
+        return self._events
+
+    @property
+    def nbytes(self) -> int:
+        return self.detections.nbytes + self.frames.nbytes + self.offsets.nbytes
+
+    def etag(self, start_frame=None, end_frame=None) -> str:
+        window = f"-{start_frame}-{end_frame}" if start_frame is not None or end_frame is not None else ""
+        return f'"{self.mtime_ns:x}-{len(self.detections)}{window}"'
+
+    def events_etag(self) -> str:
+        return f'"{self.mtime_ns:x}-{len(self.detections)}-events"'
+
+    def window(self, start_frame: int = None, end_frame: int = None) -> np.ndarray:
+        """Detections with start_frame <= frame <= end_frame, without scanning"""
+        lo = 0 if start_frame is None else int(np.searchsorted(self.frames, start_frame, "left"))
+        hi = len(self.frames) if end_frame is None else int(np.searchsorted(self.frames, end_frame, "right"))
+        if hi <= lo:
+            return self.detections[:0]
+        return self.detections[self.offsets[lo]:self.offsets[hi]]
+
+
+class PredictionsCache:
+    """Size-bounded LRU of parsed predictions, keyed by path and mtime
+
+    A file that changes on disk gets a new key, so stale entries are never
+    served; they simply age out of the LRU.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path) -> CachedPredictions:
+        path = Path(path)
+        mtime_ns = path.stat().st_mtime_ns
+        key = (str(path), mtime_ns)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        detections, fps, source = read_any(path)
+        entry = CachedPredictions(path, detections, fps, source, mtime_ns)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = entry
+                self._bytes += entry.nbytes
+                self._evict()
+            return self._entries.get(key, entry)
+
+    def _evict(self):
+        # Always keep the newest entry, even if it alone exceeds the budget
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.nbytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,173 @@
+# src/backend/predictions_store.py
+import ast
+import math
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from detections import DETECTION_DTYPE, int_boxes, bbox_strings
+
+PREDICTIONS_SUFFIX = "_predictions.npz"
+CSV_SUFFIX = "_predictions.csv"
+DEFAULT_FPS = 30
+
+
+def predictions_path(output_path: str, suffix: str = PREDICTIONS_SUFFIX) -> str:
+    """Predictions file that belongs to a processed video"""
+    return str(output_path).rsplit('.', 1)[0] + suffix
+
+
+def save_predictions(path: str, detections: np.ndarray, fps: float, source: str,
+                     events: np.ndarray = None):
+    """Write detections as an uncompressed .npz with numeric columns
+
+    `detections` is a DETECTION_DTYPE structured array sorted by frame;
+    `events` (tracking.EVENT_DTYPE), when given, is stored alongside.
+    The file is written to a temporary name and renamed so readers never
+    see a partial file.
+    """
+    arrays = {
+        "detections": np.ascontiguousarray(detections, dtype=DETECTION_DTYPE),
+        "fps": np.float32(fps or DEFAULT_FPS),
+        "source": np.str_(os.path.basename(source)),
+    }
+    if events is not None:
+        arrays["events"] = np.ascontiguousarray(events)
+    tmp_path = str(path) + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_predictions(path: str):
+    """Return (detections, fps, source) from a predictions .npz"""
+    with np.load(path, allow_pickle=False) as data:
+        return data["detections"], float(data["fps"]), str(data["source"])
+
+
+def load_events(path: str):
+    """Event records stored with the predictions, or None if there are none"""
+    if str(path).endswith(CSV_SUFFIX):
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        return data["events"] if "events" in data.files else None
+
+
+def with_video_column(records: np.ndarray, video: int) -> np.ndarray:
+    """Copy of structured `records` with a leading int32 "video" column"""
+    dtype = np.dtype([("video", "<i4")] + records.dtype.descr)
+    out = np.zeros(len(records), dtype=dtype)
+    out["video"] = video
+    for name in records.dtype.names:
+        out[name] = records[name]
+    return out
+
+
+def save_dataset(path: str, videos: list, fps: list, detections: list, events: list):
+    """Write the predictions of many videos as one columnar .npz
+
+    `detections[i]`/`events[i]` belong to `videos[i]`; they are stacked
+    into single tables whose "video" column indexes `videos`. Written to a
+    temporary name and renamed, like save_predictions.
+    """
+    arrays = {
+        "videos": np.array([str(v) for v in videos], dtype=np.str_),
+        "fps": np.array(fps, dtype=np.float32),
+        "detections": np.concatenate(
+            [with_video_column(d, i) for i, d in enumerate(detections)]
+            or [with_video_column(np.zeros(0, DETECTION_DTYPE), 0)]
+        ),
+    }
+    if events and all(e is not None for e in events):
+        arrays["events"] = np.concatenate([with_video_column(e, i) for i, e in enumerate(events)])
+    tmp_path = str(path) + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_dataset(path: str) -> dict:
+    """Tables of a save_dataset file: videos, fps, detections and maybe events"""
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+def load_legacy_csv(path: str):
+    """Read an old predictions CSV (stringified bbox column) into records"""
+    df = pd.read_csv(path)
+    fps = float(df["FPS"].iloc[0]) if "FPS" in df.columns and len(df) else DEFAULT_FPS
+    source = str(df["Filename"].iloc[0]) if len(df) else ""
+    boxes = np.array(
+        [ast.literal_eval(b)[0] if isinstance(b, str) else b[0] for b in df["Bbox"]],
+        dtype=np.float32
+    ).reshape(-1, 4)
+    records = np.zeros(len(df), dtype=DETECTION_DTYPE)
+    records["frame"] = df["Frame"].to_numpy()
+    records["x1"], records["y1"], records["x2"], records["y2"] = boxes.T
+    records["conf"] = np.nan
+    return records, fps, source
+
+
+def export_csv(detections: np.ndarray, fps: float, source: str, csv_path: str):
+    """Write the legacy CSV layout (Filename, Frame, Bbox, FPS)"""
+    pd.DataFrame({
+        "Filename": source,
+        "Frame": detections["frame"],
+        "Bbox": bbox_strings(detections),
+        "FPS": int(fps),
+    }).to_csv(csv_path, index=False)
+
+
+def find_predictions(directory: Path, filename: str):
+    """Locate the predictions of a (processed) video, preferring .npz
+
+    Returns (path or None, every path tried) so callers can report misses.
+    """
+    base_filename = os.path.splitext(filename)[0].replace('processed_', '')
+    candidates = [
+        directory / f"{base_filename}{PREDICTIONS_SUFFIX}",
+        directory / f"processed_{base_filename}{PREDICTIONS_SUFFIX}",
+        directory / f"{base_filename}{CSV_SUFFIX}",
+        directory / f"processed_{base_filename}{CSV_SUFFIX}",
+    ]
+    for path in candidates:
+        if path.exists():
+            return path, candidates
+    return None, candidates
+
+
+def read_any(path: Path):
+    """Load predictions from either the .npz store or a legacy CSV"""
+    if str(path).endswith(CSV_SUFFIX):
+        return load_legacy_csv(path)
+    return load_predictions(path)
+
+
+def detections_to_json(detections: np.ndarray) -> list:
+    """Frame, integer bbox and confidence of each detection, for streaming
+
+    Legacy CSV predictions have no confidences (NaN); those become null, as
+    NaN is not valid JSON.
+    """
+    return [
+        {"frame": frame, "bbox": [box], "conf": None if math.isnan(conf) else round(conf, 4)}
+        for frame, box, conf in zip(
+            detections["frame"].tolist(),
+            int_boxes(detections).tolist(),
+            detections["conf"].tolist()
+        )
+    ]
+
+
+def to_api_payload(detections: np.ndarray, fps: float) -> dict:
+    """Response body of the predictions endpoint, built column-wise"""
+    fps = int(fps)
+    frames = detections["frame"].tolist()
+    boxes = int_boxes(detections).tolist()
+    return {
+        "predictions": [
+            {"frame": frame, "bbox": [box], "fps": fps}
+            for frame, box in zip(frames, boxes)
+        ],
+        "fps": fps
+    }
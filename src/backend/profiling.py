@@ -0,0 +1,213 @@
+# src/backend/profiling.py
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+from pipeline import StageTimings
+
+# Span export is off unless one of these is set. The endpoint takes Zipkin
+# v2 JSON, e.g. http://localhost:9411/api/v2/spans (Zipkin, Jaeger and the
+# OpenTelemetry collector's zipkin receiver all accept it).
+TRACE_FILE = os.environ.get("SERGEK_TRACE_FILE")
+TRACE_ENDPOINT = os.environ.get("SERGEK_TRACE_ENDPOINT")
+SERVICE_NAME = "sergek-backend"
+SPAN_BATCH_SIZE = 500
+
+# Per-frame cost of each part of process_video, in pipeline order
+PROFILE_STAGES = ("decode", "resize", "preprocess", "inference", "postprocess",
+                  "keyframes", "draw", "encode", "encode_flush")
+
+
+def _maxrss_mb(who) -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    return _maxrss_mb(resource.RUSAGE_SELF)
+
+
+def children_cpu_seconds() -> float:
+    """User + system CPU time of all waited-for child processes"""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _span_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class SpanExporter:
+    """Buffers Zipkin v2 spans and writes them to a file and/or a collector
+
+    The file gets one JSON span per line. Spans are flushed every
+    SPAN_BATCH_SIZE spans and on flush(); a collector that cannot be
+    reached is reported once per flush and its spans dropped, so tracing
+    never fails a job.
+    """
+
+    def __init__(self, path: str = TRACE_FILE, endpoint: str = TRACE_ENDPOINT,
+                 batch_size: int = SPAN_BATCH_SIZE):
+        self.path = path
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self._spans = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path or self.endpoint)
+
+    @staticmethod
+    def new_trace_id() -> str:
+        return uuid.uuid4().hex
+
+    def record(self, trace_id: str, name: str, start: float, duration: float,
+               parent_id: str = None, span_id: str = None, tags: dict = None) -> str:
+        """Add a span that started at `start` (epoch seconds); returns its id"""
+        span = {
+            "traceId": trace_id,
+            "id": span_id or _span_id(),
+            "name": name,
+            "timestamp": int(start * 1_000_000),
+            "duration": max(1, int(duration * 1_000_000)),
+            "localEndpoint": {"serviceName": SERVICE_NAME},
+            "tags": {k: str(v) for k, v in (tags or {}).items()},
+        }
+        if parent_id:
+            span["parentId"] = parent_id
+        with self._lock:
+            self._spans.append(span)
+            full = len(self._spans) >= self.batch_size
+        if full:
+            self.flush()
+        return span["id"]
+
+    def flush(self):
+        with self._lock:
+            spans, self._spans = self._spans, []
+        if not spans:
+            return
+        if self.path:
+            with open(self.path, "a") as f:
+                f.writelines(json.dumps(span) + "\n" for span in spans)
+        if self.endpoint:
+            request = urllib.request.Request(
+                self.endpoint, data=json.dumps(spans).encode(),
+                headers={"Content-Type": "application/json"}, method="POST"
+            )
+            try:
+                urllib.request.urlopen(request, timeout=5).close()
+            except OSError as e:
+                print(f"Dropping {len(spans)} spans, collector unreachable: {e}")
+
+
+class RunProfile:
+    """Wall clock, stage timings and resource usage of one process_video run
+
+    Stage times come from the shared StageTimings; ffmpeg's CPU time is
+    the growth of this process' child CPU usage over the run, which is the
+    encoder as long as process_video starts no other children.
+    With span export enabled every stage measurement becomes a child span
+    of one `name` span per run.
+    """
+
+    def __init__(self, timings: StageTimings = None, name: str = "process_video",
+                 tags: dict = None, exporter: SpanExporter = None):
+        self.timings = timings or StageTimings()
+        self.name = name
+        self.tags = dict(tags or {})
+        self.exporter = exporter or SpanExporter()
+        self.trace_id = self.exporter.new_trace_id()
+        self.span_id = _span_id()
+        if self.exporter.enabled:
+            self.timings.listener = self._record_stage
+        self._started_at = time.time()
+        self._start = time.perf_counter()
+        self._children_cpu = children_cpu_seconds()
+
+    def _record_stage(self, stage: str, seconds: float, items: int):
+        if stage.endswith("_wait"):
+            return
+        self.exporter.record(self.trace_id, stage, time.time() - seconds, seconds,
+                             parent_id=self.span_id, tags={"items": items})
+
+    def finish_trace(self, error: Exception = None, **tags):
+        """Close the run's root span and flush the exporter"""
+        if not self.exporter.enabled:
+            return
+        tags = {**self.tags, **tags}
+        if error is not None:
+            tags["error"] = str(error)
+        self.exporter.record(self.trace_id, self.name, self._started_at,
+                             time.perf_counter() - self._start, span_id=self.span_id, tags=tags)
+        self.exporter.flush()
+
+    def report(self, frames: int, inferred_frames: int = None) -> dict:
+        wall = time.perf_counter() - self._start
+        stages = self.timings.report()
+        per_frame = {
+            stage: round(1000 * stages[stage]["seconds"] / frames, 3) if frames else 0.0
+            for stage in PROFILE_STAGES if stage in stages
+        }
+        ffmpeg_cpu = children_cpu_seconds() - self._children_cpu
+        per_frame["ffmpeg_cpu"] = round(1000 * ffmpeg_cpu / frames, 3) if frames else 0.0
+        self.finish_trace(frames=frames, fps=round(frames / wall, 2) if wall else 0.0)
+        return {
+            "frames": frames,
+            "inferred_frames": inferred_frames if inferred_frames is not None else frames,
+            "wall_seconds": round(wall, 3),
+            "fps": round(frames / wall, 2) if wall else 0.0,
+            "ms_per_frame": per_frame,
+            "ffmpeg_cpu_seconds": round(ffmpeg_cpu, 3),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "ffmpeg_peak_rss_mb": round(_maxrss_mb(resource.RUSAGE_CHILDREN), 1),
+            "bottleneck": self.timings.bottleneck(),
+            "stages": stages,
+        }
+
+
+def merge_reports(reports: list, wall_seconds: float) -> dict:
+    """One report for work split over RunProfile reports that ran in parallel
+
+    Frames, stage times and ffmpeg CPU add up, memory peaks are the largest
+    of any part, and throughput is over the overall `wall_seconds`.
+    """
+    frames = sum(r["frames"] for r in reports)
+    stages = {}
+    for report in reports:
+        for stage, entry in report["stages"].items():
+            merged = stages.setdefault(stage, {"seconds": 0.0, "items": 0})
+            merged["seconds"] += entry["seconds"]
+            merged["items"] += entry["items"]
+    for entry in stages.values():
+        entry["seconds"] = round(entry["seconds"], 4)
+        entry["ms_per_item"] = round(1000 * entry["seconds"] / entry["items"], 3) \
+            if entry["items"] else 0.0
+
+    per_frame = {
+        stage: round(1000 * stages[stage]["seconds"] / frames, 3) if frames else 0.0
+        for stage in PROFILE_STAGES if stage in stages
+    }
+    ffmpeg_cpu = sum(r["ffmpeg_cpu_seconds"] for r in reports)
+    per_frame["ffmpeg_cpu"] = round(1000 * ffmpeg_cpu / frames, 3) if frames else 0.0
+    busy = {s: e["seconds"] for s, e in stages.items() if not s.endswith("_wait")}
+    return {
+        "frames": frames,
+        "inferred_frames": sum(r["inferred_frames"] for r in reports),
+        "wall_seconds": round(wall_seconds, 3),
+        "fps": round(frames / wall_seconds, 2) if wall_seconds else 0.0,
+        "ms_per_frame": per_frame,
+        "ffmpeg_cpu_seconds": round(ffmpeg_cpu, 3),
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in reports),
+        "ffmpeg_peak_rss_mb": max(r["ffmpeg_peak_rss_mb"] for r in reports),
+        "bottleneck": max(busy, key=busy.get) if busy else None,
+        "stages": stages,
+        "segments": len(reports),
+    }
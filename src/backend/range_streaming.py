@@ -0,0 +1,149 @@
+# src/backend/range_streaming.py
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+import anyio
+from fastapi import HTTPException
+from starlette.responses import Response
+from metrics import DOWNLOAD_BYTES
+
+CHUNK_SIZE = 256 * 1024
+
+
+def file_etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(range_header: str, file_size: int):
+    """Parse a Range header into an inclusive (start, end) byte pair
+
+    Supports "bytes=start-end", "bytes=start-" and suffix "bytes=-length".
+    Returns None when the header should be ignored (other units, or several
+    ranges, which we answer with the full file), and raises 416 when the
+    range cannot be satisfied.
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = spec.strip().partition("-")
+    try:
+        if not sep:
+            raise ValueError
+        if first == "":
+            # Suffix range: the last `last` bytes
+            length = int(last)
+            if length < 0:
+                raise ValueError
+            # A zero-length suffix selects nothing, so it is unsatisfiable
+            start = max(0, file_size - length) if length else file_size
+            end = file_size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else None
+            if end is not None and end < start:
+                raise ValueError
+            # Clamp only after the syntax check, so a start past the end is a 416
+            end = file_size - 1 if end is None else min(end, file_size - 1)
+    except ValueError:
+        return None
+
+    if start >= file_size or file_size == 0:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    return start, end
+
+
+def if_range_matches(if_range: str, etag: str, mtime: float) -> bool:
+    """True when a conditional range request may be honoured"""
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        # Weak validators never match for ranges
+        return if_range == etag
+    try:
+        return int(mtime) <= parsedate_to_datetime(if_range).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+class RangeFileResponse(Response):
+    """Serves a byte range of a file without blocking the event loop
+
+    Uses the ASGI zero-copy send extension (sendfile) when the server offers
+    it, and otherwise reads the file with async I/O in fixed-size chunks.
+    """
+
+    def __init__(self, path: Path, start: int, end: int, status_code: int, headers: dict):
+        super().__init__(status_code=status_code, headers=headers)
+        self.path = path
+        self.start = start
+        self.length = end - start + 1
+
+    async def __call__(self, scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if scope.get("method") == "HEAD" or self.length <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            DOWNLOAD_BYTES.inc(self.length)
+            return
+
+        async with await anyio.open_file(self.path, "rb") as f:
+            await f.seek(self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                DOWNLOAD_BYTES.inc(len(chunk))
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def range_file_response(path: Path, range_header: str = None, if_range: str = None,
+                        headers: dict = None) -> RangeFileResponse:
+    """Build a 200/206 response for `path` honouring Range and If-Range"""
+    stat = path.stat()
+    file_size = stat.st_size
+    etag = file_etag(stat)
+
+    byte_range = None
+    if if_range_matches(if_range, etag, stat.st_mtime):
+        byte_range = parse_range(range_header, file_size)
+
+    if byte_range is None:
+        start, end, status_code = 0, file_size - 1, 200
+    else:
+        (start, end), status_code = byte_range, 206
+
+    response_headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(max(0, end - start + 1)),
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        **(headers or {}),
+    }
+    if status_code == 206:
+        response_headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    return RangeFileResponse(path, start, end, status_code, response_headers)
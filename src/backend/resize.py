@@ -0,0 +1,80 @@
+# src/backend/resize.py
+import math
+import os
+import cv2
+import numpy as np
+
+# Long side of the frames the model sees; 0 keeps the source resolution
+INFERENCE_SIZE = int(os.environ.get("SERGEK_INFERENCE_SIZE", "0"))
+RESIZE_MODE = os.environ.get("SERGEK_RESIZE_MODE", "letterbox")  # letterbox | resize
+STRIDE = 32
+PAD_VALUE = 114
+
+
+class FrameResizer:
+    """Downscales frames once into reused buffers and maps boxes back
+
+    "letterbox" keeps the aspect ratio and pads to a multiple of the model
+    stride, "resize" stretches to the stride-aligned target. Each batch slot
+    has its own preallocated buffers, so a whole batch can be prepared
+    before the model runs without allocating per frame.
+    """
+
+    def __init__(self, src_width: int, src_height: int, size: int = INFERENCE_SIZE,
+                 mode: str = RESIZE_MODE, slots: int = 1):
+        if mode not in ("letterbox", "resize"):
+            raise ValueError(f"Unknown resize mode: {mode}")
+        self.src_width = src_width
+        self.src_height = src_height
+        self.mode = mode
+
+        scale = min(1.0, size / max(src_width, src_height))
+        self.new_width = max(1, round(src_width * scale))
+        self.new_height = max(1, round(src_height * scale))
+        self.width = math.ceil(self.new_width / STRIDE) * STRIDE
+        self.height = math.ceil(self.new_height / STRIDE) * STRIDE
+        if mode == "resize":
+            self.new_width, self.new_height = self.width, self.height
+        self.scale_x = self.new_width / src_width
+        self.scale_y = self.new_height / src_height
+        self.pad_x = (self.width - self.new_width) // 2
+        self.pad_y = (self.height - self.new_height) // 2
+
+        self._canvases = np.empty((0, self.height, self.width, 3), dtype=np.uint8)
+        self._resized = np.empty((0, self.new_height, self.new_width, 3), dtype=np.uint8)
+        self.reserve(slots)
+
+    @property
+    def imgsz(self) -> tuple:
+        """(height, width) to pass to the model so it does not resize again"""
+        return self.height, self.width
+
+    def reserve(self, slots: int):
+        if slots <= len(self._canvases):
+            return
+        extra = slots - len(self._canvases)
+        self._canvases = np.concatenate([
+            self._canvases,
+            np.full((extra, self.height, self.width, 3), PAD_VALUE, dtype=np.uint8)
+        ])
+        self._resized = np.concatenate([
+            self._resized,
+            np.empty((extra, self.new_height, self.new_width, 3), dtype=np.uint8)
+        ])
+
+    def prepare(self, frame, slot: int = 0) -> np.ndarray:
+        """Model input for `frame`, written into the buffers of `slot`"""
+        resized = self._resized[slot]
+        cv2.resize(frame, (self.new_width, self.new_height), dst=resized,
+                   interpolation=cv2.INTER_AREA)
+        canvas = self._canvases[slot]
+        canvas[self.pad_y:self.pad_y + self.new_height,
+               self.pad_x:self.pad_x + self.new_width] = resized
+        return canvas
+
+    def to_source(self, boxes: np.ndarray) -> np.ndarray:
+        """Map (N, 4+) xyxy boxes from model input space to source pixels"""
+        boxes = boxes.copy()
+        boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - self.pad_x) / self.scale_x).clip(0, self.src_width)
+        boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - self.pad_y) / self.scale_y).clip(0, self.src_height)
+        return boxes
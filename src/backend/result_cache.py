@@ -0,0 +1,223 @@
+# src/backend/result_cache.py
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from predictions_store import predictions_path
+from detections import CONF_THRESHOLD
+from encoder import X264_PRESET, X264_CRF
+from inference_backends import INFERENCE_BACKEND, INFERENCE_PRECISION
+from sampling import SAMPLING_MODE, SAMPLING_STRIDE, MOTION_THRESHOLD, MOTION_MAX_GAP
+from resize import INFERENCE_SIZE, RESIZE_MODE
+from cascade import CASCADE_MODE, VEHICLE_CONF, GATE_SIZE, VEHICLE_CLASSES
+
+# Never under a served directory: entries would be downloadable by hash path
+CACHE_DIR = Path(os.environ.get("SERGEK_RESULT_CACHE_DIR", "cache/results"))
+CACHE_QUOTA_BYTES = int(os.environ.get("SERGEK_RESULT_CACHE_QUOTA_MB", "20480")) * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+VIDEO_NAME = "video.mp4"
+PREDICTIONS_NAME = "predictions.npz"
+META_NAME = "meta.json"
+
+_weights_hashes = {}
+_weights_lock = threading.Lock()
+
+
+def file_sha256(path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def weights_sha256(path) -> str:
+    """Hash of a weights file, computed once per path and mtime"""
+    stat = os.stat(path)
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    with _weights_lock:
+        if key in _weights_hashes:
+            return _weights_hashes[key]
+    digest = file_sha256(path)
+    with _weights_lock:
+        _weights_hashes[key] = digest
+    return digest
+
+
+def inference_params(options: dict = None) -> dict:
+    """Every process_video setting that changes the output, with defaults filled in"""
+    params = {
+        "conf": CONF_THRESHOLD,
+        "sampling": SAMPLING_MODE,
+        "sampling_stride": SAMPLING_STRIDE,
+        "motion_threshold": MOTION_THRESHOLD,
+        "motion_max_gap": MOTION_MAX_GAP,
+        "interpolate": True,
+        "x264_preset": X264_PRESET,
+        "x264_crf": X264_CRF,
+        "backend": INFERENCE_BACKEND,
+        "precision": INFERENCE_PRECISION,
+        "inference_size": INFERENCE_SIZE,
+        "resize_mode": RESIZE_MODE,
+        "cascade": CASCADE_MODE,
+    }
+    params.update({k: v for k, v in (options or {}).items() if k in params})
+    if params["cascade"] != "off":
+        params.update({
+            "vehicle_conf": VEHICLE_CONF,
+            "gate_size": GATE_SIZE,
+            "vehicle_classes": VEHICLE_CLASSES,
+        })
+    return params
+
+
+def cache_key(video_sha256: str, weights_path, params: dict, gate_weights_path=None) -> str:
+    """Key of a processing result: input content, model weights and parameters
+
+    With the cascade on, the vehicle gate's weights (`gate_weights_path`)
+    shape the result too and are part of the key.
+    """
+    material = {
+        "video": video_sha256,
+        "weights": weights_sha256(weights_path),
+        "params": params,
+    }
+    if params.get("cascade", "off") != "off":
+        material["gate_weights"] = weights_sha256(gate_weights_path)
+    material = json.dumps(material, sort_keys=True)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def link_or_copy(src, dst):
+    """Hard-link `src` to `dst` (no extra disk), copying across filesystems"""
+    tmp = f"{dst}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+class ResultCache:
+    """Content-addressed store of processed videos and their predictions
+
+    Entries live under `root/<key>/` and are shared with the outputs under
+    processed/ through hard links. The quota counts by inode: a file still
+    linked from processed/ (st_nlink > 1) would not be freed by evicting
+    its entry, so only files the cache alone holds count against
+    `quota_bytes`. When those exceed it, the least recently used entries
+    that hold any are removed.
+    `root` must be outside the static mounts (processed/, uploads/), so an
+    entry is only reachable through a materialized output. It should be on
+    the same filesystem as processed/, or links fall back to copies.
+    """
+
+    def __init__(self, root: Path = CACHE_DIR, quota_bytes: int = CACHE_QUOTA_BYTES):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.quota_bytes = quota_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key
+
+    def lookup(self, key: str):
+        """Entry directory for `key` if it is complete, refreshing its LRU time"""
+        entry = self._entry(key)
+        complete = all((entry / name).exists() for name in (VIDEO_NAME, PREDICTIONS_NAME, META_NAME))
+        with self._lock:
+            if complete:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if not complete:
+            return None
+        os.utime(entry / META_NAME)
+        return entry
+
+    def materialize(self, key: str, output_path) -> bool:
+        """Put a cached result at `output_path` (and its predictions next to it)"""
+        entry = self.lookup(key)
+        if entry is None:
+            return False
+        try:
+            link_or_copy(entry / PREDICTIONS_NAME, predictions_path(output_path))
+            link_or_copy(entry / VIDEO_NAME, output_path)
+        except FileNotFoundError:
+            # Evicted between lookup and link
+            return False
+        return True
+
+    def store(self, key: str, output_path, meta: dict = None):
+        """Add a finished result to the cache, then enforce the quota"""
+        entry = self._entry(key)
+        if entry.exists():
+            return
+        staging = self.root / f".{key}.{uuid.uuid4().hex[:8]}"
+        staging.mkdir()
+        try:
+            link_or_copy(output_path, staging / VIDEO_NAME)
+            link_or_copy(predictions_path(output_path), staging / PREDICTIONS_NAME)
+            (staging / META_NAME).write_text(json.dumps({
+                "key": key,
+                "createdAt": time.time(),
+                **(meta or {}),
+            }))
+            os.rename(staging, entry)
+        except OSError:
+            # Another worker stored the same key first
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict()
+
+    def _entries(self) -> list:
+        """(last used, bytes only the cache holds, shared bytes, dir) per entry"""
+        entries = []
+        for entry in self.root.iterdir():
+            meta = entry / META_NAME
+            if entry.name.startswith(".") or not meta.exists():
+                continue
+            owned = shared = 0
+            for f in entry.iterdir():
+                if not f.is_file():
+                    continue
+                stat = f.stat()
+                if stat.st_nlink > 1:
+                    shared += stat.st_size
+                else:
+                    owned += stat.st_size
+            entries.append((meta.stat().st_mtime, owned, shared, entry))
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until the cache's own bytes fit the quota"""
+        entries = sorted(self._entries(), key=lambda e: e[0])
+        total = sum(owned for _, owned, _, _ in entries)
+        for _, owned, _, entry in entries:
+            if total <= self.quota_bytes:
+                break
+            if not owned:
+                continue  # evicting it would free nothing
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= owned
+            print(f"Evicted cached result {entry.name}")
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(entries),
+                "bytes": sum(owned for _, owned, _, _ in entries),
+                "sharedBytes": sum(shared for _, _, shared, _ in entries),
+                "quotaBytes": self.quota_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,162 @@
+# src/backend/sampling.py
+import os
+import cv2
+import numpy as np
+
+SAMPLING_MODE = os.environ.get("SERGEK_SAMPLING", "all")  # all | stride | motion
+SAMPLING_STRIDE = int(os.environ.get("SERGEK_SAMPLING_STRIDE", "3"))
+MOTION_THRESHOLD = float(os.environ.get("SERGEK_MOTION_THRESHOLD", "4.0"))
+MOTION_MAX_GAP = int(os.environ.get("SERGEK_MOTION_MAX_GAP", "15"))
+THUMBNAIL_SIZE = (64, 36)
+MATCH_IOU = 0.3
+
+
+class FrameSampler:
+    """Decides which frames go through the model
+
+    "all" runs every frame, "stride" every `stride`-th frame, and "motion"
+    skips a frame when a downscaled grayscale copy differs from the last
+    inferred frame by less than `motion_threshold` (mean absolute
+    difference, 0-255), forcing a frame through at least every `max_gap`.
+    The first frame is always inferred.
+    """
+
+    def __init__(self, mode: str = SAMPLING_MODE, stride: int = SAMPLING_STRIDE,
+                 motion_threshold: float = MOTION_THRESHOLD, max_gap: int = MOTION_MAX_GAP):
+        if mode not in ("all", "stride", "motion"):
+            raise ValueError(f"Unknown sampling mode: {mode}")
+        self.mode = mode
+        self.stride = max(1, stride)
+        self.motion_threshold = motion_threshold
+        self.max_gap = max(1, max_gap)
+        self.inferred = 0
+        self.skipped = 0
+        self._last_frame_number = None
+        self._last_thumbnail = None
+
+    def _thumbnail(self, frame):
+        small = cv2.resize(frame, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def should_infer(self, frame_number: int, frame) -> bool:
+        if self.mode == "all" or self._last_frame_number is None:
+            infer = True
+        elif self.mode == "stride":
+            infer = frame_number - self._last_frame_number >= self.stride
+        else:
+            thumbnail = self._thumbnail(frame)
+            changed = np.abs(thumbnail - self._last_thumbnail).mean() >= self.motion_threshold
+            infer = changed or frame_number - self._last_frame_number >= self.max_gap
+
+        if infer:
+            self.inferred += 1
+            self._last_frame_number = frame_number
+            if self.mode == "motion":
+                self._last_thumbnail = self._thumbnail(frame)
+        else:
+            self.skipped += 1
+        return infer
+
+    def stats(self) -> dict:
+        total = self.inferred + self.skipped
+        return {
+            "mode": self.mode,
+            "inferred": self.inferred,
+            "skipped": self.skipped,
+            "inferred_ratio": round(self.inferred / total, 4) if total else 0.0,
+        }
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (N, 4+) and (M, 4+) xyxy boxes"""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def interpolate_boxes(before: np.ndarray, after: np.ndarray, t: float) -> np.ndarray:
+    """Boxes at fraction `t` between two inferred frames
+
+    Boxes are matched greedily by IoU; matched pairs are linearly
+    interpolated and unmatched boxes from `before` are carried forward.
+    """
+    if len(before) == 0 or len(after) == 0:
+        return before.copy()
+    iou = box_iou(before, after)
+    result = before.copy()
+    used = np.zeros(len(after), dtype=bool)
+    for i in np.argsort(-iou.max(axis=1)):
+        candidates = np.where(used, -1.0, iou[i])
+        j = int(np.argmax(candidates))
+        if candidates[j] < MATCH_IOU:
+            continue
+        used[j] = True
+        result[i, :5] = (1 - t) * before[i, :5] + t * after[j, :5]
+    return result
+
+
+class SampledInference:
+    """Batched inference over sampled frames that still emits every frame
+
+    Wraps a BatchInference engine. Frames the sampler skips get the
+    detections of the previous inferred frame, or boxes interpolated
+    between the surrounding inferred frames when `interpolate` is set, so
+    downstream stages see a dense (frame_number, frame, boxes) stream in
+    the original order. `boxes` is an (N, 6) float array of
+    x1, y1, x2, y2, conf, class.
+    """
+
+    def __init__(self, engine, sampler: FrameSampler = None, interpolate: bool = True):
+        self.engine = engine
+        self.sampler = sampler or FrameSampler()
+        self.interpolate = interpolate
+        self._previous = None  # (frame_number, boxes) of the last inferred frame
+
+    def run(self, frames):
+        pending = []  # (frame_number, frame, inferred)
+        sampled = 0
+        for frame_number, frame in frames:
+            inferred = self.sampler.should_infer(frame_number, frame)
+            pending.append((frame_number, frame, inferred))
+            if inferred:
+                sampled += 1
+                if sampled == self.engine.batch_size:
+                    pending = yield from self._flush(pending)
+                    sampled = 0
+        yield from self._flush(pending, final=True)
+
+    def _flush(self, pending: list, final: bool = False):
+        keyframes = [(n, frame) for n, frame, inferred in pending if inferred]
+        results = self.engine.predict_boxes([frame for _, frame in keyframes])
+        boxes = {n: result for (n, _), result in zip(keyframes, results)}
+
+        # Skipped frames after the last keyframe wait for the next one
+        last_keyframe = max(
+            (i for i, (_, _, inferred) in enumerate(pending) if inferred), default=-1
+        )
+        ready = pending if final else pending[:last_keyframe + 1]
+        held = [] if final else pending[last_keyframe + 1:]
+
+        for index, (frame_number, frame, inferred) in enumerate(ready):
+            if inferred:
+                self._previous = (frame_number, boxes[frame_number])
+                yield frame_number, frame, boxes[frame_number]
+                continue
+            yield frame_number, frame, self._fill(frame_number, ready[index + 1:], boxes)
+        return held
+
+    def _fill(self, frame_number: int, upcoming: list, boxes: dict) -> np.ndarray:
+        if self._previous is None:
+            return np.zeros((0, 6), dtype=np.float32)
+        start, before = self._previous
+        following = next((n for n, _, inferred in upcoming if inferred), None)
+        if not self.interpolate or following is None:
+            return before.copy()
+        t = (frame_number - start) / (following - start)
+        return interpolate_boxes(before, boxes[following], t)
@@ -0,0 +1,90 @@
+# src/backend/sampling_report.py
+"""Accuracy vs throughput of the frame sampling modes on a labelled clip
+
+Labels use the predictions CSV layout (Frame, Bbox as "[[x1, y1, x2, y2]]"),
+one row per ground-truth box.
+
+Usage: python sampling_report.py <video_path> <labels_csv>
+"""
+import ast
+import sys
+import time
+import numpy as np
+import pandas as pd
+from model_registry import get_registry
+from batch_inference import BatchInference
+from decoding import open_decoder
+from sampling import FrameSampler, SampledInference, box_iou
+
+CONFIGS = [
+    {"mode": "all"},
+    {"mode": "stride", "stride": 2},
+    {"mode": "stride", "stride": 3},
+    {"mode": "stride", "stride": 5},
+    {"mode": "motion", "motion_threshold": 2.0},
+    {"mode": "motion", "motion_threshold": 4.0},
+    {"mode": "motion", "motion_threshold": 8.0},
+]
+MATCH_IOU = 0.5
+
+
+def load_labels(labels_csv: str) -> dict:
+    df = pd.read_csv(labels_csv)
+    labels = {}
+    for frame, bbox in zip(df["Frame"], df["Bbox"]):
+        labels.setdefault(int(frame), []).extend(ast.literal_eval(bbox))
+    return {frame: np.array(boxes, dtype=np.float32) for frame, boxes in labels.items()}
+
+
+def score(predicted: dict, labels: dict) -> dict:
+    """Box-level precision/recall at IoU >= MATCH_IOU over all frames"""
+    true_positives = false_positives = false_negatives = 0
+    for frame in set(predicted) | set(labels):
+        pred = predicted.get(frame, np.zeros((0, 6), dtype=np.float32))
+        gt = labels.get(frame, np.zeros((0, 4), dtype=np.float32))
+        if len(pred) and len(gt):
+            matched = (box_iou(pred, gt) >= MATCH_IOU).any(axis=0).sum()
+        else:
+            matched = 0
+        true_positives += matched
+        false_negatives += len(gt) - matched
+        false_positives += max(0, len(pred) - matched)
+    precision = true_positives / max(1, true_positives + false_positives)
+    recall = true_positives / max(1, true_positives + false_negatives)
+    return {"precision": round(precision, 4), "recall": round(recall, 4)}
+
+
+def run_config(model, video_path: str, config: dict) -> dict:
+    sampler = FrameSampler(**config)
+    inference = SampledInference(BatchInference(model, conf=0.3), sampler)
+    predicted = {}
+    start = time.perf_counter()
+    with open_decoder(video_path) as video:
+        for frame_number, _, boxes in inference.run(video.frames()):
+            predicted[frame_number] = boxes
+    elapsed = time.perf_counter() - start
+    return predicted, len(predicted) / elapsed, sampler.stats()
+
+
+def report(video_path: str, labels_csv: str):
+    labels = load_labels(labels_csv)
+    model = get_registry().get("accident")
+    rows = []
+    for config in CONFIGS:
+        predicted, fps, stats = run_config(model, video_path, config)
+        rows.append({
+            "config": " ".join(f"{k}={v}" for k, v in config.items()),
+            "fps": round(fps, 2),
+            "inferred_ratio": stats["inferred_ratio"],
+            **score(predicted, labels),
+        })
+    table = pd.DataFrame(rows)
+    print(table.to_string(index=False))
+    return table
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python sampling_report.py <video_path> <labels_csv>")
+        sys.exit(1)
+    report(sys.argv[1], sys.argv[2])
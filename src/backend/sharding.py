@@ -0,0 +1,201 @@
+# src/backend/sharding.py
+import multiprocessing as mp
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import cv2
+import numpy as np
+from predictions_store import predictions_path, save_predictions, load_predictions
+from tracking import track_events
+from profiling import merge_reports
+from keyframes import (TopKSelector, save_keyframes, read_keyframes, KEYFRAMES_SUFFIX,
+                       NMS_SECONDS)
+
+SHARD_WORKERS = int(os.environ.get("SERGEK_SHARD_WORKERS", "2"))
+# Comma-separated devices handed to workers round-robin, e.g. "cuda:0,cuda:1"
+SHARD_DEVICES = [d for d in os.environ.get("SERGEK_SHARD_DEVICES", "").split(",") if d]
+MIN_SEGMENT_FRAMES = 120
+
+
+def keyframe_numbers(input_path: str) -> list:
+    """1-based presentation frame numbers of the video's keyframes
+
+    Reads packet headers only (no decoding). Packets come in decode order,
+    so they are sorted by timestamp to get presentation order first.
+    """
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", str(input_path)],
+        capture_output=True, text=True, check=True
+    )
+    packets = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        try:
+            packets.append((float(pts_time), "K" in flags))
+        except ValueError:
+            continue
+    packets.sort()
+    return [index + 1 for index, (_, key) in enumerate(packets) if key]
+
+
+def plan_segments(total_frames: int, keyframes: list, workers: int) -> list:
+    """Split [1, total_frames] into up to `workers` keyframe-aligned segments
+
+    Each cut is moved to the keyframe nearest to an even split, so every
+    worker starts decoding at a keyframe. Returns inclusive (start, end)
+    frame ranges that cover the whole video without gaps or overlap.
+    `total_frames` is usually the container's estimate, so the last end is
+    only a bound for planning; process_video_sharded decodes that segment
+    to EOF.
+    """
+    workers = max(1, min(workers, total_frames // MIN_SEGMENT_FRAMES or 1))
+    candidates = np.array([k for k in keyframes if 1 < k <= total_frames], dtype=np.int64)
+    cuts = []
+    for i in range(1, workers):
+        if len(candidates) == 0:
+            break
+        target = 1 + i * total_frames / workers
+        cut = int(candidates[np.argmin(np.abs(candidates - target))])
+        if cut not in cuts and (not cuts or cut > cuts[-1]):
+            cuts.append(cut)
+    starts = [1] + cuts
+    ends = [c - 1 for c in cuts] + [total_frames]
+    return list(zip(starts, ends))
+
+
+def _init_shard_worker(counter, devices: list, threads: int):
+    """Pin the worker to one device and a fair share of CPU threads"""
+    import torch
+    from model_registry import get_registry
+    torch.set_num_threads(threads)
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    device = devices[index % len(devices)] if devices else None
+    get_registry(device).load_all()
+
+
+def _process_segment(input_path: str, segment_path: str, start_frame: int, end_frame: int,
+                     options: dict) -> dict:
+    from ml_processor import process_video
+    return process_video(input_path, segment_path, start_frame=start_frame, end_frame=end_frame,
+                         **options)
+
+
+def concat_segments(segment_paths: list, audio_source: str, output_path: str):
+    """Join encoded segments without re-encoding and add the source audio"""
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        for path in segment_paths:
+            escaped = str(Path(path).resolve()).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+        list_path = f.name
+    partial_path = str(output_path) + ".part"
+    try:
+        subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "error",
+             "-f", "concat", "-safe", "0", "-i", list_path,
+             "-i", str(audio_source),
+             "-map", "0:v:0", "-map", "1:a:0?",
+             "-c:v", "copy", "-c:a", "aac",
+             "-movflags", "+faststart", "-f", "mp4", partial_path],
+            check=True, capture_output=True
+        )
+        os.replace(partial_path, output_path)
+    finally:
+        os.remove(list_path)
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def merge_predictions(segment_paths: list, input_path: str, output_path: str) -> str:
+    """Concatenate per-segment predictions (absolute frame numbers) into one file
+
+    Events are tracked again over the merged detections, so an incident
+    that spans a segment boundary stays one event.
+    """
+    shards = [load_predictions(predictions_path(path)) for path in segment_paths]
+    detections = np.concatenate([d for d, _, _ in shards])
+    detections = detections[np.argsort(detections["frame"], kind="stable")]
+    fps = shards[0][1]
+    merged_path = predictions_path(output_path)
+    save_predictions(merged_path, detections, fps, input_path, track_events(detections))
+    return merged_path
+
+
+def merge_keyframes(segment_paths: list, output_path: str, k: int, window: int,
+                    fps: float) -> str:
+    """Re-select the top `k` key frames over every segment's picks"""
+    selector = TopKSelector(k, nms_window=window)
+    for path in segment_paths:
+        for entry in read_keyframes(predictions_path(path, KEYFRAMES_SUFFIX)):
+            selector.offer_keyframe(entry)
+    return save_keyframes(selector.results(), predictions_path(output_path, KEYFRAMES_SUFFIX), fps)
+
+
+def process_video_sharded(input_path: str, output_path: str, workers: int = SHARD_WORKERS,
+                          devices: list = None, **options):
+    """Process one long video in parallel keyframe-aligned segments
+
+    Segments are processed by separate worker processes (one per device
+    when `devices` lists several GPUs), then the annotated segments are
+    stream-copied into one video and the prediction shards merged into one
+    predictions file with the original frame numbering. `options` are
+    passed on to process_video; with annotate=False there are no segment
+    videos and only the predictions are merged.
+    Returns the run's profile: the segments' profiles merged, with
+    throughput over the whole wall time (profiling.merge_reports).
+    """
+    devices = devices if devices is not None else SHARD_DEVICES
+    start = time.perf_counter()
+    video = cv2.VideoCapture(input_path)
+    if not video.isOpened():
+        raise Exception("Error opening video file")
+    total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = video.get(cv2.CAP_PROP_FPS)
+    video.release()
+
+    segments = plan_segments(total_frames, keyframe_numbers(input_path), workers)
+    if len(segments) == 1:
+        from ml_processor import process_video
+        return process_video(input_path, output_path, **options)
+
+    print(f"Processing {input_path} in {len(segments)} segments: {segments}")
+    work_dir = tempfile.mkdtemp(prefix="segments_", dir=os.path.dirname(os.path.abspath(output_path)))
+    segment_paths = [os.path.join(work_dir, f"segment_{i:03d}.mp4") for i in range(len(segments))]
+    threads = max(1, (os.cpu_count() or 1) // len(segments))
+    ctx = mp.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(
+            max_workers=len(segments),
+            mp_context=ctx,
+            initializer=_init_shard_worker,
+            initargs=(ctx.Value("i", 0), devices, threads)
+        ) as pool:
+            # The frame count can be short (VFR, bad indexes), so the last
+            # segment runs to EOF like an unsharded run would
+            ends = [end for _, end in segments[:-1]] + [None]
+            futures = [
+                pool.submit(_process_segment, input_path, path, first, end, options)
+                for path, (first, _), end in zip(segment_paths, segments, ends)
+            ]
+            reports = [future.result() for future in futures]
+
+        annotate = options.get("annotate", True)
+        if annotate:
+            concat_segments(segment_paths, input_path, output_path)
+        merged = merge_predictions(segment_paths, input_path, output_path)
+        if options.get("keyframes"):
+            window = options.get("keyframe_window")
+            window = window if window is not None else int(NMS_SECONDS * fps)
+            merge_keyframes(segment_paths, output_path, options["keyframes"], window, fps)
+        if annotate:
+            print(f"Video saved at: {output_path}")
+        print(f"Predictions saved at: {merged}")
+        return merge_reports(reports, time.perf_counter() - start)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,90 @@
+import pytest
+from batch_inference import BatchInference
+from pipeline import StageTimings
+
+
+class FakeResult:
+    def __init__(self, frame):
+        self.frame = frame
+        self.speed = {"preprocess": 1.0, "inference": 2.0, "postprocess": 0.5}
+
+    def cpu(self):
+        return self
+
+
+class FakeModel:
+    """Stands in for an ultralytics YOLO: one result per input frame, in order"""
+
+    device = "cpu"
+
+    def __init__(self, fixed_batch: int = None):
+        self.fixed_batch = fixed_batch
+        self.batches = []
+
+    def predict(self, frames, **kwargs):
+        if self.fixed_batch:
+            assert len(frames) == self.fixed_batch
+        self.batches.append(list(frames))
+        return [FakeResult(frame) for frame in frames]
+
+
+def numbered(count: int) -> list:
+    return [(number, f"frame-{number}") for number in range(1, count + 1)]
+
+
+@pytest.mark.parametrize("count", [0, 1, 3, 4, 10])
+def test_run_keeps_frame_order_and_pairs_results(count):
+    engine = BatchInference(FakeModel(), batch_size=4)
+
+    out = list(engine.run(iter(numbered(count))))
+
+    assert [(number, frame) for number, frame, _ in out] == numbered(count)
+    assert all(result.frame == frame for _, frame, result in out)
+
+
+def test_run_batches_frames_and_flushes_the_remainder():
+    model = FakeModel()
+    engine = BatchInference(model, batch_size=4)
+
+    list(engine.run(numbered(10)))
+
+    assert [len(batch) for batch in model.batches] == [4, 4, 2]
+
+
+def test_fixed_batch_exports_get_padded_batches_with_results_dropped():
+    model = FakeModel(fixed_batch=4)
+    engine = BatchInference(model)
+    frames = [frame for _, frame in numbered(6)]
+
+    results = engine.predict(frames)
+
+    assert engine.batch_size == 4
+    assert [result.frame for result in results] == frames
+    assert model.batches == [frames[:4], frames[4:] + [frames[-1]] * 2]
+
+
+def test_fixed_batch_splits_larger_batches():
+    model = FakeModel(fixed_batch=4)
+    engine = BatchInference(model, batch_size=10)
+
+    out = list(engine.run(numbered(10)))
+
+    assert [number for number, _, _ in out] == list(range(1, 11))
+    assert [len(batch) for batch in model.batches] == [4, 4, 4]
+
+
+def test_empty_predict_does_not_call_the_model():
+    model = FakeModel()
+
+    assert BatchInference(model, batch_size=4).predict([]) == []
+    assert model.batches == []
+
+
+def test_stage_times_come_from_the_real_results_only():
+    timings = StageTimings()
+    engine = BatchInference(FakeModel(fixed_batch=4), timings=timings)
+
+    engine.predict([frame for _, frame in numbered(6)])
+
+    # Six frames at 2 ms each, not eight with the padding
+    assert timings.seconds("inference") == pytest.approx(0.012)
@@ -0,0 +1,19 @@
+import pytest
+from encoder import frame_rate
+
+
+@pytest.mark.parametrize("fps, expected", [
+    (30000 / 1001, "30000/1001"),
+    (29.97002997, "30000/1001"),  # as reported by OpenCV
+    (24000 / 1001, "24000/1001"),
+    (60000 / 1001, "60000/1001"),
+    (25.0, "25/1"),
+    (12.5, "25/2"),
+])
+def test_frame_rate_keeps_fractional_rates(fps, expected):
+    assert frame_rate(fps) == expected
+
+
+@pytest.mark.parametrize("fps", [0, 0.0, None, -1])
+def test_unknown_frame_rates_fall_back_to_30(fps):
+    assert frame_rate(fps) == "30"
@@ -0,0 +1,112 @@
+import numpy as np
+from keyframes import TopKSelector
+
+
+def box(conf: float, x1: float = 10, cls: int = 0) -> np.ndarray:
+    return np.array([[x1, 10, x1 + 20, 30, conf, cls]], dtype=np.float32)
+
+
+def frame(height: int = 100, width: int = 100) -> np.ndarray:
+    return np.arange(height * width * 3, dtype=np.uint32).astype(np.uint8).reshape(height, width, 3)
+
+
+def picks(selector: TopKSelector) -> list:
+    return [(entry["frame"], entry["conf"]) for entry in selector.results()]
+
+
+def test_keeps_the_k_most_confident_highest_first():
+    selector = TopKSelector(k=3, store_crops=False)
+    for frame_number, conf in enumerate([0.2, 0.9, 0.5, 0.7, 0.1, 0.8], 1):
+        selector.offer(frame_number, None, box(conf))
+
+    assert picks(selector) == [(2, 0.9), (6, 0.8), (4, 0.7)]
+
+
+def test_memory_stays_bounded_by_k():
+    selector = TopKSelector(k=5, store_crops=False)
+    rng = np.random.default_rng(0)
+    for frame_number in range(1, 1001):
+        selector.offer(frame_number, None, box(float(rng.random())))
+        assert len(selector._heap) <= 5
+
+    confs = [conf for _, conf in picks(selector)]
+    assert confs == sorted(confs, reverse=True)
+
+
+def test_every_box_of_a_frame_is_considered():
+    selector = TopKSelector(k=2, store_crops=False)
+    boxes = np.concatenate([box(0.3), box(0.9, x1=50), box(0.6, x1=70)])
+    selector.offer(7, None, boxes)
+
+    assert [entry["box"][0] for entry in selector.results()] == [50.0, 70.0]
+
+
+def test_min_conf_drops_weak_detections():
+    selector = TopKSelector(k=5, min_conf=0.5, store_crops=False)
+    selector.offer(1, None, box(0.4))
+    selector.offer(2, None, box(0.6))
+
+    assert picks(selector) == [(2, 0.6)]
+
+
+def test_ties_keep_the_earlier_detection():
+    selector = TopKSelector(k=1, store_crops=False)
+    selector.offer(1, None, box(0.5))
+    selector.offer(2, None, box(0.5))
+
+    assert picks(selector) == [(1, 0.5)]
+
+
+def test_nms_window_suppresses_weaker_neighbours():
+    selector = TopKSelector(k=5, nms_window=10, store_crops=False)
+    selector.offer(100, None, box(0.9))
+    selector.offer(105, None, box(0.8))  # too close to a stronger pick
+    selector.offer(111, None, box(0.7))  # far enough
+
+    assert picks(selector) == [(100, 0.9), (111, 0.7)]
+
+
+def test_nms_window_lets_a_stronger_detection_replace_close_picks():
+    selector = TopKSelector(k=5, nms_window=10, store_crops=False)
+    selector.offer(100, None, box(0.6))
+    selector.offer(108, None, box(0.5))
+    selector.offer(104, None, box(0.9))
+
+    assert picks(selector) == [(104, 0.9)]
+
+
+def test_crops_are_padded_copies_of_the_box_region():
+    image = frame()
+    selector = TopKSelector(k=1, padding=0.1)
+    selector.offer(1, image, box(0.9))
+
+    crop = selector.results()[0]["crop"]
+    # 20x20 box padded by 2 px on each side
+    assert crop.shape == (24, 24, 3)
+    np.testing.assert_array_equal(crop, image[8:32, 8:32])
+    assert not np.shares_memory(crop, image)
+
+
+def test_index_only_selection_keeps_no_pixels():
+    selector = TopKSelector(k=1, store_crops=False)
+    selector.offer(3, frame(), box(0.9, cls=2))
+
+    entry = selector.results()[0]
+    assert entry["crop"] is None
+    assert entry == {"frame": 3, "conf": 0.9, "cls": 2, "box": [10.0, 10.0, 30.0, 30.0],
+                     "crop": None}
+
+
+def test_offer_keyframe_merges_selections():
+    first, second = TopKSelector(k=2), TopKSelector(k=2)
+    first.offer(1, frame(), box(0.9))
+    first.offer(2, frame(), box(0.4))
+    second.offer(50, frame(), box(0.7))
+    second.offer(60, frame(), box(0.8))
+
+    merged = TopKSelector(k=2)
+    for entry in first.results() + second.results():
+        merged.offer_keyframe(entry)
+
+    assert picks(merged) == [(1, 0.9), (60, 0.8)]
+    assert all(entry["crop"] is not None for entry in merged.results())
@@ -0,0 +1,65 @@
+from pathlib import Path
+import numpy as np
+import pytest
+from detections import DETECTION_DTYPE
+from predictions_cache import CachedPredictions
+
+
+def cached(frames: list) -> CachedPredictions:
+    detections = np.zeros(len(frames), dtype=DETECTION_DTYPE)
+    detections["frame"] = frames
+    # x1 numbers the rows in their stored order
+    detections["x1"] = np.arange(len(frames))
+    return CachedPredictions(Path("predictions.npz"), detections, 30.0, "video.mp4", 1)
+
+
+@pytest.fixture
+def predictions() -> CachedPredictions:
+    # Frames 1, 2, 2, 5, 5, 5, 9; nothing on 3, 4, 6-8
+    return cached([1, 2, 2, 5, 5, 5, 9])
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    (None, None, [1, 2, 2, 5, 5, 5, 9]),
+    (2, 5, [2, 2, 5, 5, 5]),  # both bounds inclusive
+    (5, 5, [5, 5, 5]),
+    (3, 4, []),  # between detected frames
+    (3, 8, [5, 5, 5]),
+    (None, 2, [1, 2, 2]),
+    (6, None, [9]),
+    (0, 100, [1, 2, 2, 5, 5, 5, 9]),
+    (10, 20, []),
+    (5, 2, []),  # inverted window
+])
+def test_window_selects_frames_inclusively(predictions, start, end, expected):
+    assert predictions.window(start, end)["frame"].tolist() == expected
+
+
+def test_window_returns_a_view_without_copying(predictions):
+    window = predictions.window(2, 5)
+
+    assert np.shares_memory(window, predictions.detections)
+    assert window.dtype == DETECTION_DTYPE
+
+
+def test_unsorted_detections_are_sorted_stably():
+    predictions = cached([5, 1, 5, 2, 1])
+
+    window = predictions.window(1, 5)
+
+    assert window["frame"].tolist() == [1, 1, 2, 5, 5]
+    # Rows of one frame keep their stored order
+    assert window["x1"].tolist() == [1, 4, 3, 0, 2]
+
+
+def test_empty_predictions_give_empty_windows():
+    predictions = cached([])
+
+    assert len(predictions.window()) == 0
+    assert len(predictions.window(1, 10)) == 0
+
+
+def test_etag_depends_on_the_window(predictions):
+    assert predictions.etag() != predictions.etag(1, 5)
+    assert predictions.etag(1, 5) != predictions.etag(1, 6)
+    assert predictions.etag(1, 5) == predictions.etag(1, 5)
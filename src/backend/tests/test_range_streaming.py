@@ -0,0 +1,46 @@
+import pytest
+from fastapi import HTTPException
+from range_streaming import parse_range
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-499", (0, 499)),
+    ("bytes=500-", (500, 999)),
+    ("bytes=0-0", (0, 0)),
+    ("bytes=900-5000", (900, 999)),  # end clamped to the file
+    ("bytes=-200", (800, 999)),
+    ("bytes=-5000", (0, 999)),  # suffix longer than the file
+    ("BYTES = 10-20", (10, 20)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header", [
+    None,
+    "",
+    "items=0-10",  # other units
+    "bytes=0-10,20-30",  # several ranges are answered with the whole file
+    "bytes=10",
+    "bytes=abc-",
+    "bytes=500-100",
+    "bytes=--5",
+])
+def test_ignored_ranges(header):
+    assert parse_range(header, SIZE) is None
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", SIZE),
+    ("bytes=5000-6000", SIZE),
+    ("bytes=-0", SIZE),
+    ("bytes=0-", 0),
+    ("bytes=-10", 0),
+])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(HTTPException) as excinfo:
+        parse_range(header, size)
+    assert excinfo.value.status_code == 416
+    assert excinfo.value.headers["Content-Range"] == f"bytes */{size}"
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from sampling import interpolate_boxes
+
+
+def boxes(*rows) -> np.ndarray:
+    return np.array(rows, dtype=np.float32).reshape(-1, 6)
+
+
+def test_matched_boxes_are_interpolated_linearly():
+    before = boxes([0, 0, 100, 100, 0.5, 0])
+    after = boxes([10, 20, 110, 120, 0.9, 0])
+
+    result = interpolate_boxes(before, after, 0.25)
+
+    np.testing.assert_allclose(result, boxes([2.5, 5, 102.5, 105, 0.6, 0]), rtol=1e-6)
+
+
+@pytest.mark.parametrize("t", [0.0, 1.0])
+def test_endpoints_reproduce_the_inferred_frames(t):
+    before = boxes([0, 0, 100, 100, 0.5, 0])
+    after = boxes([10, 0, 110, 100, 0.7, 0])
+
+    result = interpolate_boxes(before, after, t)
+
+    np.testing.assert_allclose(result, before if t == 0 else after, rtol=1e-6)
+
+
+def test_class_is_kept_from_before():
+    before = boxes([0, 0, 100, 100, 0.5, 1])
+    after = boxes([0, 0, 100, 100, 0.5, 2])
+
+    assert interpolate_boxes(before, after, 0.9)[0, 5] == 1
+
+
+def test_boxes_pair_with_their_best_overlap_not_their_position():
+    before = boxes([0, 0, 100, 100, 0.5, 0], [500, 500, 600, 600, 0.5, 0])
+    after = boxes([510, 500, 610, 600, 0.5, 0], [10, 0, 110, 100, 0.5, 0])
+
+    result = interpolate_boxes(before, after, 0.5)
+
+    np.testing.assert_allclose(result[:, 0], [5, 505])
+
+
+def test_unmatched_boxes_are_carried_forward():
+    before = boxes([0, 0, 100, 100, 0.5, 0], [500, 500, 600, 600, 0.8, 0])
+    # Overlaps the first box only; the second has nothing to move towards
+    after = boxes([20, 0, 120, 100, 0.5, 0])
+
+    result = interpolate_boxes(before, after, 0.5)
+
+    assert result[0, 0] == pytest.approx(10)
+    np.testing.assert_array_equal(result[1], before[1])
+
+
+def test_each_after_box_is_matched_once():
+    before = boxes([0, 0, 100, 100, 0.9, 0], [5, 0, 105, 100, 0.5, 0])
+    after = boxes([2, 0, 102, 100, 0.9, 0])
+
+    result = interpolate_boxes(before, after, 0.5)
+
+    # The better-overlapping box takes the match, the other is carried forward
+    assert result[0, 0] == pytest.approx(1)
+    np.testing.assert_array_equal(result[1], before[1])
+
+
+@pytest.mark.parametrize("before, after", [
+    (boxes(), boxes([0, 0, 10, 10, 0.5, 0])),
+    (boxes([0, 0, 10, 10, 0.5, 0]), boxes()),
+])
+def test_empty_sides_return_a_copy_of_before(before, after):
+    result = interpolate_boxes(before, after, 0.5)
+
+    np.testing.assert_array_equal(result, before)
+    assert result is not before
+
+
+def test_inputs_are_not_modified():
+    before = boxes([0, 0, 100, 100, 0.5, 0])
+    after = boxes([10, 0, 110, 100, 0.7, 0])
+    original = before.copy()
+
+    interpolate_boxes(before, after, 0.5)
+
+    np.testing.assert_array_equal(before, original)
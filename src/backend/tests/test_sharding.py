@@ -0,0 +1,57 @@
+import pytest
+from sharding import plan_segments, MIN_SEGMENT_FRAMES
+
+
+def assert_covers(segments, total_frames):
+    assert segments[0][0] == 1
+    assert segments[-1][1] == total_frames
+    for (_, end), (next_start, _) in zip(segments, segments[1:]):
+        assert next_start == end + 1
+    assert all(start <= end for start, end in segments)
+
+
+def test_regular_keyframes_give_even_segments():
+    keyframes = list(range(1, 1201, 30))
+    segments = plan_segments(1200, keyframes, workers=4)
+
+    assert segments == [(1, 300), (301, 600), (601, 900), (901, 1200)]
+
+
+def test_cuts_snap_to_the_nearest_keyframe():
+    segments = plan_segments(1000, [1, 480, 700], workers=2)
+
+    assert segments == [(1, 479), (480, 1000)]
+
+
+def test_sparse_keyframes_give_fewer_segments():
+    # Every target snaps to the same keyframe, which is only cut once
+    segments = plan_segments(1000, [1, 500], workers=4)
+
+    assert segments == [(1, 499), (500, 1000)]
+
+
+def test_without_keyframes_the_video_is_one_segment():
+    assert plan_segments(1000, [], workers=4) == [(1, 1000)]
+
+
+def test_short_videos_are_not_split():
+    keyframes = list(range(1, 200, 10))
+
+    assert plan_segments(MIN_SEGMENT_FRAMES * 2 - 1, keyframes, workers=4) \
+        == [(1, MIN_SEGMENT_FRAMES * 2 - 1)]
+
+
+def test_keyframes_outside_the_video_are_ignored():
+    segments = plan_segments(600, [1, 300, 900, 1200], workers=2)
+
+    assert segments == [(1, 299), (300, 600)]
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3, 5, 8])
+def test_segments_cover_the_video_without_gaps(workers):
+    keyframes = [1, 37, 250, 251, 400, 777, 1010, 1500, 1999]
+    segments = plan_segments(2000, keyframes, workers)
+
+    assert 1 <= len(segments) <= workers
+    assert_covers(segments, 2000)
+    assert all(start in keyframes for start, _ in segments)
@@ -0,0 +1,96 @@
+import numpy as np
+from detections import DETECTION_DTYPE
+from tracking import EventTracker, track_events
+
+
+def box(x1: float, conf: float = 0.5, cls: int = 0, y1: float = 100, size: float = 50):
+    return [x1, y1, x1 + size, y1 + size, conf, cls]
+
+
+def run(tracker: EventTracker, frames: dict) -> np.ndarray:
+    """Feed {frame: [box, ...]} in frame order; missing frames get no boxes"""
+    for frame in range(1, max(frames) + 1):
+        tracker.update(frame, np.array(frames.get(frame, []), dtype=np.float32).reshape(-1, 6))
+    return tracker.finish()
+
+
+def test_a_moving_box_becomes_one_event():
+    confs = [0.4, 0.6, 0.9, 0.7, 0.5, 0.4]
+    frames = {i + 1: [box(100 + 5 * i, conf)] for i, conf in enumerate(confs)}
+
+    events = run(EventTracker(min_hits=3), frames)
+
+    assert len(events) == 1
+    event = events[0]
+    assert (event["event"], event["start_frame"], event["end_frame"]) == (1, 1, 6)
+    assert event["detections"] == 6
+    assert event["peak_frame"] == 3
+    assert event["peak_conf"] == np.float32(0.9)
+    np.testing.assert_allclose([event[c] for c in ("x1", "y1", "x2", "y2")], [110, 100, 160, 150])
+
+
+def test_separate_objects_become_separate_events_by_start_frame():
+    frames = {f: [box(800 + 3 * f)] for f in range(1, 8)}
+    for f in range(3, 10):
+        frames.setdefault(f, []).append(box(100 + 3 * f))
+
+    events = run(EventTracker(min_hits=3), frames)
+
+    assert events["start_frame"].tolist() == [1, 3]
+    assert events["end_frame"].tolist() == [7, 9]
+    assert events["event"].tolist() == [1, 2]
+
+
+def test_short_tracks_are_noise():
+    frames = {1: [box(100)], 2: [box(102)], 10: [box(500)], 11: [box(502)], 12: [box(504)]}
+
+    events = run(EventTracker(min_hits=3, max_age=2), frames)
+
+    assert events["start_frame"].tolist() == [10]
+
+
+def test_tracks_coast_over_gaps_up_to_max_age():
+    frames = {1: [box(100)], 2: [box(104)], 3: [box(108)], 8: [box(128)], 9: [box(132)]}
+
+    events = run(EventTracker(min_hits=3, max_age=5), frames)
+
+    assert len(events) == 1
+    assert (events[0]["start_frame"], events[0]["end_frame"]) == (1, 9)
+    assert events[0]["detections"] == 5
+
+
+def test_longer_gaps_start_a_new_event():
+    frames = {f: [box(100)] for f in (1, 2, 3, 10, 11, 12)}
+
+    events = run(EventTracker(min_hits=3, max_age=5), frames)
+
+    assert events["start_frame"].tolist() == [1, 10]
+    assert events["end_frame"].tolist() == [3, 12]
+
+
+def test_boxes_of_other_classes_are_not_linked():
+    frames = {f: [box(100, cls=0), box(100, cls=1)] for f in range(1, 5)}
+
+    events = run(EventTracker(min_hits=3), frames)
+
+    assert sorted(events["cls"].tolist()) == [0, 1]
+    assert events["detections"].tolist() == [4, 4]
+
+
+def test_no_detections_give_no_events():
+    events = EventTracker().finish()
+
+    assert len(events) == 0
+
+
+def test_track_events_over_stored_records():
+    records = np.zeros(6, dtype=DETECTION_DTYPE)
+    # Stored out of frame order, with the legacy CSV's missing confidences
+    for i, frame in enumerate([3, 1, 2, 4, 5, 6]):
+        records[i] = (frame, 100 + frame, 100, 150 + frame, 150, np.nan, 0)
+
+    events = track_events(records, min_hits=3)
+
+    assert len(events) == 1
+    assert (events[0]["start_frame"], events[0]["end_frame"]) == (1, 6)
+    assert events[0]["peak_conf"] == 0.0
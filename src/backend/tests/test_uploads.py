@@ -0,0 +1,178 @@
+import hashlib
+import anyio
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from uploads import UploadSessions, read_upload_form
+
+DATA = bytes(range(256)) * 40
+
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+
+def append(sessions: UploadSessions, upload_id: str, offset: int, *parts) -> dict:
+    return anyio.run(sessions.append, upload_id, offset, chunks(*parts))
+
+
+def status_code(call, *args) -> int:
+    with pytest.raises(HTTPException) as excinfo:
+        call(*args)
+    return excinfo.value.status_code
+
+
+@pytest.fixture
+def sessions(tmp_path) -> UploadSessions:
+    return UploadSessions(tmp_path / "sessions", limit=len(DATA) * 2)
+
+
+def test_chunks_are_assembled_and_hashed(sessions, tmp_path):
+    upload_id = sessions.create("clips/video.mp4", "video/mp4", len(DATA))["uploadId"]
+    append(sessions, upload_id, 0, DATA[:1000], DATA[1000:3000])
+    assert sessions.status(upload_id)["received"] == 3000
+    append(sessions, upload_id, 3000, DATA[3000:])
+
+    dest = tmp_path / "video.mp4"
+    manifest = anyio.run(sessions.finalize, upload_id, dest, hashlib.sha256(DATA).hexdigest())
+
+    assert dest.read_bytes() == DATA
+    assert manifest["filename"] == "video.mp4"
+    assert manifest["size"] == len(DATA)
+    assert manifest["sha256"] == hashlib.sha256(DATA).hexdigest()
+    assert not (sessions.root / upload_id).exists()
+
+
+def test_offsets_must_match_the_bytes_received(sessions):
+    upload_id = sessions.create("video.mp4", "video/mp4")["uploadId"]
+    append(sessions, upload_id, 0, DATA[:100])
+
+    assert status_code(append, sessions, upload_id, 50, DATA[50:100]) == 409
+    assert status_code(append, sessions, upload_id, 200, DATA[200:300]) == 409
+    assert sessions.status(upload_id)["received"] == 100
+
+
+def test_uploads_resume_after_a_restart(sessions, tmp_path):
+    upload_id = sessions.create("video.mp4", "video/mp4", len(DATA))["uploadId"]
+    append(sessions, upload_id, 0, DATA[:5000])
+
+    # A new instance has no running hash and rebuilds it from disk
+    restarted = UploadSessions(sessions.root)
+    assert restarted.status(upload_id)["received"] == 5000
+    append(restarted, upload_id, 5000, DATA[5000:])
+    manifest = anyio.run(restarted.finalize, upload_id, tmp_path / "video.mp4")
+
+    assert manifest["sha256"] == hashlib.sha256(DATA).hexdigest()
+
+
+def test_a_failed_chunk_is_dropped_so_it_can_be_retried(sessions, tmp_path):
+    upload_id = sessions.create("video.mp4", "video/mp4", 2000)["uploadId"]
+    append(sessions, upload_id, 0, DATA[:1000])
+
+    # More than the declared size
+    assert status_code(append, sessions, upload_id, 1000, DATA[1000:2500]) == 413
+    assert sessions.status(upload_id)["received"] == 1000
+    assert (sessions.root / upload_id / "data.part").stat().st_size == 1000
+
+    append(sessions, upload_id, 1000, DATA[1000:2000])
+    manifest = anyio.run(sessions.finalize, upload_id, tmp_path / "video.mp4")
+    assert manifest["sha256"] == hashlib.sha256(DATA[:2000]).hexdigest()
+
+
+def test_finalize_checks_size_and_hash(sessions, tmp_path):
+    upload_id = sessions.create("video.mp4", "video/mp4", 200)["uploadId"]
+    append(sessions, upload_id, 0, DATA[:100])
+    dest = tmp_path / "video.mp4"
+
+    assert status_code(anyio.run, sessions.finalize, upload_id, dest) == 409
+    append(sessions, upload_id, 100, DATA[100:200])
+    assert status_code(anyio.run, sessions.finalize, upload_id, dest, "0" * 64) == 422
+    assert not dest.exists()
+
+    manifest = anyio.run(sessions.finalize, upload_id, dest, hashlib.sha256(DATA[:200]).hexdigest())
+    assert manifest["size"] == 200
+
+
+def test_oversized_uploads_are_refused_up_front(sessions):
+    assert status_code(sessions.create, "video.mp4", "video/mp4", sessions.limit + 1) == 413
+
+
+def test_unknown_and_malformed_ids_are_not_found(sessions):
+    assert status_code(sessions.status, "00000000-0000-0000-0000-000000000000") == 404
+    assert status_code(sessions.status, "../etc") == 404
+
+
+def test_abort_removes_the_session(sessions):
+    upload_id = sessions.create("video.mp4", "video/mp4")["uploadId"]
+    append(sessions, upload_id, 0, DATA[:100])
+
+    sessions.abort(upload_id)
+
+    assert not (sessions.root / upload_id).exists()
+    assert status_code(sessions.status, upload_id) == 404
+    assert status_code(sessions.abort, upload_id) == 404
+
+
+@pytest.fixture
+def form_client():
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        form = await read_upload_form(request, limit=len(DATA))
+        try:
+            file = form["file"]
+            return {"filename": file.filename, "size": len(await file.read())}
+        finally:
+            await form.close()
+
+    return TestClient(app)
+
+
+def multipart_body(data: bytes, boundary: str = "sergek") -> tuple:
+    body = (f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="video.mp4"\r\n'
+            "Content-Type: video/mp4\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def test_form_uploads_within_the_limit_are_parsed(form_client):
+    body, headers = multipart_body(DATA)
+
+    response = form_client.post("/upload", content=body, headers=headers)
+
+    assert response.json() == {"filename": "video.mp4", "size": len(DATA)}
+
+
+def test_oversized_content_length_is_refused_before_reading(form_client):
+    read = []
+
+    def body():
+        read.append(True)
+        yield b"x"
+
+    headers = {"Content-Type": "multipart/form-data; boundary=sergek",
+               "Content-Length": str(len(DATA) * 100)}
+    response = form_client.post("/upload", content=body(), headers=headers)
+
+    assert response.status_code == 413
+    assert not read
+
+
+def test_oversized_chunked_bodies_are_cut_off_while_streaming(form_client):
+    body, headers = multipart_body(DATA * 100)
+
+    def chunked():
+        for start in range(0, len(body), 4096):
+            yield body[start:start + 4096]
+
+    response = form_client.post("/upload", content=chunked(), headers=headers)
+
+    assert response.status_code == 413
+
+
+def test_non_multipart_bodies_are_rejected(form_client):
+    response = form_client.post("/upload", content=b"{}", headers={"Content-Type": "application/json"})
+
+    assert response.status_code == 400
@@ -0,0 +1,183 @@
+# src/backend/tracking.py
+import os
+import numpy as np
+from sampling import box_iou
+
+TRACK_IOU = float(os.environ.get("SERGEK_TRACK_IOU", "0.2"))
+# Frames a track may go undetected before its event is closed
+TRACK_MAX_AGE = int(os.environ.get("SERGEK_TRACK_MAX_AGE", "15"))
+# Tracks with fewer detections are treated as noise, not events
+TRACK_MIN_HITS = int(os.environ.get("SERGEK_TRACK_MIN_HITS", "3"))
+
+EVENT_DTYPE = np.dtype([
+    ("event", "<i4"),
+    ("start_frame", "<i4"),
+    ("end_frame", "<i4"),
+    ("peak_frame", "<i4"),
+    ("peak_conf", "<f4"),
+    ("x1", "<f4"),
+    ("y1", "<f4"),
+    ("x2", "<f4"),
+    ("y2", "<f4"),
+    ("cls", "<i2"),
+    ("detections", "<i4"),
+])
+
+
+def _to_state(box) -> np.ndarray:
+    x1, y1, x2, y2 = box[:4]
+    return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], dtype=np.float64)
+
+
+def _to_box(state) -> np.ndarray:
+    cx, cy, w, h = state[:4]
+    w, h = max(w, 1.0), max(h, 1.0)
+    return np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], dtype=np.float32)
+
+
+class KalmanBoxFilter:
+    """Constant-velocity Kalman filter over box centre and size
+
+    State is (cx, cy, w, h) and their per-frame velocities. predict()
+    can step several frames at once, so tracks coast over sampled-out or
+    missed frames.
+    """
+
+    def __init__(self, box):
+        self.x = np.zeros(8)
+        self.x[:4] = _to_state(box)
+        scale = max(self.x[2], self.x[3], 1.0)
+        self.P = np.diag([1, 1, 1, 1, 10, 10, 10, 10]) * scale
+        self.R = np.eye(4) * (0.05 * scale) ** 2
+        self.q = (0.01 * scale) ** 2
+        self.H = np.eye(4, 8)
+
+    def predict(self, steps: int = 1) -> np.ndarray:
+        F = np.eye(8)
+        F[:4, 4:] = np.eye(4) * steps
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + np.eye(8) * self.q * steps
+        return _to_box(self.x)
+
+    def update(self, box):
+        y = _to_state(box) - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(8) - K @ self.H) @ self.P
+
+
+class _Track:
+    def __init__(self, frame: int, box):
+        self.filter = KalmanBoxFilter(box)
+        self.frame = frame  # frame the filter state refers to
+        self.start_frame = self.end_frame = self.peak_frame = frame
+        self.peak_conf = float(box[4])
+        self.peak_box = np.asarray(box[:4], dtype=np.float32)
+        self.cls = int(box[5])
+        self.hits = 1
+
+    def predict(self, frame: int) -> np.ndarray:
+        box = self.filter.predict(frame - self.frame)
+        self.frame = frame
+        return box
+
+    def update(self, frame: int, box):
+        self.filter.update(box)
+        self.end_frame = frame
+        self.hits += 1
+        if float(box[4]) > self.peak_conf:
+            self.peak_conf = float(box[4])
+            self.peak_frame = frame
+            self.peak_box = np.asarray(box[:4], dtype=np.float32)
+
+
+class EventTracker:
+    """Links per-frame boxes into tracks and reports each track as an event
+
+    Every frame, live tracks are predicted forward with their Kalman
+    filter and matched greedily to the frame's boxes of the same class by
+    IoU. Unmatched boxes start tracks; tracks unmatched for more than
+    `max_age` frames end. A finished track with at least `min_hits`
+    detections becomes one EVENT_DTYPE record: first/last frame, peak
+    confidence with its frame and box as the representative bbox.
+    Frames must be fed in increasing order.
+    """
+
+    def __init__(self, iou_threshold: float = TRACK_IOU, max_age: int = TRACK_MAX_AGE,
+                 min_hits: int = TRACK_MIN_HITS):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self._tracks = []
+        self._finished = []
+
+    def update(self, frame: int, boxes: np.ndarray):
+        for track in [t for t in self._tracks if frame - t.end_frame > self.max_age]:
+            self._close(track)
+
+        unmatched = list(range(len(boxes)))
+        if self._tracks and len(boxes):
+            predicted = np.stack([track.predict(frame) for track in self._tracks])
+            iou = box_iou(predicted, boxes)
+            same_class = np.array([t.cls for t in self._tracks])[:, None] == boxes[None, :, 5].astype(int)
+            iou[~same_class] = 0
+            while iou.size and iou.max() >= self.iou_threshold:
+                t, b = np.unravel_index(np.argmax(iou), iou.shape)
+                self._tracks[t].update(frame, boxes[b])
+                unmatched.remove(b)
+                iou[t, :] = 0
+                iou[:, b] = 0
+        for b in unmatched:
+            self._tracks.append(_Track(frame, boxes[b]))
+
+    def _close(self, track: _Track):
+        self._tracks.remove(track)
+        if track.hits >= self.min_hits:
+            self._finished.append(track)
+
+    def finish(self) -> np.ndarray:
+        """Close every live track and return all events, ordered by start frame"""
+        for track in list(self._tracks):
+            self._close(track)
+        tracks = sorted(self._finished, key=lambda t: (t.start_frame, t.peak_frame))
+        events = np.zeros(len(tracks), dtype=EVENT_DTYPE)
+        for i, track in enumerate(tracks):
+            events[i] = (i + 1, track.start_frame, track.end_frame, track.peak_frame,
+                         track.peak_conf, *track.peak_box.tolist(), track.cls, track.hits)
+        return events
+
+
+def track_events(detections: np.ndarray, **kwargs) -> np.ndarray:
+    """Run EventTracker over stored DETECTION_DTYPE records"""
+    tracker = EventTracker(**kwargs)
+    if len(detections):
+        detections = detections[np.argsort(detections["frame"], kind="stable")]
+        frames, offsets = np.unique(detections["frame"], return_index=True)
+        boxes = np.stack([detections[c] for c in ("x1", "y1", "x2", "y2", "conf", "cls")],
+                         axis=1).astype(np.float32)
+        # Legacy CSV predictions have no confidences
+        boxes[np.isnan(boxes[:, 4]), 4] = 0.0
+        for frame, rows in zip(frames.tolist(), np.split(boxes, offsets[1:])):
+            tracker.update(frame, rows)
+    return tracker.finish()
+
+
+def events_to_json(events: np.ndarray, fps: float) -> list:
+    """API representation of event records, with times in seconds"""
+    fps = fps or 30
+    return [
+        {
+            "id": int(e["event"]),
+            "startFrame": int(e["start_frame"]),
+            "endFrame": int(e["end_frame"]),
+            "startTime": round(e["start_frame"] / fps, 3),
+            "endTime": round(e["end_frame"] / fps, 3),
+            "peakFrame": int(e["peak_frame"]),
+            "peakConf": round(float(e["peak_conf"]), 4),
+            "bbox": [int(round(float(e[c]))) for c in ("x1", "y1", "x2", "y2")],
+            "cls": int(e["cls"]),
+            "detections": int(e["detections"]),
+        }
+        for e in events
+    ]
@@ -0,0 +1,228 @@
+# src/backend/uploads.py
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+import anyio
+from fastapi import HTTPException
+from starlette.formparsers import MultiPartParser, MultiPartException
+from metrics import UPLOAD_BYTES
+
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.environ.get("SERGEK_MAX_UPLOAD_MB", "2048")) * 1024 * 1024
+# Room for the boundaries, part headers and small fields around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Upload exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit"
+    )
+
+
+async def write_chunks(chunks, f, hasher, written: int = 0, limit: int = MAX_UPLOAD_BYTES) -> int:
+    """Append an async iterable of byte chunks to an open async file
+
+    Updates `hasher` as it goes and raises 413 once more than `limit` bytes
+    have been written in total. Returns the new total.
+    """
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        written += len(chunk)
+        if written > limit:
+            raise too_large()
+        hasher.update(chunk)
+        await f.write(chunk)
+        UPLOAD_BYTES.inc(len(chunk))
+    return written
+
+
+async def _limited(chunks, limit: int):
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > limit:
+            raise too_large()
+        yield chunk
+
+
+async def read_upload_form(request, limit: int = MAX_UPLOAD_BYTES):
+    """Parse a multipart upload, refusing it before it is received in full
+
+    A Content-Length over the limit is rejected before any of the body is
+    read; bodies without one (chunked) are counted as they stream in. The
+    parser spools the file as it arrives, so an oversized upload never
+    reaches disk in full. The caller must close the returned FormData.
+    """
+    body_limit = limit + MULTIPART_OVERHEAD
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > body_limit:
+        raise too_large()
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+    parser = MultiPartParser(request.headers, _limited(request.stream(), body_limit), max_files=1)
+    try:
+        return await parser.parse()
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+
+async def _read_upload(file, chunk_size: int = CHUNK_SIZE):
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def save_upload(file, dest: Path, limit: int = MAX_UPLOAD_BYTES):
+    """Stream an UploadFile to `dest` in fixed-size chunks
+
+    Returns (size, sha256 hex digest). A partial file is removed on error.
+    """
+    hasher = hashlib.sha256()
+    try:
+        async with await anyio.open_file(dest, "wb") as f:
+            size = await write_chunks(_read_upload(file), f, hasher, limit=limit)
+    except BaseException:
+        await anyio.Path(dest).unlink(missing_ok=True)
+        raise
+    return size, hasher.hexdigest()
+
+
+async def hash_file(path: Path) -> str:
+    hasher = hashlib.sha256()
+    async with await anyio.open_file(path, "rb") as f:
+        while chunk := await f.read(CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class UploadSessions:
+    """Resumable chunked uploads: init, append chunks at an offset, finalize
+
+    Each session is a directory with the bytes received so far and a small
+    JSON manifest, so a client can ask for the current offset and resume
+    after a dropped connection (or a server restart). The running hash is
+    kept in memory and recomputed from disk if it was lost.
+    """
+
+    def __init__(self, root: Path, limit: int = MAX_UPLOAD_BYTES):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.limit = limit
+        self._hashers = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _dir(self, upload_id: str) -> Path:
+        try:
+            uuid.UUID(upload_id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        return self.root / upload_id
+
+    def _lock(self, upload_id: str) -> anyio.Lock:
+        with self._guard:
+            return self._locks.setdefault(upload_id, anyio.Lock())
+
+    def _read_manifest(self, upload_id: str) -> dict:
+        manifest = self._dir(upload_id) / "manifest.json"
+        if not manifest.exists():
+            raise HTTPException(status_code=404, detail="Upload not found")
+        return json.loads(manifest.read_text())
+
+    def _write_manifest(self, upload_id: str, manifest: dict):
+        path = self._dir(upload_id) / "manifest.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, path)
+
+    def create(self, filename: str, content_type: str, total_size: int = None) -> dict:
+        if total_size is not None and total_size > self.limit:
+            raise too_large()
+        upload_id = str(uuid.uuid4())
+        directory = self._dir(upload_id)
+        directory.mkdir()
+        (directory / "data.part").touch()
+        manifest = {
+            "uploadId": upload_id,
+            "filename": os.path.basename(filename),
+            "contentType": content_type,
+            "totalSize": total_size,
+            "received": 0,
+        }
+        self._write_manifest(upload_id, manifest)
+        self._hashers[upload_id] = hashlib.sha256()
+        return manifest
+
+    def status(self, upload_id: str) -> dict:
+        return self._read_manifest(upload_id)
+
+    async def append(self, upload_id: str, offset: int, chunks) -> dict:
+        """Append streamed bytes at `offset`, which must equal the bytes received"""
+        async with self._lock(upload_id):
+            manifest = self._read_manifest(upload_id)
+            if offset != manifest["received"]:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Offset {offset} does not match received size {manifest['received']}"
+                )
+            data_path = self._dir(upload_id) / "data.part"
+            hasher = self._hashers.get(upload_id)
+            if hasher is None:
+                hasher = hashlib.sha256()
+                async with await anyio.open_file(data_path, "rb") as f:
+                    while chunk := await f.read(CHUNK_SIZE):
+                        hasher.update(chunk)
+                self._hashers[upload_id] = hasher
+
+            limit = min(self.limit, manifest["totalSize"] or self.limit)
+            async with await anyio.open_file(data_path, "r+b") as f:
+                await f.seek(offset)
+                try:
+                    received = await write_chunks(chunks, f, hasher, offset, limit)
+                except BaseException:
+                    # Drop the partial chunk so the client can retry from `offset`
+                    await f.truncate(offset)
+                    self._hashers.pop(upload_id, None)
+                    raise
+
+            manifest["received"] = received
+            self._write_manifest(upload_id, manifest)
+            return manifest
+
+    async def finalize(self, upload_id: str, dest: Path, sha256: str = None) -> dict:
+        """Move the assembled file to `dest` and return its manifest with hash"""
+        async with self._lock(upload_id):
+            manifest = self._read_manifest(upload_id)
+            if manifest["totalSize"] is not None and manifest["received"] != manifest["totalSize"]:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload incomplete: {manifest['received']} of {manifest['totalSize']} bytes"
+                )
+            data_path = self._dir(upload_id) / "data.part"
+            hasher = self._hashers.pop(upload_id, None)
+            digest = hasher.hexdigest() if hasher else await hash_file(data_path)
+            if sha256 and sha256.lower() != digest:
+                raise HTTPException(status_code=422, detail="Content hash does not match")
+
+            await anyio.to_thread.run_sync(os.replace, data_path, dest)
+            await anyio.to_thread.run_sync(shutil.rmtree, self._dir(upload_id), True)
+        with self._guard:
+            self._locks.pop(upload_id, None)
+        manifest["sha256"] = digest
+        manifest["size"] = manifest["received"]
+        return manifest
+
+    def abort(self, upload_id: str):
+        directory = self._dir(upload_id)
+        if not directory.exists():
+            raise HTTPException(status_code=404, detail="Upload not found")
+        shutil.rmtree(directory, ignore_errors=True)
+        self._hashers.pop(upload_id, None)
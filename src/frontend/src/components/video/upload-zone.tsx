@@ -17,6 +17,7 @@ interface UploadStatus {
     status?: 'uploading' | 'processing' | 'completed' | 'error';
     processedFilename?: string;
     progress?: number;
+    error?: string;
 }
 
 export const UploadZone = () => {
@@ -47,11 +48,23 @@ export const UploadZone = () => {
                 setUploadStatus(prev => ({
                     ...prev,
                     status: 'completed',
+                    processingTime: data.processingTime ?? undefined,
                     processedFilename: data.processedFilename
                 }))
                 return true
             }
 
+            // The job will not finish; stop polling and show why
+            if (data.status === 'failed') {
+                console.error('Processing failed:', data.error)
+                setUploadStatus(prev => ({
+                    ...prev,
+                    status: 'error',
+                    error: data.error ?? undefined
+                }))
+                return true
+            }
+
             return false
         } catch (error) {
             console.error('Error checking status:', error)
@@ -116,7 +129,6 @@ export const UploadZone = () => {
             const data = await response.json()
             setUploadStatus({
                 isUploading: false,
-                processingTime: data.processingTime,
                 status: 'processing',
                 processedFilename: data.processedFilename
             })
@@ -176,8 +188,8 @@ export const UploadZone = () => {
         }
     }
 
-    const predictionsUrl = uploadStatus?.status === 'completed'
-        ? `http://localhost:8000/api/videos/predictions/${uploadStatus.processedFilename}`
+    const eventsUrl = uploadStatus?.status === 'completed'
+        ? `http://localhost:8000/api/videos/events/${uploadStatus.processedFilename}`
         : undefined
 
     const handleReset = useCallback(() => {
@@ -301,7 +313,7 @@ export const UploadZone = () => {
                             <div className="space-y-6">
                                 <div className="rounded-xl overflow-hidden">
                                     <VideoPlayer videoUrl={processedVideoUrl}
-                                                predictionsUrl={predictionsUrl}/>
+                                                eventsUrl={eventsUrl}/>
                                 </div>
                                 <div className="flex justify-center space-x-4">
                                     <a
@@ -329,7 +341,7 @@ export const UploadZone = () => {
                     <div className="mt-6 text-center">
                         <div className="inline-flex items-center px-4 py-2 rounded-full bg-red-500/20 text-red-400">
                             <X className="h-4 w-4 mr-2" />
-                            Error processing video
+                            Error processing video{uploadStatus.error ? `: ${uploadStatus.error}` : ''}
                         </div>
                     </div>
                 )}
@@ -7,10 +7,18 @@ import { TimestampList } from './timestamp-list'
 
 interface VideoPlayerProps {
     videoUrl: string
-    predictionsUrl?: string
+    eventsUrl?: string
 }
 
-export const VideoPlayer: React.FC<VideoPlayerProps> = ({ videoUrl, predictionsUrl }) => {
+interface AccidentEvent {
+    id: number;
+    startFrame: number;
+    endFrame: number;
+    startTime: number;
+    endTime: number;
+}
+
+export const VideoPlayer: React.FC<VideoPlayerProps> = ({ videoUrl, eventsUrl }) => {
     const [isLoading, setIsLoading] = useState(false)
     const [error, setError] = useState<string | null>(null)
     const [isMounted, setIsMounted] = useState(false)
@@ -26,73 +34,34 @@ export const VideoPlayer: React.FC<VideoPlayerProps> = ({ videoUrl, predictionsU
 
     useEffect(() => {
         setIsMounted(true)
-        if (predictionsUrl) {
-            fetchPredictions()
+        if (eventsUrl) {
+            fetchEvents()
         }
-    }, [predictionsUrl])
+    }, [eventsUrl])
 
-    const fetchPredictions = async () => {
+    // Incidents are tracked server-side; one record per accident event
+    const fetchEvents = async () => {
         try {
-            if (!predictionsUrl) {
-                throw new Error('predictionsUrl is undefined');
+            if (!eventsUrl) {
+                throw new Error('eventsUrl is undefined');
             }
 
-            const response = await fetch(predictionsUrl);
+            const response = await fetch(eventsUrl);
             const data = await response.json();
-            const videoFps = data.fps;
-            setFps(videoFps);
-
-            // Use the clustering function
-            const clusteredPredictions = clusterPredictions(data.predictions);
-            setPredictions(clusteredPredictions);
+            setFps(data.fps);
+            setPredictions(data.events.map((event: AccidentEvent) => ({
+                frame: event.startFrame,
+                endFrame: event.endFrame,
+                timestamp: formatTimestamp(event.startTime),
+                duration: formatTimestamp(event.endTime - event.startTime)
+            })));
 
         } catch (error) {
-            console.error('Error fetching predictions:', error);
-            setError('Error fetching predictions');
+            console.error('Error fetching events:', error);
+            setError('Error fetching events');
         }
     };
 
-    // Improved clustering function
-    const clusterPredictions = (rawPredictions: any[], minGap: number = 5) => {
-        if (!rawPredictions.length) return [];
-
-        // Sort predictions by frame number
-        const sortedPredictions = [...rawPredictions].sort((a, b) => a.frame - b.frame);
-
-        const clusters: any[] = [];
-        let currentCluster = {
-            frame: sortedPredictions[0].frame,
-            endFrame: sortedPredictions[0].frame,
-            timestamp: formatTimestamp(sortedPredictions[0].frame / fps),
-            duration: "0.000"
-        };
-
-        for (let i = 1; i < sortedPredictions.length; i++) {
-            const currentFrame = sortedPredictions[i].frame;
-
-            if (currentFrame - currentCluster.endFrame <= minGap) {
-                // Extend current cluster
-                currentCluster.endFrame = currentFrame;
-                currentCluster.duration = formatTimestamp(
-                    (currentFrame - currentCluster.frame) / fps
-                );
-            } else {
-                // Start new cluster
-                clusters.push(currentCluster);
-                currentCluster = {
-                    frame: currentFrame,
-                    endFrame: currentFrame,
-                    timestamp: formatTimestamp(currentFrame / fps),
-                    duration: "0.000"
-                };
-            }
-        }
-
-        // Add final cluster
-        clusters.push(currentCluster);
-        return clusters;
-    };
-
     const handleSeek = (frame: number) => {
         if (videoRef.current) {
             // Pause the video first
@@ -0,0 +1,67 @@
+"""Serial vs concurrent throughput of the VLM description stage
+
+Describes the same synthetic crops once with one request in flight and
+once with `--concurrency` in flight, against the local mock server unless
+--base-url points at a real endpoint. The disk cache is bypassed so every
+image costs a request.
+
+Usage: python benchmark_vlm.py [--images 32] [--concurrency 8] [--latency 0.5]
+                               [--failure-rate 0.05] [--base-url URL]
+"""
+import argparse
+import asyncio
+import time
+import numpy as np
+from describe import VLMDescriber
+from mock_vlm_server import start_server
+
+
+def synthetic_crops(count: int, size: int = 224) -> list:
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (size, size, 3), dtype=np.uint8) for _ in range(count)]
+
+
+async def timed_run(images: list, base_url: str, concurrency: int) -> dict:
+    async with VLMDescriber(base_url=base_url, concurrency=concurrency, use_cache=False,
+                            backoff=0.05) as describer:
+        start = time.perf_counter()
+        await describer.describe_all(images)
+        elapsed = time.perf_counter() - start
+        return {
+            "concurrency": concurrency,
+            "seconds": round(elapsed, 2),
+            "images_per_second": round(len(images) / elapsed, 2),
+            **describer.stats,
+        }
+
+
+def benchmark(images: int, concurrency: int, latency: float, failure_rate: float,
+              base_url: str = None):
+    server = None
+    if base_url is None:
+        server, base_url = start_server(latency=latency, failure_rate=failure_rate)
+    crops = synthetic_crops(images)
+    try:
+        serial = asyncio.run(timed_run(crops, base_url, 1))
+        concurrent = asyncio.run(timed_run(crops, base_url, concurrency))
+    finally:
+        if server is not None:
+            server.shutdown()
+    for run in (serial, concurrent):
+        print(f"concurrency={run['concurrency']:<3} {run['seconds']:8.2f}s  "
+              f"{run['images_per_second']:7.2f} images/sec  "
+              f"requests={run['requests']} retries={run['retries']}")
+    print(f"speedup x{serial['seconds'] / concurrent['seconds']:.2f}")
+    return serial, concurrent
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="VLM description stage throughput")
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mock server delay per request")
+    parser.add_argument("--failure-rate", type=float, default=0.05,
+                        help="Fraction of mock requests answered with 429/503")
+    parser.add_argument("--base-url", help="Benchmark a real endpoint instead of the mock")
+    args = parser.parse_args()
+    benchmark(args.images, args.concurrency, args.latency, args.failure_rate, args.base_url)
@@ -1,19 +1,39 @@
+"""Describe saved key frames and write Filename/Time/Description rows
+
+Key frames are read with the backend's keyframes module, so src/backend
+must be on PYTHONPATH.
+
+Usage: PYTHONPATH=src/backend python yolovlm/desc.py [keyframes_dir] [filename]
+"""
+import sys
 import pandas as pd
-import cv2
-from vlm import get_desc
-from os import walk
+from describe import describe_images
+from keyframes import read_keyframes
+
 
-filenames = next(walk("./top_confidence_frames/"), (None, None, []))[2]
+def keyframe_time(entry, fps=None):
+    if "timestamp" in entry:
+        return entry["timestamp"]
+    return round(entry["frame"] / fps, 3) if fps else entry["frame"]
 
-results = []
 
-for fn in filenames:
-    time = fn.split("_")[-1].split(".")[0]
-    filename = "video1.mp4"
+def describe_keyframes(keyframes, filename, csv_path="predictions.csv", fps=None, **kwargs):
+    """Describe key frame crops held in memory and write Filename/Time/Description rows"""
+    keyframes = [entry for entry in keyframes if entry.get("crop") is not None]
+    descriptions = describe_images([entry["crop"] for entry in keyframes], **kwargs)
+    results = [
+        (filename, keyframe_time(entry, fps), desc)
+        for entry, desc in zip(keyframes, descriptions)
+    ]
+    df = pd.DataFrame(results, columns=["Filename", "Time", "Description"])
+    df.to_csv(csv_path, index=False)
+    return df
 
-    desc = get_desc("./top_confidence_frames/" + fn)
-    results.append((filename, time, desc))
-    print(desc)
 
-df = pd.DataFrame(results, columns=["Filename", "Time", "Description"])
-df.to_csv("predictions.csv", index=False)
+if __name__ == "__main__":
+    # Describe key frames saved earlier by detection_top5.py or process_video
+    directory = sys.argv[1] if len(sys.argv) > 1 else "./top_confidence_frames/"
+    filename = sys.argv[2] if len(sys.argv) > 2 else "video1.mp4"
+    df = describe_keyframes(read_keyframes(directory), filename)
+    for desc in df["Description"]:
+        print(desc)
@@ -0,0 +1,186 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+from pathlib import Path
+import cv2
+import httpx
+import numpy as np
+from openai import (AsyncOpenAI, APIConnectionError, APITimeoutError, InternalServerError,
+                    RateLimitError)
+
+VLM_BASE_URL = os.environ.get("SERGEK_VLM_BASE_URL", "https://dashscope-intl.aliyuncs.com/compatible-mode/v1")
+VLM_API_KEY = os.environ.get("SERGEK_VLM_API_KEY", os.environ.get("DASHSCOPE_API_KEY", ""))
+VLM_MODEL = os.environ.get("SERGEK_VLM_MODEL", "qwen-vl-max")
+VLM_CONCURRENCY = int(os.environ.get("SERGEK_VLM_CONCURRENCY", "8"))
+VLM_CACHE_DIR = Path(os.environ.get("SERGEK_VLM_CACHE_DIR", Path(__file__).resolve().parent / "vlm_cache"))
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 0.5
+REQUEST_TIMEOUT = 60.0
+JPEG_QUALITY = 90
+
+# Errors worth retrying: throttling, dropped connections and 5xx responses
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+PROMPT = '''You are an advanced AI model for vehicle accident recognition. Analyze the given image and determine if an accident has occurred. Your response must follow this format:
+
+1. Start with either **"There is an accident"** if an accident is detected, or **"No accident"** if no accident is found.
+2. If an accident is detected, describe the vehicles involved, including their types (car, motorcycle, truck, or bus).
+3. Provide details about the accident, such as the position of vehicles, potential collision points, and the severity if possible.
+4. If no accident is detected, simply state "No accident."
+
+**Example Outputs:**
+
+- **If an accident is detected:**
+  _"There is an accident. A car and a motorcycle have collided at an intersection. The car's front is damaged, and the motorcycle is lying on its side."_
+
+- **If no accident is detected:**
+  _"No accident."_
+
+### **Additional Guidelines:**
+- If multiple vehicles are involved, list them clearly.
+- If visibility is unclear, mention "Limited visibility, accident detection uncertain."
+- Keep the response concise and factual.
+'''
+
+
+def encode_jpeg(image) -> bytes:
+    """JPEG bytes of a BGR frame; JPEG bytes and file paths pass through"""
+    if isinstance(image, bytes):
+        return image
+    if isinstance(image, (str, Path)):
+        return Path(image).read_bytes()
+    ok, buffer = cv2.imencode(".jpg", np.ascontiguousarray(image), [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    if not ok:
+        raise ValueError("Could not encode image as JPEG")
+    return buffer.tobytes()
+
+
+def messages_for(jpeg: bytes, prompt: str = PROMPT) -> list:
+    image_url = f"data:image/jpeg;base64,{base64.b64encode(jpeg).decode('ascii')}"
+    return [{
+        "role": "user",
+        "content": [
+            {"type": "image_url", "image_url": {"url": image_url}},
+            {"type": "text", "text": prompt},
+        ],
+    }]
+
+
+class DescriptionCache:
+    """Descriptions on disk, keyed by image bytes, prompt and model"""
+
+    def __init__(self, root=VLM_CACHE_DIR):
+        self.root = Path(root)
+
+    @staticmethod
+    def key(jpeg: bytes, prompt: str, model: str) -> str:
+        digest = hashlib.sha256()
+        for part in (hashlib.sha256(jpeg).digest(), prompt.encode(), model.encode()):
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)["description"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key: str, description: str):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"description": description}, f)
+        os.replace(tmp_path, path)
+
+
+class VLMDescriber:
+    """Describes images with an OpenAI-compatible vision model, concurrently
+
+    One AsyncOpenAI client (and its HTTP connection pool) is shared by all
+    requests; at most `concurrency` are in flight at once. Throttling,
+    connection errors and 5xx responses are retried with exponential
+    backoff and jitter. Answers are cached on disk, so re-describing the
+    same crop with the same prompt and model costs nothing.
+    """
+
+    def __init__(self, base_url: str = VLM_BASE_URL, api_key: str = VLM_API_KEY,
+                 model: str = VLM_MODEL, prompt: str = PROMPT,
+                 concurrency: int = VLM_CONCURRENCY, max_retries: int = MAX_RETRIES,
+                 backoff: float = BACKOFF_SECONDS, cache: DescriptionCache = None,
+                 use_cache: bool = True):
+        self.model = model
+        self.prompt = prompt
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cache = (cache or DescriptionCache()) if use_cache else None
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.client = AsyncOpenAI(
+            api_key=api_key or "none",
+            base_url=base_url,
+            max_retries=0,  # retried here, with backoff shared across the pool
+            timeout=REQUEST_TIMEOUT,
+            http_client=httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=max(1, concurrency),
+                max_keepalive_connections=max(1, concurrency),
+            )),
+        )
+        self.stats = {"requests": 0, "retries": 0, "cache_hits": 0}
+
+    async def describe(self, image) -> str:
+        jpeg = encode_jpeg(image)
+        key = DescriptionCache.key(jpeg, self.prompt, self.model) if self.cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                return cached
+
+        messages = messages_for(jpeg, self.prompt)
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    self.stats["requests"] += 1
+                    completion = await self.client.chat.completions.create(
+                        model=self.model, messages=messages
+                    )
+                    break
+                except RETRYABLE_ERRORS:
+                    if attempt == self.max_retries:
+                        raise
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(self.backoff * 2 ** attempt * (0.5 + random.random()))
+
+        description = completion.choices[0].message.content
+        if key:
+            self.cache.put(key, description)
+        return description
+
+    async def describe_all(self, images) -> list:
+        """Descriptions of `images` (BGR arrays, JPEG bytes or paths), in order"""
+        return await asyncio.gather(*(self.describe(image) for image in images))
+
+    async def aclose(self):
+        await self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+
+def describe_images(images, **kwargs) -> list:
+    """Blocking wrapper around VLMDescriber.describe_all for scripts"""
+    async def run():
+        async with VLMDescriber(**kwargs) as describer:
+            return await describer.describe_all(images)
+    return asyncio.run(run())
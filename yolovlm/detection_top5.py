@@ -1,17 +1,25 @@
+"""Top-5 confidence key frames of a video, optionally described by the VLM
+
+The detection record type, drawing helpers and decoders are shared with
+the backend, so src/backend must be on PYTHONPATH.
+
+Usage: PYTHONPATH=src/backend python yolovlm/detection_top5.py [video_path] [--describe]
+"""
 import cv2
-import numpy as np
-import pandas as pd
-from ultralytics import YOLO
 import torch
 import datetime
 import os
-import shutil
+import sys
+from detections import boxes_from_result, draw_detections
+from inference_backends import load_yolo
+from keyframes import TopKSelector, save_keyframes, NMS_SECONDS
+from decoding import open_decoder
 
 
-def create_video_writer(video_cap, output_filename):
-    frame_width = int(video_cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    frame_height = int(video_cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = int(video_cap.get(cv2.CAP_PROP_FPS))
+def create_video_writer(decoder, output_filename):
+    frame_width = decoder.width
+    frame_height = decoder.height
+    fps = int(decoder.fps)
 
     if fps == 0:
         fps = 30  # Default FPS if reading fails
@@ -24,19 +32,17 @@ def create_video_writer(video_cap, output_filename):
 
 # Select device
 device = torch.device("cuda") if torch.cuda.is_available() else torch.device("cpu")
-model = YOLO("LongFineTune.pt").to(device)
-
-video_filename = "./test_data/113.mov"
-video = cv2.VideoCapture(video_filename)
-if not video.isOpened():
-    print("Error opening video file")
+model = load_yolo("LongFineTune.pt", device)
+
+paths = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+video_filename = paths[0] if paths else "./test_data/113.mov"
+try:
+    video = open_decoder(video_filename)
+except Exception as e:
+    print(f"Error opening video file: {e}")
     exit()
 
-# Ensure directory is recreated
 output_dir = "top_confidence_frames"
-if os.path.exists(output_dir):
-    shutil.rmtree(output_dir)  # Remove existing directory
-os.makedirs(output_dir)  # Create new directory
 
 start = datetime.datetime.now()
 frame_skip = 1  # Process all frames (increase later if needed)
@@ -45,37 +51,20 @@ frame_skip = 1  # Process all frames (increase later if needed)
 writer, fps = create_video_writer(video, "output_all_detections.mp4")
 
 frame_skip = 3
-frame_count = 0
-frame_confidences = []  # Store frame indices and their highest confidence
-saved_top_frames = []
-
-while True:
-    ret, frame = video.read()
-    if not ret:
-        break
-
-    frame_count += 1
-    if frame_count % frame_skip != 0:
-        continue
+# Keeps only the crops of the 5 best detections, at least NMS_SECONDS apart
+top_frames = TopKSelector(k=5, nms_window=int(NMS_SECONDS * fps))
 
+# Frames in between are skipped without converting them; each frame is
+# written before the next is decoded, so one buffer is reused throughout
+for frame_count, frame in video.frames(start_frame=frame_skip, step=frame_skip, buffers=1):
     results = model.predict(frame, conf=0.7, agnostic_nms=False)
     anno = results[0]
     class_list = anno.names
 
-    bboxes = pd.DataFrame(anno.boxes.data.cpu().numpy()).astype("float")
-
-    max_conf = 0  # Track max confidence in the frame
-    for _, row in bboxes.iterrows():
-        confidence = row[4]
-        d = int(row[5])
-        x1, y1, x2, y2 = row[:4].astype(int).tolist()
-        label = f"{class_list[d]}: {confidence:.2f}"
-
-        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-        timestamp = frame_count / fps  # Convert frame index to seconds
-        frame_confidences.append((frame_count, timestamp, confidence, frame.copy(), [[x1, y1, x2, y2]]))
+    boxes = boxes_from_result(anno)
+    top_frames.offer(frame_count, frame, boxes)  # crops the clean frame
+    labels = [f"{class_list[int(cls)]}: {conf:.2f}" for conf, cls in boxes[:, 4:6].tolist()]
+    draw_detections(frame, boxes, labels, label_style="text")
 
     # Write processed frame
     if writer.isOpened():
@@ -85,15 +74,13 @@ video.release()
 writer.release()
 cv2.destroyAllWindows()
 
-frame_confidences.sort(key=lambda x: x[2], reverse=True)  # Sort by confidence
-top_frames = frame_confidences[:5]  # Get top 5
-
-for i, (frame_idx, timestamp, conf, frame, bbox) in enumerate(top_frames):
-    bbox = bbox[0]  # Unpack lis
-    cropped_img = frame[bbox[1]:bbox[3], bbox[0]:bbox[2]]
-    filename = f"./top_confidence_frames/topframe_{i}_{timestamp}.jpg"
-    cv2.imwrite(filename, cropped_img)
-
+saved_top_frames = save_keyframes(top_frames.results(), output_dir, fps)
 print(f"Saved top 5 frames: {saved_top_frames}")
+
+# Describe the crops straight from memory instead of re-reading the JPEGs
+if "--describe" in sys.argv:
+    from desc import describe_keyframes
+    descriptions = describe_keyframes(top_frames.results(), os.path.basename(video_filename), fps=fps)
+    print(descriptions.to_string(index=False))
 end = datetime.datetime.now()
 print(f"Time to process: {(end - start).total_seconds() * 1000:.0f} milliseconds")
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""Local stand-in for an OpenAI-compatible vision model endpoint
+
+Answers POST /v1/chat/completions after a configurable delay, with a
+deterministic description derived from the request's image, and fails a
+configurable fraction of requests with 429/503, or just the first
+`--fail-first` requests with 503, to exercise retries. Each
+request is served on its own thread, like a real backend handling
+concurrent calls.
+
+Usage: python mock_vlm_server.py [--port 8765] [--latency 0.5] [--failure-rate 0.0]
+                                 [--fail-first 0]
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DESCRIPTIONS = [
+    "There is an accident. Two cars have collided at an intersection.",
+    "There is an accident. A truck has rear-ended a car in the right lane.",
+    "No accident.",
+    "Limited visibility, accident detection uncertain.",
+]
+
+
+def make_handler(latency: float, failure_rate: float, fail_first: int = 0):
+    remaining_failures = [fail_first]
+    lock = threading.Lock()
+
+    def injected_failure() -> bool:
+        with lock:
+            if remaining_failures[0] > 0:
+                remaining_failures[0] -= 1
+                return True
+        return False
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status: int, payload: dict):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._reply(404, {"error": {"message": "not found"}})
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            time.sleep(latency)
+            if injected_failure():
+                self._reply(503, {"error": {"message": "try again"}})
+                return
+            if random.random() < failure_rate:
+                self._reply(random.choice([429, 503]), {"error": {"message": "try again"}})
+                return
+
+            digest = hashlib.sha256(json.dumps(request["messages"]).encode()).digest()
+            self._reply(200, {
+                "id": f"chatcmpl-{digest[:8].hex()}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant",
+                                "content": DESCRIPTIONS[digest[0] % len(DESCRIPTIONS)]},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+
+    return Handler
+
+
+def start_server(port: int = 0, latency: float = 0.5, failure_rate: float = 0.0,
+                 fail_first: int = 0):
+    """Serve in a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port),
+                                 make_handler(latency, failure_rate, fail_first))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible VLM server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--fail-first", type=int, default=0,
+                        help="Answer this many requests with 503 before serving")
+    args = parser.parse_args()
+    server, url = start_server(args.port, args.latency, args.failure_rate, args.fail_first)
+    print(f"Mock VLM server on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,78 @@
+import asyncio
+import time
+import pytest
+from openai import InternalServerError
+from describe import VLMDescriber, DescriptionCache
+from mock_vlm_server import start_server
+
+LATENCY = 0.2
+
+
+@pytest.fixture
+def mock_server(request):
+    options = getattr(request, "param", {})
+    server, base_url = start_server(latency=LATENCY, **options)
+    yield base_url
+    server.shutdown()
+
+
+def images(count: int) -> list:
+    # JPEG bytes pass through encode_jpeg untouched, and each one is a distinct image
+    return [b"\xff\xd8 image %d \xff\xd9" % i for i in range(count)]
+
+
+def describe(base_url: str, batch: list, **kwargs):
+    async def run():
+        async with VLMDescriber(base_url=base_url, **kwargs) as describer:
+            start = time.perf_counter()
+            descriptions = await describer.describe_all(batch)
+            return descriptions, time.perf_counter() - start, describer.stats
+    return asyncio.run(run())
+
+
+def test_requests_run_concurrently_up_to_the_limit(mock_server):
+    descriptions, elapsed, stats = describe(mock_server, images(8), concurrency=4,
+                                            use_cache=False)
+
+    assert len(descriptions) == 8 and all(descriptions)
+    assert stats["requests"] == 8
+    # Two waves of four, not eight requests one after another
+    assert 2 * LATENCY <= elapsed < 5 * LATENCY
+
+
+def test_descriptions_keep_input_order(mock_server):
+    batch = images(6)
+    concurrent, _, _ = describe(mock_server, batch, concurrency=6, use_cache=False)
+    serial = [describe(mock_server, [image], use_cache=False)[0][0] for image in batch]
+
+    assert concurrent == serial
+
+
+@pytest.mark.parametrize("mock_server", [{"fail_first": 3}], indirect=True)
+def test_5xx_responses_are_retried_with_backoff(mock_server):
+    descriptions, elapsed, stats = describe(mock_server, images(1), use_cache=False,
+                                            max_retries=4, backoff=0.05)
+
+    assert descriptions[0]
+    assert stats["requests"] == 4
+    assert stats["retries"] == 3
+    # Four round trips plus at least half of each 0.05, 0.1, 0.2 s backoff
+    assert elapsed >= 4 * LATENCY + 0.5 * (0.05 + 0.1 + 0.2)
+
+
+@pytest.mark.parametrize("mock_server", [{"fail_first": 10}], indirect=True)
+def test_retries_give_up_after_max_retries(mock_server):
+    with pytest.raises(InternalServerError):
+        describe(mock_server, images(1), use_cache=False, max_retries=2, backoff=0.01)
+
+
+def test_cache_hits_skip_the_request(mock_server, tmp_path):
+    cache = DescriptionCache(tmp_path)
+    batch = images(3)
+    first, _, first_stats = describe(mock_server, batch, cache=cache)
+    second, elapsed, second_stats = describe(mock_server, batch, cache=cache)
+
+    assert first == second
+    assert first_stats["requests"] == 3 and first_stats["cache_hits"] == 0
+    assert second_stats["requests"] == 0 and second_stats["cache_hits"] == 3
+    assert elapsed < LATENCY